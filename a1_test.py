@@ -1,11 +1,37 @@
 import unittest
 from distance_map import DistanceMap
-from domain import Parcel, Truck, Fleet
+import domain
+from domain import Parcel, Truck, Fleet, ParcelTable
 from container import PriorityQueue
-from scheduler import RandomScheduler, GreedyScheduler
-from experiment import SchedulingExperiment
+from scheduler import RandomScheduler, GreedyScheduler, FirstFitScheduler, \
+    BestFitScheduler, SavingsScheduler
+from experiment import SchedulingExperiment, run_replications, \
+    read_completed_distance_map, read_distance_map
+from truck_index import TruckIndex, CapacityTree
+from city_registry import CityRegistry
+from matrix_distance_map import MatrixDistanceMap
+import shortest_paths
+from shortest_paths import complete_distances
+from lazy_distance_map import LazyDistanceMap
+from route_optimizer import optimize_routes
+from local_search import LocalSearchScheduler, _SearchState
+from exact_scheduler import ExactScheduler
+from beam_scheduler import BeamScheduler
+from genetic_scheduler import GeneticScheduler
+import itertools
+import os
 import random
 import signal
+import tempfile
+from fractions import Fraction
+from unittest import mock
+
+
+def _data_file(name: str) -> str:
+    """Return the path of the data file <name>, which is kept next to this
+    file, so that the tests can be run from any directory.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
 
 
 class TestUtil(unittest.TestCase):
@@ -21,6 +47,28 @@ class TestUtil(unittest.TestCase):
         self.assertCountEqual(allowed_methods, public_methods,
                               'You should not add any new public methods')
 
+    def random_problem(self, seed, num_parcels=30, num_trucks=6,
+                       symmetric=True):
+        """Return a random distance map between a depot 'T' and eight cities,
+        <num_parcels> random parcels from 'T', and <num_trucks> empty trucks
+        at 'T', all drawn from a generator seeded with <seed>.
+        """
+        rnd = random.Random(seed)
+        cities = ['c{}'.format(i) for i in range(8)]
+        m = DistanceMap()
+        for i, city1 in enumerate(['T'] + cities):
+            for city2 in cities[i:]:
+                if symmetric:
+                    m.add_distance(city1, city2, rnd.randint(1, 50))
+                else:
+                    m.add_distance(city1, city2, rnd.randint(1, 50),
+                                   rnd.randint(1, 50))
+        parcels = [Parcel(i, rnd.randint(1, 10), 'T', rnd.choice(cities))
+                   for i in range(num_parcels)]
+        trucks = [Truck(i, rnd.randint(10, 40), 'T')
+                  for i in range(num_trucks)]
+        return m, parcels, trucks
+
 
 class TimeOutException(Exception):
     pass
@@ -55,7 +103,8 @@ class TestDistanceMap(TestUtil):
         self.assertPublicAttrs(self.m, [])
 
     def test_public_methods(self):
-        self.assertPublicMethods(DistanceMap, ['distance', 'add_distance'])
+        self.assertPublicMethods(DistanceMap, ['distance', 'add_distance',
+                                               'route_length'])
 
     def test_add_distance(self):
         self.assertIsNone(self.m.add_distance('a', 'b', 10),
@@ -134,6 +183,199 @@ class TestTruck(TestTask2):
         self.truck.pack(self.parcel_3)
         self.assertEqual(100, self.truck.fullness())
 
+    def test_unpack(self):
+        p1 = Parcel(1, 4, 'a', 'Kingston')
+        p2 = Parcel(2, 4, 'a', 'London')
+        p3 = Parcel(3, 4, 'a', 'Kingston')
+        for parcel in [p1, p2, p3]:
+            self.truck.pack(parcel)
+        self.assertTrue(self.truck.unpack(p1))
+        self.assertEqual(['Toronto', 'Kingston', 'London', 'Kingston'],
+                         self.truck.routes)
+        self.assertTrue(self.truck.unpack(p3))
+        self.assertEqual(['Toronto', 'London'], self.truck.routes)
+        self.assertEqual(11, self.truck.available_space)
+        self.assertFalse(self.truck.unpack(p3))
+        self.assertEqual([p2], self.truck.parcels)
+
+    def test_volume_counter(self):
+        old = domain.CHECK_INVARIANTS
+        domain.CHECK_INVARIANTS = True
+        try:
+            truck = Truck(9, 1000, 'Toronto')
+            for i in range(100):
+                self.assertTrue(truck.pack(Parcel(i, 10, 'a', 'b')))
+            self.assertFalse(truck.pack(Parcel(100, 1, 'a', 'b')))
+            self.assertEqual(100.0, truck.fullness())
+            self.assertEqual(0, truck.available_space)
+            truck.parcels.pop()
+            with self.assertRaises(AssertionError):
+                truck.unpack(truck.parcels[0])
+        finally:
+            domain.CHECK_INVARIANTS = old
+
+    def test_route_distance(self):
+        m = DistanceMap()
+        m.add_distance('Toronto', 'Ajax', 5, 6)
+        m.add_distance('Ajax', 'Guelph', 2, 3)
+        m.add_distance('Guelph', 'Toronto', 4, 7)
+        truck = Truck(9, 10, 'Toronto')
+        truck.pack(Parcel(1, 1, 'Toronto', 'Ajax'))
+        self.assertEqual(11, truck.route_distance(m))
+        truck.pack(Parcel(2, 1, 'Toronto', 'Guelph'))
+        self.assertEqual(11, truck.route_distance(m))
+        truck.set_route(['Toronto', 'Guelph', 'Ajax'])
+        self.assertEqual(16, truck.route_distance(m))
+        other = DistanceMap()
+        other.add_distance('Toronto', 'Guelph', 1)
+        other.add_distance('Guelph', 'Ajax', 1)
+        other.add_distance('Ajax', 'Toronto', 1)
+        self.assertEqual(3, truck.route_distance(other))
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            self.truck.colour = 'red'
+        with self.assertRaises(AttributeError):
+            self.parcel.colour = 'red'
+
+
+class TestCityRegistry(TestUtil):
+    def test_ids(self):
+        cities = CityRegistry()
+        self.assertEqual(0, cities.id_of('Toronto'))
+        self.assertEqual(1, cities.id_of('Ajax'))
+        self.assertEqual(0, cities.id_of('Toronto'))
+        self.assertEqual('Ajax', cities.name_of(1))
+        self.assertEqual(2, len(cities))
+
+    def test_intern(self):
+        cities = CityRegistry()
+        first = cities.intern(''.join(['Tor', 'onto']))
+        self.assertIs(first, cities.intern(''.join(['Toron', 'to'])))
+        self.assertIn('Toronto', cities)
+
+
+class TestMatrixDistanceMap(TestUtil):
+    def test_same_as_distance_map(self):
+        m = DistanceMap()
+        matrix = MatrixDistanceMap()
+        for dmap in (m, matrix):
+            dmap.add_distance('a', 'b', 3, 4)
+            dmap.add_distance('b', 'c', 5)
+            dmap.add_distance('a', 'b', 7)
+        for city1 in 'abcd':
+            for city2 in 'abcd':
+                self.assertEqual(m.distance(city1, city2),
+                                 matrix.distance(city1, city2))
+
+    def test_id_lookups(self):
+        cities = CityRegistry()
+        m = MatrixDistanceMap(cities)
+        for i in range(20):
+            m.add_distance(str(i), str(i + 1), i + 1, 100 + i)
+        ids = [cities.id_of(str(i)) for i in range(4)]
+        self.assertEqual([1, 100, -1], m.distances(ids[:3], [1, 0, 2]))
+        self.assertEqual(1 + 2 + 3 + (-1), m.route_length_by_id(ids))
+        self.assertEqual(1 + 2 + 3 + (-1), m.route_length(list('0123')))
+        self.assertEqual(-1, m.distance('0', 'missing'))
+
+    def test_fleet_measures_routes_by_id(self):
+        class ByIdOnly(MatrixDistanceMap):
+            def distance(self, city1, city2):
+                raise AssertionError('looked up a leg by name')
+
+        m = DistanceMap()
+        matrix = ByIdOnly()
+        for dmap in (m, matrix):
+            dmap.add_distance('T', 'a', 3, 4)
+            dmap.add_distance('a', 'b', 5)
+            dmap.add_distance('b', 'T', 6, 7)
+        trucks = [Truck(1, 10, 'T'), Truck(2, 10, 'T')]
+        for i, city in enumerate(['a', 'b', 'missing']):
+            trucks[0].pack(Parcel(i, 1, 'T', city))
+        trucks[1].pack(Parcel(3, 1, 'T', 'b'))
+        for dmap in (m, matrix):
+            f = Fleet()
+            for truck in trucks:
+                f.add_truck(truck)
+            self.assertEqual(3 + 5 - 1 - 1 + 7 + 6,
+                             f.total_distance_travelled(dmap))
+
+
+class TestShortestPaths(TestUtil):
+    def test_dijkstra_matches_floyd_warshall(self):
+        rng = random.Random(0)
+        maps = [MatrixDistanceMap(), MatrixDistanceMap()]
+        for _ in range(40):
+            city1, city2 = rng.sample(range(15), 2)
+            distances = (rng.randint(1, 20), rng.randint(1, 20))
+            for m in maps:
+                m.add_distance(str(city1), str(city2), *distances)
+        complete_distances(maps[0])
+        old = shortest_paths.FLOYD_WARSHALL_LIMIT
+        shortest_paths.FLOYD_WARSHALL_LIMIT = 0
+        try:
+            complete_distances(maps[1], workers=1)
+        finally:
+            shortest_paths.FLOYD_WARSHALL_LIMIT = old
+        self.assertEqual(maps[0].rows(), maps[1].rows())
+
+
+class TestLazyDistanceMap(TestUtil):
+    def test_same_as_completed(self):
+        rng = random.Random(1)
+        lazy = LazyDistanceMap(cache_size=3)
+        matrix = MatrixDistanceMap()
+        for _ in range(30):
+            city1, city2 = rng.sample(range(12), 2)
+            distances = (rng.randint(1, 20), rng.randint(1, 20))
+            lazy.add_distance(str(city1), str(city2), *distances)
+            matrix.add_distance(str(city1), str(city2), *distances)
+        complete_distances(matrix)
+        for city1 in range(13):
+            for city2 in range(13):
+                self.assertEqual(matrix.distance(str(city1), str(city2)),
+                                 lazy.distance(str(city1), str(city2)))
+        counters = lazy.counters()
+        self.assertLessEqual(counters['cached'], 3)
+        self.assertEqual(counters['misses'],
+                         counters['evictions'] + counters['cached'])
+
+    def test_new_road_forgets_paths(self):
+        m = LazyDistanceMap()
+        m.add_distance('a', 'b', 3)
+        m.add_distance('b', 'c', 4)
+        self.assertEqual(7, m.distance('a', 'c'))
+        m.add_distance('c', 'd', 1)
+        self.assertEqual(8, m.distance('a', 'd'))
+        self.assertEqual(0, m.counters()['hits'])
+
+    def test_keeps_first_distance(self):
+        m = LazyDistanceMap()
+        m.add_distance('a', 'b', 3, 4)
+        m.add_distance('b', 'c', 5)
+        self.assertEqual(8, m.distance('a', 'c'))
+        m.add_distance('b', 'a', 9)
+        self.assertEqual((3, 4), (m.distance('a', 'b'), m.distance('b', 'a')))
+        self.assertEqual(8, m.distance('a', 'c'))
+        self.assertEqual({'hits': 1, 'misses': 1, 'evictions': 0,
+                          'cached': 1}, m.counters())
+
+
+class TestParcelTable(TestUtil):
+    def test_parcels(self):
+        table = ParcelTable()
+        table.add(3, 5, 'Toronto', 'Hamilton')
+        table.add(1, 7, 'Hamilton', 'Toronto')
+        self.assertEqual(2, len(table))
+        parcels = table.parcels()
+        self.assertEqual([(3, 5, 'Toronto', 'Hamilton'),
+                          (1, 7, 'Hamilton', 'Toronto')],
+                         [(p.id, p.volume, p.source, p.destination)
+                          for p in parcels])
+        self.assertIs(parcels[0].source, parcels[1].destination)
+        self.assertEqual(1, table[-1].id)
+
 
 class TestFleet(TestTask2):
     def test_num_tracks(self):
@@ -315,6 +557,98 @@ class TestFleet(TestTask2):
         self.assertEqual(175, self.f.average_distance_travelled(self.m))
 
 
+    def test_rollback(self):
+        self.f.add_truck(self.truck)
+        self.f.add_truck(self.truck2)
+        self.truck.pack(self.parcel_3)
+        before = (list(self.truck.parcels), list(self.truck.routes),
+                  self.truck.available_space)
+        outer = self.f.savepoint()
+        self.truck.pack(Parcel(5, 4, 'a', 'Kingston'))
+        inner = self.f.savepoint()
+        self.truck.unpack(self.parcel_3)
+        self.truck2.pack(self.parcel_4)
+        self.truck.set_route(['Toronto', 'Kingston'])
+        self.f.rollback(inner)
+        self.assertEqual(['Toronto', 'b', 'Kingston'], self.truck.routes)
+        self.assertEqual([], self.truck2.parcels)
+        self.assertEqual(5, self.truck2.available_space)
+        self.f.release(inner)
+        self.f.rollback(outer)
+        self.assertEqual(before, (self.truck.parcels, self.truck.routes,
+                                  self.truck.available_space))
+        self.f.release(outer)
+        self.truck.pack(self.parcel_4)
+        self.assertIsNone(self.f._journal)
+
+    def test_rollback_undoes_add_route(self):
+        self.f.add_truck(self.truck)
+        self.truck.pack(Parcel(5, 4, 'a', 'Kingston'))
+        self.assertEqual(200, self.f.total_distance_travelled(self.m))
+        point = self.f.savepoint()
+        self.truck.add_route(Parcel(6, 1, 'a', 'London'))
+        self.truck.add_route(Parcel(7, 1, 'a', 'London'))
+        self.assertEqual(175, self.f.total_distance_travelled(self.m))
+        self.f.rollback(point)
+        self.f.release(point)
+        self.assertEqual(['Toronto', 'Kingston'], self.truck.routes)
+        self.assertEqual(200, self.f.total_distance_travelled(self.m))
+
+    def test_aggregates_follow_changes(self):
+        self.f.add_truck(self.truck)
+        self.f.add_truck(self.truck2)
+        self.assertEqual(0, self.f.total_distance_travelled(self.m))
+        p1 = Parcel(1, 10, 'a', 'Kingston')
+        p2 = Parcel(2, 5, 'x', 'London')
+        self.truck.pack(p1)
+        self.truck.pack(p2)
+        self.assertEqual(175, self.f.total_distance_travelled(self.m))
+        point = self.f.savepoint()
+        self.truck.unpack(p2)
+        self.truck2.pack(Parcel(3, 5, 'x', 'Ajax'))
+        self.assertEqual(2, self.f.num_nonempty_trucks())
+        self.assertEqual(5, self.f.total_unused_space())
+        self.assertEqual(350, self.f.total_distance_travelled(self.m))
+        self.assertAlmostEqual(((2 / 3) * 100 + 100) / 2,
+                               self.f.average_fullness())
+        self.f.rollback(point)
+        self.f.release(point)
+        self.assertEqual(1, self.f.num_nonempty_trucks())
+        self.assertEqual(0, self.f.total_unused_space())
+        self.assertEqual(175, self.f.average_distance_travelled(self.m))
+        self.assertAlmostEqual(100, self.f.average_fullness())
+
+    def test_fullness_does_not_drift(self):
+        rnd = random.Random(148)
+        for _ in range(20):
+            f = Fleet()
+            trucks = [Truck(i, rnd.randint(3, 30), 'T') for i in range(6)]
+            for truck in trucks:
+                f.add_truck(truck)
+            for i in range(200):
+                truck = rnd.choice(trucks)
+                if truck.parcels and rnd.random() < 0.4:
+                    truck.unpack(rnd.choice(truck.parcels))
+                else:
+                    truck.pack(Parcel(i, rnd.randint(1, 5), 'T', 'a'))
+                nonempty = [t for t in trucks if t.parcels]
+                if nonempty:
+                    used = sum(Fraction(t.capacity - t.available_space,
+                                        t.capacity) for t in nonempty)
+                    self.assertEqual(float(used * 100 / len(nonempty)),
+                                     f.average_fullness())
+
+    def test_rollback_updates_index(self):
+        self.f.add_truck(self.truck)
+        self.f.add_truck(self.truck2)
+        index = TruckIndex(self.f.trucks)
+        point = self.f.savepoint()
+        self.truck.pack(self.parcel)
+        self.f.rollback(point)
+        self.f.release(point)
+        self.assertIs(self.truck, index.choose(Parcel(9, 12, 'a', 'b'), True))
+
+
 class TestPriorityQueue(TestUtil):
     def setUp(self) -> None:
         self.num_gt = lambda x, y: x > y
@@ -332,7 +666,8 @@ class TestPriorityQueue(TestUtil):
         self.assertPublicAttrs(PriorityQueue(lambda x, y: True), [])
 
     def test_no_public_methods(self):
-        self.assertPublicMethods(PriorityQueue, ['add', 'remove', 'is_empty'])
+        self.assertPublicMethods(PriorityQueue, ['add', 'remove', 'is_empty',
+                                                'add_many', 'from_iterable'])
 
     def test_add_empty(self):
         pq = PriorityQueue(self.num_gt)
@@ -403,6 +738,52 @@ class TestPriorityQueue(TestUtil):
             exp = sorted(seq, reverse=True)
             self.assertEqual(exp, act, self.error_msg(seq, exp, act))
 
+    def test_add_equal_priority_fifo(self):
+        pq = PriorityQueue(self.list_len)
+        seq = [[i] * random.randint(1, 5) for i in range(200)]
+        for i in seq:
+            pq.add(i)
+        act = self.remove_pq(pq)
+        exp = sorted(seq, key=len, reverse=True)
+        self.assertEqual(exp, act)
+
+    def test_interleaved_add_remove(self):
+        pq = PriorityQueue(self.num_gt)
+        pq.add(3)
+        pq.add(1)
+        self.assertEqual(3, pq.remove())
+        pq.add(2)
+        pq.add(5)
+        self.assertEqual([5, 2, 1], self.remove_pq(pq))
+
+    def test_key_matches_sorted(self):
+        seq = [[i] * random.randint(1, 5) for i in range(200)]
+        for reverse in (False, True):
+            pq = PriorityQueue(key=len, reverse=reverse)
+            for i in seq:
+                pq.add(i)
+            act = self.remove_pq(pq)
+            exp = sorted(seq, key=len, reverse=reverse)
+            self.assertEqual(exp, act)
+
+    def test_key_reverse_non_numeric(self):
+        seq = ['b', 'a', 'c', 'a', 'b']
+        pq = PriorityQueue.from_iterable(seq, key=str.upper, reverse=True)
+        self.assertEqual(['c', 'b', 'b', 'a', 'a'], self.remove_pq(pq))
+
+    def test_from_iterable_ties_fifo(self):
+        seq = [[i] * random.randint(1, 5) for i in range(200)]
+        pq = PriorityQueue.from_iterable(seq, self.list_len)
+        exp = sorted(seq, key=len, reverse=True)
+        self.assertEqual(exp, self.remove_pq(pq))
+
+    def test_add_many_onto_larger_queue(self):
+        pq = PriorityQueue(key=lambda x: x)
+        pq.add_many(range(10, 0, -1))
+        pq.add_many([0, 5])
+        self.assertEqual([0, 1, 2, 3, 4, 5, 5, 6, 7, 8, 9, 10],
+                         self.remove_pq(pq))
+
 
 class TestRandomScheduler(TestUtil):
     def setUp(self) -> None:
@@ -432,6 +813,22 @@ class TestRandomScheduler(TestUtil):
         act = self.scheduler.schedule(parcels, trucks)
         self.assertTrue(1 <= len(act) <= 2)
 
+    def test_never_rejects_fitting_parcel(self):
+        trucks = [Truck(i, 1, 'Toronto') for i in range(50)]
+        trucks.append(Truck(50, 10, 'Toronto'))
+        parcels = [Parcel(1, 10, 'a', 'b')]
+        self.assertEqual([], self.scheduler.schedule(parcels, trucks))
+        self.assertEqual(parcels, trucks[-1].parcels)
+
+    def test_samples_every_fitting_truck(self):
+        trucks = [Truck(i, 1000, 'Toronto') for i in range(3)]
+        trucks.append(Truck(3, 1, 'Toronto'))
+        parcels = [Parcel(i, 2, 'a', 'b') for i in range(300)]
+        self.assertEqual([], self.scheduler.schedule(parcels, trucks))
+        for truck in trucks[:3]:
+            self.assertTrue(50 <= len(truck.parcels) <= 150)
+        self.assertEqual([], trucks[3].parcels)
+
 
 class TestGreedyScheduler(TestUtil):
     def setUp(self) -> None:
@@ -991,6 +1388,469 @@ class TestGreedyScheduler(TestUtil):
         self.assertTruck(trucks, [100, 0, (6 / 7) * 100])
 
 
+class TestTruckIndex(TestUtil):
+    def test_tie_prefers_first_truck(self):
+        trucks = [Truck(1, 5, 'T'), Truck(2, 10, 'T'), Truck(3, 10, 'T')]
+        index = TruckIndex(trucks)
+        self.assertIs(trucks[1], index.choose(Parcel(1, 3, 'T', 'a'), True))
+        self.assertIs(trucks[0], index.choose(Parcel(1, 3, 'T', 'a'), False))
+        self.assertIs(trucks[1], index.choose(Parcel(1, 6, 'T', 'a'), False))
+
+    def test_update_after_pack(self):
+        trucks = [Truck(1, 10, 'T'), Truck(2, 8, 'T')]
+        index = TruckIndex(trucks)
+        trucks[0].pack(Parcel(1, 5, 'T', 'a'))
+        index.update(trucks[0])
+        self.assertIs(trucks[1], index.choose(Parcel(2, 1, 'T', 'b'), True))
+        self.assertIs(trucks[0], index.choose(Parcel(3, 1, 'T', 'a'), True))
+        self.assertIsNone(index.choose(Parcel(4, 9, 'T', 'b'), True))
+
+    def test_trucks_sharing_an_id(self):
+        config = {'parcel_priority': 'volume',
+                  'parcel_order': 'non-increasing',
+                  'truck_order': 'non-increasing'}
+        for scheduler in (GreedyScheduler(config), FirstFitScheduler(),
+                          BestFitScheduler(), RandomScheduler(0)):
+            trucks = [Truck(1, 10, 'T'), Truck(1, 10, 'T')]
+            parcels = [Parcel(i, 4, 'T', 'a') for i in range(6)]
+            unscheduled = scheduler.schedule(parcels, trucks)
+            packed = [parcel for truck in trucks for parcel in truck.parcels]
+            self.assertCountEqual(parcels, packed + unscheduled)
+            self.assertEqual(4, len(packed))
+
+    def test_follows_route_changes(self):
+        trucks = [Truck(1, 10, 'T'), Truck(2, 8, 'T'), Truck(3, 8, 'T')]
+        index = TruckIndex(trucks)
+        trucks[2].add_route(Parcel(1, 1, 'T', 'a'))
+        self.assertIs(trucks[2], index.choose(Parcel(2, 1, 'T', 'a'), True))
+        trucks[2].pack(Parcel(3, 1, 'T', 'b'))
+        self.assertIs(trucks[0], index.choose(Parcel(4, 1, 'T', 'a'), True))
+        self.assertIs(trucks[2], index.choose(Parcel(5, 1, 'T', 'b'), False))
+        index.close()
+        trucks[0].pack(Parcel(6, 1, 'T', 'b'))
+        self.assertIs(trucks[2], index.choose(Parcel(7, 1, 'T', 'b'), False))
+
+
+class TestCapacityTree(TestUtil):
+    def test_matches_naive_after_packs(self):
+        rnd = random.Random(148)
+        for _ in range(50):
+            trucks = [Truck(i, rnd.randint(1, 20), 'T')
+                      for i in range(rnd.randint(1, 9))]
+            tree = CapacityTree(trucks)
+            for i in range(30):
+                volume = rnd.randint(0, 22)
+                fits = [t for t in trucks if t.available_space >= volume]
+                exp = min(fits, key=lambda t: t.available_space, default=None)
+                self.assertIs(exp, tree.best_fit(volume))
+                self.assertIs(fits[0] if fits else None,
+                              tree.first_fit(volume))
+                rnd.choice(trucks).pack(Parcel(i, rnd.randint(1, 5), 'T',
+                                               'a'))
+            tree.close()
+
+    def test_samples_every_fitting_truck(self):
+        trucks = [Truck(i, c, 'T') for i, c in enumerate([4, 9, 6, 9, 2])]
+        tree = CapacityTree(trucks)
+        trucks[1].pack(Parcel(1, 4, 'T', 'a'))
+        sampled = [tree.sample_fit(5, lambda start, stop, r=rank: start + r)
+                   for rank in range(3)]
+        self.assertEqual([trucks[1], trucks[2], trucks[3]], sampled)
+        self.assertIsNone(tree.sample_fit(10, lambda start, stop: start))
+
+
+class TestFitSchedulers(TestUtil):
+    def naive_fit(self, parcels, trucks, best):
+        unscheduled = []
+        for parcel in sorted(parcels, key=lambda p: p.volume, reverse=True):
+            fits = [t for t in trucks if t.available_space >= parcel.volume]
+            if not fits:
+                unscheduled.append(parcel)
+            elif best:
+                min(fits, key=lambda t: t.available_space).pack(parcel)
+            else:
+                fits[0].pack(parcel)
+        return unscheduled
+
+    def test_matches_naive(self):
+        rnd = random.Random(148)
+        for _ in range(100):
+            specs = [(i, rnd.randint(1, 10)) for i in range(rnd.randint(0, 30))]
+            caps = [rnd.randint(1, 25) for _ in range(rnd.randint(1, 9))]
+            for scheduler, best in ((FirstFitScheduler(), False),
+                                    (BestFitScheduler(), True)):
+                exp_trucks = [Truck(i, c, 'T') for i, c in enumerate(caps)]
+                act_trucks = [Truck(i, c, 'T') for i, c in enumerate(caps)]
+                parcels = [Parcel(i, v, 'T', 'a') for i, v in specs]
+                exp = self.naive_fit(parcels, exp_trucks, best)
+                act = scheduler.schedule(parcels, act_trucks)
+                self.assertEqual(exp, act)
+                self.assertEqual([t.parcels for t in exp_trucks],
+                                 [t.parcels for t in act_trucks])
+
+    def test_best_fit_prefers_tightest(self):
+        trucks = [Truck(1, 10, 'T'), Truck(2, 6, 'T'), Truck(3, 5, 'T')]
+        parcels = [Parcel(1, 5, 'T', 'a')]
+        self.assertEqual([], BestFitScheduler().schedule(parcels, trucks))
+        self.assertEqual(parcels, trucks[2].parcels)
+
+
+class TestScheduleIncremental(TestUtil):
+    def test_matches_fresh_schedule_on_loaded_fleet(self):
+        rnd = random.Random(148)
+        config = {'parcel_priority': 'destination',
+                  'parcel_order': 'non-decreasing',
+                  'truck_order': 'non-increasing'}
+        early = [Parcel(i, rnd.randint(1, 10), 'T', rnd.choice('abc'))
+                 for i in range(30)]
+        late = [Parcel(i, rnd.randint(1, 10), 'T', rnd.choice('abc'))
+                for i in range(30, 45)]
+        exp_trucks = [Truck(i, 40, 'T') for i in range(5)]
+        act_trucks = [Truck(i, 40, 'T') for i in range(5)]
+        GreedyScheduler(config).schedule(early, exp_trucks)
+        exp = GreedyScheduler(config).schedule(late[:5], exp_trucks)
+        exp += GreedyScheduler(config).schedule(late[5:], exp_trucks)
+        scheduler = GreedyScheduler(config)
+        scheduler.schedule(early, act_trucks)
+        index = scheduler._index
+        self.assertIsNotNone(index)
+        act = scheduler.schedule_incremental(late[:5], act_trucks)
+        self.assertIs(index, scheduler._index)
+        act += scheduler.schedule_incremental(late[5:], act_trucks)
+        self.assertIs(index, scheduler._index)
+        scheduler.close()
+        self.assertEqual([[] for _ in act_trucks],
+                         [t._observers for t in act_trucks])
+        self.assertEqual(exp, act)
+        self.assertEqual([t.parcels for t in exp_trucks],
+                         [t.parcels for t in act_trucks])
+        self.assertEqual([t.routes for t in exp_trucks],
+                         [t.routes for t in act_trucks])
+
+    def test_rebuilds_index_for_other_trucks(self):
+        config = {'parcel_priority': 'volume',
+                  'parcel_order': 'non-decreasing',
+                  'truck_order': 'non-decreasing'}
+        scheduler = GreedyScheduler(config)
+        first = [Truck(1, 5, 'T')]
+        second = [Truck(2, 5, 'T')]
+        scheduler.schedule([Parcel(1, 5, 'T', 'a')], first)
+        act = scheduler.schedule_incremental([Parcel(2, 5, 'T', 'a')], second)
+        self.assertEqual([], act)
+        self.assertEqual(2, second[0].parcels[0].id)
+
+
+class TestScheduleStream(TestUtil):
+    def setUp(self) -> None:
+        self.config = {'parcel_priority': 'volume',
+                       'parcel_order': 'non-increasing',
+                       'truck_order': 'non-decreasing'}
+        rnd = random.Random(148)
+        self.specs = [(i, rnd.randint(1, 10), rnd.choice('abc'))
+                      for i in range(40)]
+
+    def test_full_window_matches_schedule(self):
+        parcels = [Parcel(i, v, 'T', d) for i, v, d in self.specs]
+        exp_trucks = [Truck(i, 30, 'T') for i in range(5)]
+        act_trucks = [Truck(i, 30, 'T') for i in range(5)]
+        exp = GreedyScheduler(self.config).schedule(parcels, exp_trucks)
+        stream = GreedyScheduler(self.config).schedule_stream(
+            iter(parcels), act_trucks, window=len(parcels))
+        act = [parcel for parcel, truck in stream if truck is None]
+        self.assertEqual(exp, act)
+        self.assertEqual([t.parcels for t in exp_trucks],
+                         [t.parcels for t in act_trucks])
+
+    def test_window_bounds_buffer(self):
+        consumed = []
+
+        def arrivals():
+            for i, v, d in self.specs:
+                consumed.append(i)
+                yield Parcel(i, v, 'T', d)
+        trucks = [Truck(i, 30, 'T') for i in range(5)]
+        stream = GreedyScheduler(self.config).schedule_stream(
+            arrivals(), trucks, window=4)
+        decided = 0
+        for parcel, truck in stream:
+            decided += 1
+            self.assertLessEqual(len(consumed) - decided, 3)
+        self.assertEqual(len(self.specs), decided)
+
+    def test_random_arrival_order(self):
+        parcels = [Parcel(i, v, 'T', d) for i, v, d in self.specs]
+        trucks = [Truck(i, 30, 'T') for i in range(5)]
+        stream = RandomScheduler().schedule_stream(iter(parcels), trucks,
+                                                   window=10)
+        decisions = list(stream)
+        self.assertEqual(parcels, [parcel for parcel, truck in decisions])
+        for parcel, truck in decisions:
+            if truck is not None:
+                self.assertIn(parcel, truck.parcels)
+
+
+class TestSavingsScheduler(TestUtil):
+    def test_every_parcel_placed_once(self):
+        for seed in range(20):
+            m, parcels, trucks = self.random_problem(seed, 2 * seed, 5)
+            act = SavingsScheduler(m).schedule(parcels, trucks)
+            packed = [p for t in trucks for p in t.parcels]
+            self.assertCountEqual(parcels, packed + act)
+            for truck in trucks:
+                self.assertGreaterEqual(truck.available_space, 0)
+                self.assertEqual(
+                    truck.capacity - sum(p.volume for p in truck.parcels),
+                    truck.available_space)
+
+    def test_joins_nearby_destinations(self):
+        m = DistanceMap()
+        m.add_distance('T', 'a', 10)
+        m.add_distance('T', 'b', 10)
+        m.add_distance('T', 'c', 10)
+        m.add_distance('a', 'b', 1)
+        m.add_distance('a', 'c', 30)
+        m.add_distance('b', 'c', 30)
+        trucks = [Truck(1, 10, 'T'), Truck(2, 10, 'T')]
+        parcels = [Parcel(1, 3, 'T', 'a'), Parcel(2, 3, 'T', 'c'),
+                   Parcel(3, 3, 'T', 'b')]
+        self.assertEqual([], SavingsScheduler(m).schedule(parcels, trucks))
+        self.assertCountEqual([1, 3], [p.id for p in trucks[0].parcels])
+        self.assertEqual([2], [p.id for p in trucks[1].parcels])
+
+    def test_route_skips_truck_used_by_best_fit(self):
+        m = DistanceMap()
+        m.add_distance('T', 'A', 10)
+        m.add_distance('T', 'B', 10)
+        m.add_distance('A', 'B', 100)
+        trucks = [Truck(0, 10, 'T'), Truck(1, 20, 'T')]
+        parcels = [Parcel(1, 25, 'T', 'A'), Parcel(2, 8, 'T', 'A'),
+                   Parcel(3, 2, 'T', 'B'), Parcel(4, 7, 'T', 'B')]
+        act = SavingsScheduler(m).schedule(parcels, trucks)
+        self.assertEqual([parcels[0]], act)
+        self.assertEqual([2], [p.id for p in trucks[0].parcels])
+        self.assertEqual([3, 4], [p.id for p in trucks[1].parcels])
+        self.assertEqual(['T', 'B'], trucks[1].routes)
+
+
+class TestExactScheduler(TestUtil):
+    def cost(self, trucks, unscheduled):
+        return (len(unscheduled),
+                sum(t.available_space for t in trucks if t.parcels))
+
+    def test_matches_brute_force(self):
+        rnd = random.Random(148)
+        for _ in range(50):
+            volumes = [rnd.randint(1, 12) for _ in range(rnd.randint(0, 6))]
+            capacities = [rnd.choice([8, 10, 15])
+                          for _ in range(rnd.randint(1, 3))]
+            best = None
+            for choice in itertools.product(range(-1, len(capacities)),
+                                            repeat=len(volumes)):
+                loads = [0] * len(capacities)
+                for volume, truck in zip(volumes, choice):
+                    if truck >= 0:
+                        loads[truck] += volume
+                if any(l > c for l, c in zip(loads, capacities)):
+                    continue
+                cost = (choice.count(-1),
+                        sum(c - l for l, c in zip(loads, capacities) if l))
+                if best is None or cost < best:
+                    best = cost
+            parcels = [Parcel(i, v, 'T', 'a') for i, v in enumerate(volumes)]
+            trucks = [Truck(i, c, 'T') for i, c in enumerate(capacities)]
+            act = ExactScheduler().schedule(parcels, trucks)
+            self.assertEqual(best, self.cost(trucks, act))
+            packed = [p for t in trucks for p in t.parcels]
+            self.assertCountEqual(parcels, packed + act)
+
+    def test_no_worse_than_greedy(self):
+        rnd = random.Random(5)
+        config = {'parcel_priority': 'volume',
+                  'parcel_order': 'non-increasing',
+                  'truck_order': 'non-increasing'}
+        for _ in range(10):
+            volumes = [rnd.randint(1, 40) for _ in range(15)]
+            capacities = [rnd.choice([50, 70, 90]) for _ in range(5)]
+            parcels = [Parcel(i, v, 'T', 'a') for i, v in enumerate(volumes)]
+            trucks = [Truck(i, c, 'T') for i, c in enumerate(capacities)]
+            greedy = GreedyScheduler(config).schedule(parcels, trucks)
+            trucks2 = [Truck(i, c, 'T') for i, c in enumerate(capacities)]
+            act = ExactScheduler().schedule(parcels, trucks2)
+            self.assertLessEqual(self.cost(trucks2, act),
+                                 self.cost(trucks, greedy))
+
+
+class TestBeamScheduler(TestUtil):
+    config = {'parcel_priority': 'volume',
+              'parcel_order': 'non-increasing',
+              'truck_order': 'non-increasing'}
+
+    def test_every_parcel_placed_once(self):
+        for seed in range(5):
+            m, parcels, trucks = self.random_problem(seed)
+            act = BeamScheduler(self.config, m, 4, 1).schedule(parcels,
+                                                               trucks)
+            packed = [p for t in trucks for p in t.parcels]
+            self.assertCountEqual(parcels, packed + act)
+            for truck in trucks:
+                self.assertGreaterEqual(truck.available_space, 0)
+
+    def test_parallel_matches_serial(self):
+        m, parcels, trucks = self.random_problem(3)
+        serial = BeamScheduler(self.config, m, 6, 1).schedule(parcels, trucks)
+        m, parcels, trucks2 = self.random_problem(3)
+        parallel = BeamScheduler(self.config, m, 6, 2).schedule(parcels,
+                                                                trucks2)
+        self.assertEqual([p.id for p in serial], [p.id for p in parallel])
+        self.assertEqual([[p.id for p in t.parcels] for t in trucks],
+                         [[p.id for p in t.parcels] for t in trucks2])
+
+    def test_joins_parcels_for_one_city(self):
+        m = DistanceMap()
+        m.add_distance('T', 'a', 10)
+        m.add_distance('T', 'b', 10)
+        m.add_distance('a', 'b', 20)
+        trucks = [Truck(1, 10, 'T'), Truck(2, 10, 'T')]
+        parcels = [Parcel(1, 5, 'T', 'a'), Parcel(2, 5, 'T', 'b'),
+                   Parcel(3, 5, 'T', 'a'), Parcel(4, 5, 'T', 'b')]
+        self.assertEqual([], BeamScheduler(self.config, m, 8, 1).schedule(
+            parcels, trucks))
+        for truck in trucks:
+            self.assertEqual(1, len(set(p.destination
+                                        for p in truck.parcels)))
+
+
+class TestGeneticScheduler(TestUtil):
+    config = {'parcel_priority': 'volume',
+              'parcel_order': 'non-increasing',
+              'truck_order': 'non-increasing'}
+
+    def build(self, seed):
+        m, parcels, trucks = self.random_problem(seed)
+        fleet = Fleet()
+        for truck in trucks:
+            fleet.add_truck(truck)
+        return m, parcels, fleet
+
+    def test_no_worse_than_greedy(self):
+        for seed in range(3):
+            m, parcels, fleet = self.build(seed)
+            greedy = GreedyScheduler(self.config).schedule(parcels,
+                                                           fleet.trucks)
+            m, parcels, fleet2 = self.build(seed)
+            act = GeneticScheduler(self.config, m, 20, 10, seed=seed,
+                                   workers=1).schedule(parcels, fleet2.trucks)
+            packed = [p for t in fleet2.trucks for p in t.parcels]
+            self.assertCountEqual(parcels, packed + act)
+            self.assertLessEqual(
+                (len(act), fleet2.total_unused_space(),
+                 fleet2.average_distance_travelled(m)),
+                (len(greedy), fleet.total_unused_space(),
+                 fleet.average_distance_travelled(m)))
+
+    def test_parallel_matches_serial(self):
+        m, parcels, fleet = self.build(7)
+        serial = GeneticScheduler(self.config, m, 20, 5, seed=1,
+                                  workers=1).schedule(parcels, fleet.trucks)
+        m, parcels, fleet2 = self.build(7)
+        parallel = GeneticScheduler(self.config, m, 20, 5, seed=1,
+                                    workers=2).schedule(parcels, fleet2.trucks)
+        self.assertEqual([p.id for p in serial], [p.id for p in parallel])
+        self.assertEqual([[p.id for p in t.parcels] for t in fleet.trucks],
+                         [[p.id for p in t.parcels] for t in fleet2.trucks])
+
+
+class TestLocalSearchScheduler(TestUtil):
+    def test_every_parcel_placed_once(self):
+        config = {'parcel_priority': 'volume',
+                  'parcel_order': 'non-increasing',
+                  'truck_order': 'non-increasing'}
+        for seed in range(5):
+            m, parcels, trucks = self.random_problem(seed)
+            act = LocalSearchScheduler(config, m, 20, seed).schedule(parcels,
+                                                                    trucks)
+            packed = [p for t in trucks for p in t.parcels]
+            self.assertCountEqual(parcels, packed + act)
+            for truck in trucks:
+                self.assertGreaterEqual(truck.available_space, 0)
+
+    def test_no_worse_than_greedy(self):
+        config = {'parcel_priority': 'destination',
+                  'parcel_order': 'non-decreasing',
+                  'truck_order': 'non-decreasing'}
+        for seed in range(5):
+            m, parcels, trucks = self.random_problem(seed)
+            greedy = GreedyScheduler(config).schedule(parcels, trucks)
+            m, parcels, trucks2 = self.random_problem(seed)
+            act = LocalSearchScheduler(config, m, 20, seed).schedule(parcels,
+                                                                    trucks2)
+            self.assertLessEqual(len(act), len(greedy))
+            if len(act) == len(greedy):
+                self.assertLessEqual(self.score(m, trucks2),
+                                     self.score(m, trucks))
+
+    def test_delivery_outweighs_missing_legs(self):
+        m = DistanceMap()
+        m.add_distance('T', 'a', 5)
+        parcels = [Parcel(1, 3, 'T', 'a'), Parcel(2, 3, 'T', 'nowhere')]
+        costs = []
+        for load in (parcels, parcels[:1]):
+            truck = Truck(1, 10, 'T')
+            for parcel in load:
+                truck.pack(parcel)
+            costs.append(_SearchState(parcels, [truck], m).cost())
+        self.assertLess(costs[0], costs[1])
+
+    def score(self, m, trucks):
+        total = 0
+        for truck in trucks:
+            if truck.parcels:
+                route = truck.routes + [truck.depot]
+                total += truck.available_space
+                total += sum(m.distance(a, b)
+                             for a, b in zip(route, route[1:]) if a != b)
+        return total
+
+
+class TestRouteOptimizer(TestUtil):
+    def build(self, seed):
+        m, parcels, _ = self.random_problem(seed, num_parcels=60,
+                                            num_trucks=0, symmetric=False)
+        f = Fleet()
+        for i in range(6):
+            truck = Truck(i, 100, 'T')
+            for parcel in parcels[10 * i:10 * i + 2 * i]:
+                truck.pack(parcel)
+            f.add_truck(truck)
+        return f, m
+
+    def test_never_longer_and_keeps_depot(self):
+        for seed in range(20):
+            f, m = self.build(seed)
+            before = [set(t.routes) for t in f.trucks]
+            lengths = [self.single(t).total_distance_travelled(m)
+                       for t in f.trucks]
+            optimize_routes(f, m, workers=1)
+            for truck, cities, length in zip(f.trucks, before, lengths):
+                self.assertEqual('T', truck.routes[0])
+                self.assertEqual(cities, set(truck.routes))
+                self.assertLessEqual(
+                    self.single(truck).total_distance_travelled(m), length)
+
+    def test_parallel_matches_serial(self):
+        f1, m = self.build(148)
+        f2, m = self.build(148)
+        optimize_routes(f1, m, workers=1)
+        optimize_routes(f2, m, workers=2)
+        self.assertEqual([t.routes for t in f1.trucks],
+                         [t.routes for t in f2.trucks])
+
+    def single(self, truck):
+        f = Fleet()
+        f.add_truck(truck)
+        return f
+
+
 class TestExperiment(TestUtil):
     def setUp(self) -> None:
 
@@ -999,9 +1859,9 @@ class TestExperiment(TestUtil):
                 self.assertAlmostEqual(exp[k], act[k])
         self.config = {
          'depot_location': 'Toronto',
-         'parcel_file': './test_data/parcel-1.txt',
-         'truck_file': './test_data/truck-1.txt',
-         'map_file': './test_data/distance.txt',
+         'parcel_file': _data_file('parcel-1.txt'),
+         'truck_file': _data_file('truck-1.txt'),
+         'map_file': _data_file('distance.txt'),
          'algorithm': 'greedy',
          'parcel_priority': 'volume',
          'parcel_order': 'non-decreasing',
@@ -1034,8 +1894,8 @@ class TestExperiment(TestUtil):
         self.assertStat(exp, act)
 
     def test_experiment_3(self):
-        self.config.update({'parcel_file': './test_data/parcel-2.txt',
-                            'truck_file': './test_data/truck-2.txt',
+        self.config.update({'parcel_file': _data_file('parcel-2.txt'),
+                            'truck_file': _data_file('truck-2.txt'),
                             'parcel_priority': 'destination',
                             'parcel_order': 'non-decreasing',
                             'truck_order': 'non-increasing'})
@@ -1051,8 +1911,8 @@ class TestExperiment(TestUtil):
         self.assertStat(exp, act)
 
     def test_experiment_4(self):
-        self.config.update({'parcel_file': './test_data/parcel-1.txt',
-                            'truck_file': './test_data/truck-3.txt',
+        self.config.update({'parcel_file': _data_file('parcel-1.txt'),
+                            'truck_file': _data_file('truck-3.txt'),
                             'parcel_priority': 'volume',
                             'parcel_order': 'non-decreasing',
                             'truck_order': 'non-increasing'})
@@ -1068,8 +1928,8 @@ class TestExperiment(TestUtil):
         self.assertStat(exp, act)
 
     def test_experiment_5(self):
-        self.config.update({'parcel_file': './test_data/parcel-1.txt',
-                            'truck_file': './test_data/truck-4.txt',
+        self.config.update({'parcel_file': _data_file('parcel-1.txt'),
+                            'truck_file': _data_file('truck-4.txt'),
                             'parcel_priority': 'volume',
                             'parcel_order': 'non-decreasing',
                             'truck_order': 'non-decreasing'})
@@ -1085,5 +1945,145 @@ class TestExperiment(TestUtil):
         self.assertStat(exp, act)
 
 
+    def test_savings_algorithm(self):
+        self.config.update({'algorithm': 'savings'})
+        experiment = SchedulingExperiment(self.config)
+        act = experiment.run()
+        self.assertEqual(4, act['fleet'])
+        packed = sum(len(t.parcels) for t in experiment.fleet.trucks)
+        self.assertEqual(4, packed + act['unscheduled'])
+
+    def test_exact_algorithm(self):
+        self.config.update({'algorithm': 'exact'})
+        act = SchedulingExperiment(self.config).run()
+        self.assertEqual(0, act['unscheduled'])
+
+    def test_matrix_distance_map(self):
+        plain = SchedulingExperiment(self.config).run()
+        self.config.update({'distance_map': 'matrix'})
+        experiment = SchedulingExperiment(self.config)
+        self.assertIsInstance(experiment.dmap, MatrixDistanceMap)
+        self.assertStat(plain, experiment.run())
+
+    def test_completed_distance_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            map_file = os.path.join(directory, 'map.txt')
+            with open(map_file, 'w') as file:
+                file.write('a, b, 3\nb, c, 4, 5\nd, e, 1\n')
+            cache_dir = os.path.join(directory, 'cache')
+            for _ in range(2):
+                m = read_completed_distance_map(map_file, None, cache_dir)
+                self.assertEqual(7, m.distance('a', 'c'))
+                self.assertEqual(8, m.distance('c', 'a'))
+                self.assertEqual(-1, m.distance('a', 'd'))
+                self.assertEqual(1, len(os.listdir(cache_dir)))
+            with open(map_file, 'a') as file:
+                file.write('c, d, 2\n')
+            m = read_completed_distance_map(map_file, None, cache_dir)
+            self.assertEqual(10, m.distance('a', 'e'))
+            self.assertEqual(2, len(os.listdir(cache_dir)))
+
+    def write_road_maps(self, directory):
+        """Write to <directory> a map of the roads between the cities of
+        parcel-1.txt and the depot, with most pairs of cities missing, and a
+        map of the shortest paths between every pair of them.  Return the
+        paths of the two files.
+        """
+        roads_file = os.path.join(directory, 'roads.txt')
+        with open(roads_file, 'w') as file:
+            file.write('Toronto,Ajax,10,20\nAjax,London,30\n'
+                       'Ajax,Hamilton,40,50\nHamilton,Kingston,60\n')
+        paths_file = os.path.join(directory, 'paths.txt')
+        with open(paths_file, 'w') as file:
+            file.write('Toronto,Ajax,10,20\nToronto,London,40,50\n'
+                       'Toronto,Hamilton,50,70\nToronto,Kingston,110,130\n'
+                       'Ajax,London,30\nAjax,Hamilton,40,50\n'
+                       'Ajax,Kingston,100,110\nLondon,Hamilton,70,80\n'
+                       'London,Kingston,130,140\nHamilton,Kingston,60\n')
+        return roads_file, paths_file
+
+    def assertSamePaths(self, paths, dmap):
+        cities = ['Toronto', 'Ajax', 'London', 'Hamilton', 'Kingston']
+        for city1 in cities:
+            for city2 in cities:
+                if city1 != city2:
+                    self.assertEqual(paths.distance(city1, city2),
+                                     dmap.distance(city1, city2))
+
+    def test_complete_distance_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            roads_file, paths_file = self.write_road_maps(directory)
+            paths = read_distance_map(paths_file)
+            self.config.update({'map_file': paths_file})
+            plain = SchedulingExperiment(self.config).run()
+            cache_dir = os.path.join(directory, 'cache')
+            self.config.update({'map_file': roads_file,
+                                'distance_map': 'complete',
+                                'distance_cache': cache_dir})
+            experiment = SchedulingExperiment(self.config)
+            self.assertEqual(1, len(os.listdir(cache_dir)))
+            # the second experiment must read the paths from the cache
+            with mock.patch('experiment.complete_distances',
+                            side_effect=AssertionError('paths found again')):
+                cached = SchedulingExperiment(self.config)
+            self.assertEqual(1, len(os.listdir(cache_dir)))
+            for exp in (experiment, cached):
+                self.assertIsInstance(exp.dmap, MatrixDistanceMap)
+                self.assertSamePaths(paths, exp.dmap)
+                self.assertStat(plain, exp.run())
+
+    def test_lazy_distance_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            roads_file, paths_file = self.write_road_maps(directory)
+            paths = read_distance_map(paths_file)
+            self.config.update({'map_file': paths_file})
+            plain = SchedulingExperiment(self.config).run()
+            self.config.update({'map_file': roads_file,
+                                'distance_map': 'lazy',
+                                'path_cache_size': 2})
+            experiment = SchedulingExperiment(self.config)
+        self.assertIsInstance(experiment.dmap, LazyDistanceMap)
+        self.assertStat(plain, experiment.run())
+        counters = experiment.dmap.counters()
+        self.assertGreater(counters['hits'], 0)
+        self.assertGreater(counters['evictions'], 0)
+        self.assertEqual(2, counters['cached'])
+        self.assertEqual(counters['misses'],
+                         counters['evictions'] + counters['cached'])
+        self.assertSamePaths(paths, experiment.dmap)
+
+    def test_city_names_are_shared(self):
+        experiment = SchedulingExperiment(self.config)
+        experiment.run()
+        names = {}
+        for parcel in experiment.parcels:
+            for city in (parcel.source, parcel.destination):
+                self.assertIs(names.setdefault(city, city), city)
+        for truck in experiment.fleet.trucks:
+            for city in truck.routes:
+                self.assertIs(names.setdefault(city, city), city)
+
+    def test_optimize_routes(self):
+        experiment = SchedulingExperiment(self.config)
+        plain = experiment.run()
+        self.config.update({'optimize_routes': True})
+        experiment = SchedulingExperiment(self.config)
+        act = experiment.run()
+        self.assertLessEqual(act['avg_distance'], plain['avg_distance'])
+        self.assertEqual(plain['unused_space'], act['unused_space'])
+
+    def test_replications_reproducible(self):
+        self.config.update({'truck_file': _data_file('truck-4.txt')})
+        first = run_replications(self.config, 6, seed=148, workers=2)
+        second = run_replications(self.config, 6, seed=148, workers=3)
+        self.assertEqual(first, second)
+        self.assertEqual(4, first['fleet']['mean'])
+        self.assertNotIn('best', first.pop('fleet'))
+        for stats in first.values():
+            self.assertLessEqual(stats['min'], stats['mean'])
+            self.assertLessEqual(stats['mean'], stats['max'])
+            self.assertIn(stats['best'], (stats['min'], stats['max']))
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
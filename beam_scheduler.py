@@ -0,0 +1,363 @@
+"""Assignment 1 - Beam search scheduling (No tasks)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class BeamScheduler.  Like GreedyScheduler, it
+considers the parcels one at a time, in the order set by its configuration.
+Instead of committing to one truck for each parcel, it keeps the best few
+partial schedules found so far, and tries every truck for the next parcel in
+each of them.  A beam width of 1 makes a choice as quickly as greedy does,
+and wider beams search more of the possible schedules.
+
+Partial schedules are ranked by a lower bound on the number of parcels that
+will be left unscheduled: those left so far, plus enough of the largest
+remaining parcels to cover the volume that cannot fit in the space left.
+Ties are broken by the unused space in non-empty trucks plus the distance
+their routes travel so far.  The beam is expanded in parallel worker processes.
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+import os
+from heapq import nsmallest
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, \
+    Union
+from distance_map import DistanceMap
+from domain import Parcel, Truck
+from scheduler import GreedyScheduler
+
+# The distance used for a leg between cities that are not in the distance map,
+# so that partial schedules with such legs rank last.
+_MISSING_DISTANCE = 10 ** 6
+
+# A partial schedule as sent to a worker: its position in the beam, the
+# available space and the id of the last city on the route of each truck, and
+# its number of unscheduled parcels, unused space and distance.
+_Job = Tuple[int, Tuple[int, ...], Tuple[int, ...], int, int, int]
+
+# A child of a partial schedule as sent back by a worker: its rank, the
+# position of its parent in the beam, the index of the truck the parcel goes
+# on, or -1 if it is left unscheduled, and its number of unscheduled parcels,
+# unused space and distance.
+_Child = Tuple[Tuple[int, int], int, int, int, int, int]
+
+# The problem each worker process expands partial schedules of.  It is set
+# once per worker by _init_worker, so it is not sent again at every step.
+_worker_problem = None
+
+
+class _Problem(NamedTuple):
+    """The parts of a scheduling problem needed to expand partial schedules,
+    with parcels and trucks numbered by position and cities numbered from 0,
+    the depot.
+    """
+    volumes: List[int]
+    remaining: List[int]
+    largest: List[int]
+    destinations: List[int]
+    capacities: List[int]
+    lasts: List[int]
+    matrix: List[List[int]]
+    depot: int = 0
+
+
+class _Step(NamedTuple):
+    """A decision made by a partial schedule: the index of the truck the
+    last parcel went on, or -1 if it was left unscheduled, and the decision
+    before it, or None for the first parcel.
+    """
+    parent: Optional[_Step]
+    choice: int
+
+
+class _Beam(NamedTuple):
+    """A partial schedule in the beam.
+
+    Each partial schedule has its own tuples of available space and last
+    cities, copied from its parent's with its last decision applied.  Its
+    decisions are found by following <step>, and the chains of steps are
+    all that is kept of earlier beams, so with P parcels, beam width W and
+    T trucks, a run keeps O(P * W) steps and O(W * T) tuple entries.
+    """
+    spaces: Tuple[int, ...]
+    lasts: Tuple[int, ...]
+    unscheduled: int
+    unused: int
+    distance: int
+    step: Optional[_Step]
+
+
+class BeamScheduler(GreedyScheduler):
+    """A scheduler that keeps the best <beam_width> partial schedules while it
+    considers the parcels in greedy order.
+
+    This is a subclass of GreedyScheduler, whose configuration sets the order
+    in which parcels are considered.  The truck order is not used, since
+    every truck is tried.
+
+    === Private Attributes ===
+    _dmap: the distances between cities
+    _beam_width: the number of partial schedules kept after each parcel
+    _workers: the number of processes that expand the beam, or None for one
+      per CPU
+    """
+    _dmap: DistanceMap
+    _beam_width: int
+    _workers: Optional[int]
+
+    def __init__(self, config: Dict[str, Union[str, bool]], dmap: DistanceMap,
+                 beam_width: int = 8, workers: Optional[int] = None) -> None:
+        """Initialize a beam search scheduler with the parcel order in
+        <config>.  Partial schedules are ranked using the distances in
+        <dmap>, and expanded in a pool of <workers> processes; if <workers>
+        is 1, they are expanded in this process.
+
+        Precondition: beam_width >= 1
+        """
+        GreedyScheduler.__init__(self, config)
+        self._dmap = dmap
+        self._beam_width = beam_width
+        self._workers = workers
+
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the given <parcels> onto the given <trucks>, that is, decide
+        which parcels will go on which trucks, as well as the route each truck
+        will take.
+
+        This is a method that overrides the superclass Scheduler's method.
+
+        Mutate the Truck objects in <trucks> so that they store information
+        about which parcel objects they will deliver and what route they will
+        take.  Do *not* mutate the list <parcels>, or any of the parcel objects
+        in that list.
+
+        Return a list containing the parcels that did not get scheduled onto any
+        truck, due to lack of capacity.
+
+        If <verbose> is True, print step-by-step details regarding
+        the scheduling algorithm as it runs.
+
+        Precondition: all trucks in <trucks> have the same depot.
+        """
+        if not trucks:
+            return list(parcels)
+        key, reverse = self._get_parcel_key()
+        order = sorted(parcels, key=key, reverse=reverse)
+        problem = _build_problem(order, trucks, self._dmap)
+        beam = [_Beam(tuple(truck.available_space for truck in trucks),
+                      tuple(problem.lasts), 0, 0, 0, None)]
+
+        if self._workers == 1 or not order:
+            _init_worker(problem)
+            for i in range(len(order)):
+                result = _expand((i, self._beam_width, _jobs(beam)))
+                beam = self._next_beam(problem, beam, i, [result])
+        else:
+            with ProcessPoolExecutor(max_workers=self._workers,
+                                     initializer=_init_worker,
+                                     initargs=(problem,)) as pool:
+                # Each worker gets one batch of partial schedules per step.
+                workers = self._workers or os.cpu_count() or 1
+                for i in range(len(order)):
+                    jobs = _jobs(beam)
+                    size = -(-len(jobs) // workers)
+                    batches = [(i, self._beam_width, jobs[j:j + size])
+                               for j in range(0, len(jobs), size)]
+                    results = pool.map(_expand, batches)
+                    beam = self._next_beam(problem, beam, i, results)
+        best = beam[0]
+        if verbose:
+            print('Best schedule: unscheduled', best.unscheduled,
+                  'unused space', best.unused, 'distance', best.distance)
+
+        choices = []
+        step = best.step
+        while step is not None:
+            choices.append(step.choice)
+            step = step.parent
+        choices.reverse()
+        unscheduled = []
+        for parcel, truck in zip(order, choices):
+            if truck < 0:
+                unscheduled.append(parcel)
+            else:
+                trucks[truck].pack(parcel)
+        return unscheduled
+
+    def _next_beam(self, problem: _Problem, beam: List[_Beam], i: int,
+                   results: Iterable[List[_Child]]) -> List[_Beam]:
+        """Return the beam made from the best children of the partial
+        schedules in <beam> found in <results>, where each child decides
+        where parcel <i> of <problem> goes.
+        """
+        children = nsmallest(self._beam_width,
+                             (child for result in results for child in result))
+        new_beam = []
+        for _, position, truck, unscheduled, unused, distance in children:
+            parent = beam[position]
+            spaces = parent.spaces
+            lasts = parent.lasts
+            if truck >= 0:
+                spaces = _replace(spaces, truck,
+                                  spaces[truck] - problem.volumes[i])
+                lasts = _replace(lasts, truck, problem.destinations[i])
+            new_beam.append(_Beam(spaces, lasts, unscheduled, unused,
+                                  distance, _Step(parent.step, truck)))
+        return new_beam
+
+
+def _build_problem(parcels: List[Parcel], trucks: List[Truck],
+                   dmap: DistanceMap) -> _Problem:
+    """Return the problem of scheduling <parcels>, in order, onto <trucks>,
+    with the cities numbered and their distances looked up in <dmap>.
+    """
+    city_ids = {trucks[0].depot: 0}
+    for city in [truck.routes[-1] for truck in trucks] + \
+            [parcel.destination for parcel in parcels]:
+        if city not in city_ids:
+            city_ids[city] = len(city_ids)
+    matrix = []
+    for city1 in city_ids:
+        row = []
+        for city2 in city_ids:
+            distance = dmap.distance(city1, city2)
+            if city1 == city2:
+                distance = 0
+            elif distance < 0:
+                distance = _MISSING_DISTANCE
+            row.append(distance)
+        matrix.append(row)
+    volumes = [parcel.volume for parcel in parcels]
+    remaining = [0] * (len(volumes) + 1)
+    largest = [0] * (len(volumes) + 1)
+    for i in range(len(volumes) - 1, -1, -1):
+        remaining[i] = remaining[i + 1] + volumes[i]
+        largest[i] = max(largest[i + 1], volumes[i])
+    return _Problem(volumes, remaining, largest,
+                    [city_ids[parcel.destination] for parcel in parcels],
+                    [truck.capacity for truck in trucks],
+                    [city_ids[truck.routes[-1]] for truck in trucks],
+                    matrix)
+
+
+def _jobs(beam: List[_Beam]) -> List[_Job]:
+    """Return the partial schedules in <beam> in the form sent to workers.
+    """
+    return [(position, node.spaces, node.lasts, node.unscheduled, node.unused,
+             node.distance) for position, node in enumerate(beam)]
+
+
+def _init_worker(problem: _Problem) -> None:
+    """Set the problem that this process expands partial schedules of.
+    """
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _expand(batch: Tuple[int, int, List[_Job]]) -> List[_Child]:
+    """Return the best children of the partial schedules in a batch of
+    (parcel index, beam width, partial schedules), where each child puts the
+    parcel on a truck it fits in, or leaves it unscheduled.  At most beam
+    width children are returned, best first.
+
+    Trucks with the same capacity, available space and last city are
+    interchangeable, so the parcel is only put on the first of them.
+
+    >>> _init_worker(_Problem([4], [4, 0], [4, 0], [1], [5, 5, 9],
+    ...                       [0, 0, 0], [[0, 3], [3, 0]]))
+    >>> children = _expand((0, 3, [(0, (5, 5, 9), (0, 0, 0), 0, 0, 0)]))
+    >>> children[:2]
+    [((0, 7), 0, 0, 0, 1, 6), ((0, 11), 0, 2, 0, 5, 6)]
+    >>> children[2]
+    ((1, 0), 0, -1, 1, 0, 0)
+    """
+    i, width, jobs = batch
+    problem = _worker_problem
+    volume = problem.volumes[i]
+    city = problem.destinations[i]
+    matrix = problem.matrix
+    depot = problem.depot
+    children = []
+    remaining = problem.remaining[i + 1]
+    largest = problem.largest[i + 1]
+    for position, spaces, lasts, unscheduled, unused, distance in jobs:
+        free = sum(spaces)
+        seen = set()
+        for truck, space in enumerate(spaces):
+            if space < volume:
+                continue
+            capacity = problem.capacities[truck]
+            last = lasts[truck]
+            kind = (capacity, space, last)
+            if kind in seen:
+                continue
+            seen.add(kind)
+            new_unused = unused - volume
+            if space == capacity:
+                new_unused += capacity
+            new_distance = distance
+            if city != last:
+                new_distance += (matrix[last][city] + matrix[city][depot]
+                                 - matrix[last][depot])
+            bound = unscheduled + _overflow(remaining - free + volume, largest)
+            children.append(((bound, new_unused + new_distance),
+                             position, truck, unscheduled, new_unused,
+                             new_distance))
+        bound = unscheduled + 1 + _overflow(remaining - free, largest)
+        children.append(((bound, unused + distance), position, -1,
+                         unscheduled + 1, unused, distance))
+    return nsmallest(width, children)
+
+
+def _overflow(excess: int, largest: int) -> int:
+    """Return the fewest parcels of volume at most <largest> that cover
+    <excess> volume, or 0 if <excess> is not positive.
+
+    >>> _overflow(7, 3)
+    3
+    >>> _overflow(-2, 3)
+    0
+    """
+    if excess <= 0:
+        return 0
+    return -(-excess // largest)
+
+
+def _replace(values: Tuple[int, ...], index: int, value: int) \
+        -> Tuple[int, ...]:
+    """Return a copy of <values> with the item at <index> set to <value>.
+
+    >>> _replace((1, 2, 3), 1, 7)
+    (1, 7, 3)
+    """
+    return values[:index] + (value,) + values[index + 1:]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   '__future__', 'concurrent.futures', 'os',
+                                   'heapq', 'distance_map', 'domain',
+                                   'scheduler'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
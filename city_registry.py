@@ -0,0 +1,144 @@
+"""Assignment 1 - City registry (No tasks)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class CityRegistry, which gives every city name a
+dense integer id, starting from 0, and keeps a single copy of each name.
+
+When all of the data for an experiment is read with the same registry, every
+parcel, truck route and distance map shares one string object per city, so
+each name is stored once rather than once per parcel.  The names are still
+ordinary strings, so routes, sort keys and destinations compare them as
+strings.  Classes that store cities in arrays or index by city, such as
+ParcelTable, MatrixDistanceMap and TruckIndex, store their dense integer
+ids instead, and the registry turns them back into names for output.
+"""
+from typing import Dict, List
+
+
+class CityRegistry:
+    """A registry of city names, each with a dense integer id.
+
+    === Private Attributes ===
+    _names: the name of each city, indexed by its id
+    _ids: maps the name of each city to its id
+
+    === Representation Invariants ===
+    - _names[_ids[name]] is name, for every key <name> of <_ids>.
+    - len(_ids) == len(_names)
+    """
+    _names: List[str]
+    _ids: Dict[str, int]
+
+    def __init__(self) -> None:
+        """Create a registry with no cities.
+
+        >>> len(CityRegistry())
+        0
+        """
+        self._names = []
+        self._ids = {}
+
+    def __len__(self) -> int:
+        """Return the number of cities in this registry.
+        """
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        """Return whether the city <name> is in this registry.
+
+        >>> cities = CityRegistry()
+        >>> cities.id_of('Toronto')
+        0
+        >>> 'Toronto' in cities, 'Ajax' in cities
+        (True, False)
+        """
+        return name in self._ids
+
+    def id_of(self, name: str) -> int:
+        """Return the id of the city <name>, first adding it to this registry
+        if it is not there.
+
+        >>> cities = CityRegistry()
+        >>> cities.id_of('Toronto'), cities.id_of('Ajax')
+        (0, 1)
+        >>> cities.id_of('Toronto')
+        0
+        """
+        city_id = self._ids.get(name)
+        if city_id is None:
+            city_id = len(self._names)
+            self._names.append(name)
+            self._ids[name] = city_id
+        return city_id
+
+    def name_of(self, city_id: int) -> str:
+        """Return the name of the city with id <city_id>.
+
+        Precondition: 0 <= city_id < len(self)
+
+        >>> cities = CityRegistry()
+        >>> cities.name_of(cities.id_of('Toronto'))
+        'Toronto'
+        """
+        return self._names[city_id]
+
+    def find(self, name: str) -> int:
+        """Return the id of the city <name>, or -1 if it is not in this
+        registry.  Unlike id_of, this never adds a city.
+
+        >>> cities = CityRegistry()
+        >>> cities.find('Toronto')
+        -1
+        >>> cities.find(cities.intern('Toronto'))
+        0
+        """
+        return self._ids.get(name, -1)
+
+    def intern(self, name: str) -> str:
+        """Return the copy of the city name <name> kept by this registry,
+        first adding it if it is not there.
+
+        >>> cities = CityRegistry()
+        >>> first = cities.intern(''.join(['Tor', 'onto']))
+        >>> cities.intern(''.join(['Toron', 'to'])) is first
+        True
+        """
+        return self._names[self.id_of(name)]
+
+    def names(self) -> List[str]:
+        """Return the names of the cities in this registry, in order of id.
+
+        >>> cities = CityRegistry()
+        >>> cities.id_of('Toronto'), cities.id_of('Ajax')
+        (0, 1)
+        >>> cities.names()
+        ['Toronto', 'Ajax']
+        """
+        return list(self._names)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
@@ -20,7 +20,9 @@ Sophia Huynh, Maryam Majedi, and Jaisie Sin.
 This module contains the Container and PriorityQueue classes.
 """
 
-from typing import Any, List, Callable
+from __future__ import annotations
+import heapq
+from typing import Any, List, Callable, Iterable, Optional, Tuple
 
 
 class Container:
@@ -53,6 +55,33 @@ def _shorter(a: str, b: str) -> bool:
     return len(a) < len(b)
 
 
+class _Reversed:
+    """A wrapper that reverses the ordering of the value it holds.
+
+    Used by PriorityQueue to order items by a key in non-increasing order
+    when the key cannot simply be negated.
+
+    === Public Attributes ===
+    value: the wrapped key.
+    """
+    __slots__ = ('value',)
+    value: Any
+
+    def __init__(self, value: Any) -> None:
+        """Initialize a wrapper around <value>."""
+        self.value = value
+
+    def __eq__(self, other: Any) -> bool:
+        """Return True iff <other> wraps a value equal to this one."""
+        return self.value == other.value
+
+    def __lt__(self, other: Any) -> bool:
+        """Return True iff this wrapper's value is *greater* than the value
+        wrapped by <other>.
+        """
+        return other.value < self.value
+
+
 class PriorityQueue(Container):
     """A queue of items that operates in FIFO-priority order.
 
@@ -61,41 +90,104 @@ class PriorityQueue(Container):
     (FIFO) order, meaning the item which was inserted *earlier* is the first one
     to be removed.
 
-    Priority is defined by the <higher_priority> function that is provided at
-    time of initialization.
+    Priority is defined at time of initialization, either by a
+    <higher_priority> function that compares two items, or by a <key>
+    function.  With a key, items are removed in non-decreasing order of their
+    keys, or non-increasing order if <reverse> is True; that is, in the same
+    order as sorted(items, key=key, reverse=reverse).  A key is cheaper than a
+    comparison function, since each item's key is computed only once and keys
+    are compared directly by the heap.
 
     All objects in the container must be of the same type.
 
+    The queue is stored as a binary heap, so both add and remove take
+    O(log n) time, and add_many loads a batch of items in linear time.
+
     === Private Attributes ===
     _queue:
-      The end of the list represents the *front* of the queue, that is,
-      the next item to be removed.
+      A binary heap of entries.  Each entry is a tuple whose last element is
+      the item; it is (sequence number, item) when ordering by
+      <_higher_priority>, and (sort key, sequence number, item) when ordering
+      by <_key>.  The entry at index 0 is the *front* of the queue, that is,
+      the next item to be removed.  The children of the entry at index i are
+      at indices 2i + 1 and 2i + 2.
     _higher_priority:
-      A function that compares two items by their priority.
+      A function that compares two items by their priority, or None if this
+      queue orders items by <_key>.
       If <_higher_priority>(x, y) is true, then x has higher priority than y
       and should be removed from the queue before y.
+    _key:
+      A function that maps each item to the value it is ordered by, or None
+      if this queue orders items by <_higher_priority>.
+    _reverse:
+      True iff items with larger keys have higher priority.
+    _next_seq:
+      The sequence number to give the next item added.  Sequence numbers
+      record insertion order and are used to break ties.
 
     === Representation Invariants ===
+    - exactly one of <_higher_priority> and <_key> is None.
     - all elements of <_queue> are of the same type.
-    - the elements of <_queue> are appropriate arguments for the
-      function <_higher_priority>.
-    - the elements of <_queue> are in order according to the
-      function <_higher_priority>.
+    - the items in <_queue> are appropriate arguments for the
+      function <_higher_priority> or <_key>.
+    - no entry of <_queue> comes after its parent according to
+      <_higher_priority> or the sort keys, with ties broken by the smaller
+      sequence number.
+    - every sequence number in <_queue> is less than <_next_seq>.
     """
-    _queue: List[Any]
-    _higher_priority: Callable[[Any, Any], bool]
+    _queue: List[tuple]
+    _higher_priority: Optional[Callable[[Any, Any], bool]]
+    _key: Optional[Callable[[Any], Any]]
+    _reverse: bool
+    _next_seq: int
+
+    def __init__(self,
+                 higher_priority: Optional[Callable[[Any, Any], bool]] = None,
+                 key: Optional[Callable[[Any], Any]] = None,
+                 reverse: bool = False) -> None:
+        """Initialize this to an empty PriorityQueue.
+
+        If <higher_priority> is given, then for any two elements x and y of
+        the queue, if <higher_priority>(x, y) is true, x has higher priority
+        than y.  Otherwise items are ordered by <key>, with smaller keys
+        first unless <reverse> is True.
 
-    def __init__(self, higher_priority: Callable[[Any, Any], bool]) -> None:
-        """Initialize this to an empty PriorityQueue. For any two elements x
-        and y of the queue, if <higher_priority>(x, y) is true, then x has
-        higher priority than y.
+        Precondition: exactly one of <higher_priority> and <key> is given.
 
         >>> pq = PriorityQueue(str.__lt__)
         >>> pq.is_empty()
         True
+        >>> pq = PriorityQueue(key=len, reverse=True)
+        >>> pq.is_empty()
+        True
         """
         self._queue = []
         self._higher_priority = higher_priority
+        self._key = key
+        self._reverse = reverse
+        self._next_seq = 0
+
+    @classmethod
+    def from_iterable(
+            cls, items: Iterable[Any],
+            higher_priority: Optional[Callable[[Any, Any], bool]] = None,
+            key: Optional[Callable[[Any], Any]] = None,
+            reverse: bool = False) -> PriorityQueue:
+        """Return a new PriorityQueue containing <items>, ordered as
+        described in __init__.  Items that tie are removed in the order in
+        which <items> produces them.
+
+        Precondition: exactly one of <higher_priority> and <key> is given.
+
+        >>> pq = PriorityQueue.from_iterable(['fred', 'arju', 'hat'], key=len)
+        >>> pq.remove()
+        'hat'
+        >>> pq.remove()
+        'fred'
+        """
+        pq = cls(higher_priority, key, reverse)
+        pq.add_many(items)
+        return pq
 
     def add(self, item: Any) -> None:
         """Add <item> to this PriorityQueue.
@@ -109,18 +201,45 @@ class PriorityQueue(Container):
         >>> pq.add('hat')
         >>> # 'arju' and fred have the same priority, but 'arju' is behind
         >>> # 'fred' in the queue because it was added later.
-        >>> pq._queue
-        ['monalisa', 'arju', 'fred', 'hat']
         >>> pq.remove()
         'hat'
-        >>> pq._queue
-        ['monalisa', 'arju', 'fred']
+        >>> pq.remove()
+        'fred'
+        """
+        if self._key is not None:
+            heapq.heappush(self._queue, self._make_entry(item))
+        else:
+            self._queue.append(self._make_entry(item))
+            self._sift_up(len(self._queue) - 1)
+
+    def add_many(self, items: Iterable[Any]) -> None:
+        """Add every item of <items> to this PriorityQueue, in the order in
+        which <items> produces them.
+
+        When the batch is at least as large as the queue, the heap is rebuilt
+        in time linear in the new size of the queue.
+
+        >>> pq = PriorityQueue(_shorter)
+        >>> pq.add('fred')
+        >>> pq.add_many(['monalisa', 'arju', 'hat'])
+        >>> [pq.remove() for _ in range(4)]
+        ['hat', 'fred', 'arju', 'monalisa']
         """
-        index = 0
-        while index < len(self._queue) and \
-                self._higher_priority(item, self._queue[index]):
-            index += 1
-        self._queue.insert(index, item)
+        entries = [self._make_entry(item) for item in items]
+        if len(entries) < len(self._queue):
+            for entry in entries:
+                if self._key is not None:
+                    heapq.heappush(self._queue, entry)
+                else:
+                    self._queue.append(entry)
+                    self._sift_up(len(self._queue) - 1)
+            return
+        self._queue.extend(entries)
+        if self._key is not None:
+            heapq.heapify(self._queue)
+        else:
+            for index in range(len(self._queue) // 2 - 1, -1, -1):
+                self._sift_down(index)
 
     def remove(self) -> Any:
         """Remove and return the next item from this PriorityQueue.
@@ -143,7 +262,15 @@ class PriorityQueue(Container):
         >>> pq.remove()
         'monalisa'
         """
-        return self._queue.pop()
+        if self._key is not None:
+            return heapq.heappop(self._queue)[-1]
+        last = self._queue.pop()
+        if not self._queue:
+            return last[-1]
+        front = self._queue[0]
+        self._queue[0] = last
+        self._sift_down(0)
+        return front[-1]
 
     def is_empty(self) -> bool:
         """Return True iff this PriorityQueue is empty.
@@ -157,11 +284,75 @@ class PriorityQueue(Container):
         """
         return not self._queue
 
+    def _make_entry(self, item: Any) -> tuple:
+        """Return a new heap entry for <item>, and advance <_next_seq>.
+        """
+        seq = self._next_seq
+        self._next_seq += 1
+        if self._key is None:
+            return seq, item
+        sort_key = self._key(item)
+        if self._reverse:
+            if isinstance(sort_key, (int, float)):
+                sort_key = -sort_key
+            else:
+                sort_key = _Reversed(sort_key)
+        return sort_key, seq, item
+
+    def _comes_before(self, entry1: Tuple[int, Any],
+                      entry2: Tuple[int, Any]) -> bool:
+        """Return True iff <entry1> should be removed before <entry2>.
+
+        An entry comes first if its item has higher priority, or if neither
+        item has higher priority and it was added earlier.
+
+        Precondition: this queue orders items by <_higher_priority>.
+        """
+        if self._higher_priority(entry1[1], entry2[1]):
+            return True
+        if self._higher_priority(entry2[1], entry1[1]):
+            return False
+        return entry1[0] < entry2[0]
+
+    def _sift_up(self, index: int) -> None:
+        """Move the entry at <index> towards the root of the heap until it
+        no longer comes before its parent.
+        """
+        queue = self._queue
+        entry = queue[index]
+        while index > 0:
+            parent = (index - 1) // 2
+            if not self._comes_before(entry, queue[parent]):
+                break
+            queue[index] = queue[parent]
+            index = parent
+        queue[index] = entry
+
+    def _sift_down(self, index: int) -> None:
+        """Move the entry at <index> away from the root of the heap until
+        neither of its children comes before it.
+        """
+        queue = self._queue
+        size = len(queue)
+        entry = queue[index]
+        child = 2 * index + 1
+        while child < size:
+            if child + 1 < size and \
+                    self._comes_before(queue[child + 1], queue[child]):
+                child += 1
+            if not self._comes_before(queue[child], entry):
+                break
+            queue[index] = queue[child]
+            index = child
+            child = 2 * index + 1
+        queue[index] = entry
+
 
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
-        'allowed-import-modules': ['doctest', 'python_ta', 'typing'],
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   '__future__', 'heapq'],
         'disable': ['E1136'],
         'max-attributes': 15,
     })
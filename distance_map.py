@@ -23,7 +23,7 @@ from the map file. (All reading from files is done in module experiment.)
 Instead, it provides public methods that can be called to store and look up
 distances.
 """
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 
 class DistanceMap:
@@ -79,6 +79,24 @@ class DistanceMap:
             return self._record[(city1, city2)]
         return -1
 
+    def route_length(self, routes: List[str]) -> int:
+        """ Return the distance of a route that visits the cities in
+        <routes> in order and then returns to the first one, adding -1 for
+        each leg whose distance is not stored.
+
+        Precondition: <routes> is not empty.
+
+        >>> m = DistanceMap()
+        >>> m.add_distance('Toronto', 'Ajax', 5, 6)
+        >>> m.route_length(['Toronto', 'Ajax'])
+        11
+        """
+        total_distance = 0
+        for i in range(0, len(routes) - 1):
+            total_distance += self.distance(routes[i], routes[i + 1])
+        total_distance += self.distance(routes[-1], routes[0])
+        return total_distance
+
 
 if __name__ == '__main__':
     import python_ta
@@ -18,10 +18,20 @@ Sophia Huynh, Maryam Majedi, and Jaisie Sin.
 ===== Module Description =====
 
 This module contains the classes required to represent the entities
-in the simulation: Parcel, Truck and Fleet.
+in the simulation: Parcel, Truck and Fleet, and ParcelTable, which stores
+many parcels compactly.
 """
-from typing import List, Dict
+from __future__ import annotations
+from array import array
+from fractions import Fraction
+from typing import List, Dict, Callable, Optional, Tuple, Any, NamedTuple, \
+    Iterator
 from distance_map import DistanceMap
+from city_registry import CityRegistry
+
+# If True, every change to a truck checks that its running volume total
+# matches its parcels.  This makes packing slow, so it is only for debugging.
+CHECK_INVARIANTS = False
 
 
 class Parcel:
@@ -39,6 +49,7 @@ class Parcel:
     id is unique
 
     """
+    __slots__ = ('id', 'volume', 'source', 'destination')
     id: int
     volume: int
     source: str
@@ -74,17 +85,39 @@ class Truck:
     through
     available_space: the volume of the available space in the truck
 
+    === Private Attributes ===
+    _observers: functions to call with this truck whenever it is packed or its
+    route changes
+    _journal: the undo journal of the fleet this truck is in, while that fleet
+    has a savepoint, and None otherwise.  Each change to this truck adds a
+    record of how to undo it.
+    _volume: the total volume of the parcels in the truck
+    _length: the distance of the route in <_length_dmap>, or None if it has
+    not been measured since the route was last replaced
+    _length_dmap: the distance map <_length> was measured in, or None
+
     === Representation Invariants ===
     capacity is a positive integer
     id is unique
+    _volume is the sum of the volumes of the parcels in <parcels>
+    available_space == capacity - _volume
+    if _length is not None, it is the distance of <routes> in <_length_dmap>
 
     """
+    __slots__ = ('id', 'capacity', 'depot', 'parcels', 'routes',
+                 'available_space', '_observers', '_journal', '_volume',
+                 '_length', '_length_dmap')
     id: int
     capacity: int
     depot: str
     parcels: List[Parcel]
     routes: List[str]
     available_space: int
+    _observers: List[Callable[[Truck], None]]
+    _journal: Optional[List[Tuple[Truck, str, Any]]]
+    _volume: int
+    _length: Optional[int]
+    _length_dmap: Optional[DistanceMap]
 
     def __init__(self, id_: int, capacity: int, depot: str) -> None:
         """Initialize a truck."""
@@ -94,6 +127,11 @@ class Truck:
         self.parcels = []
         self.routes = [depot]
         self.available_space = capacity
+        self._observers = []
+        self._journal = None
+        self._volume = 0
+        self._length = None
+        self._length_dmap = None
 
     def __str__(self) -> str:
         """Produce a string representation of this truck.
@@ -110,21 +148,144 @@ class Truck:
         >>> t.routes
         ['Toronto', 'Vancouver']
         """
-        if parcel.destination != self.routes[-1]:
-            self.routes.append(parcel.destination)
+        if self._add_stop(parcel.destination):
+            if self._journal is not None:
+                self._journal.append((self, 'stop', None))
+            self._notify()
+
+    def _add_stop(self, city: str) -> bool:
+        """Add <city> to the end of the route of this truck and return True,
+        or return False if the route already ends there.  The change is not
+        journaled, and observers are not told.
+        """
+        if city == self.routes[-1]:
+            return False
+        if self._length is not None:
+            # the new stop goes between the old last stop and the depot
+            self._length += self._detour(self.routes[-1], city)
+        self.routes.append(city)
+        return True
+
+    def _remove_stop(self) -> None:
+        """Take the last stop off the route of this truck, undoing
+        _add_stop.
+        """
+        city = self.routes.pop()
+        if self._length is not None:
+            self._length -= self._detour(self.routes[-1], city)
+
+    def set_route(self, route: List[str]) -> None:
+        """Replace the route of this truck with <route>, for example after
+        reordering its stops.
+
+        Precondition: <route> starts at the depot of this truck and visits
+        the destination of every parcel on this truck.
+
+        >>> t = Truck(1, 10, 'Toronto')
+        >>> t.pack(Parcel(1, 2, 'Toronto', 'Guelph'))
+        True
+        >>> t.pack(Parcel(2, 2, 'Toronto', 'Ajax'))
+        True
+        >>> t.set_route(['Toronto', 'Ajax', 'Guelph'])
+        >>> t.routes
+        ['Toronto', 'Ajax', 'Guelph']
+        """
+        if self._journal is not None:
+            self._journal.append((self, 'route', self.routes))
+        self.routes = list(route)
+        self._length = None
+        self._notify()
+
+    def route_distance(self, dmap: DistanceMap) -> int:
+        """Return the distance in <dmap> of the route of this truck, including
+        the return to the depot.
+
+        The distance is remembered, and kept up to date in constant time as
+        stops are added to the route, so asking again about <dmap> takes
+        constant time until the route is replaced.  Distances added to <dmap>
+        after the first call are not seen.
+
+        >>> m = DistanceMap()
+        >>> m.add_distance('Toronto', 'Ajax', 5, 6)
+        >>> m.add_distance('Ajax', 'Guelph', 2)
+        >>> m.add_distance('Guelph', 'Toronto', 4)
+        >>> t = Truck(1, 10, 'Toronto')
+        >>> t.pack(Parcel(1, 2, 'Toronto', 'Ajax'))
+        True
+        >>> t.route_distance(m)
+        11
+        >>> t.pack(Parcel(2, 2, 'Toronto', 'Guelph'))
+        True
+        >>> t.route_distance(m)
+        11
+        """
+        if self._length is None or self._length_dmap is not dmap:
+            self._length = dmap.route_length(self.routes)
+            self._length_dmap = dmap
+        return self._length
+
+    def _detour(self, last: str, city: str) -> int:
+        """Return how much longer the route gets, in <self._length_dmap>,
+        when <city> is visited between <last> and the return to the depot.
+        """
+        dmap = self._length_dmap
+        depot = self.routes[0]
+        return (dmap.distance(last, city) + dmap.distance(city, depot)
+                - dmap.distance(last, depot))
+
+    def add_observer(self, observer: Callable[[Truck], None]) -> None:
+        """Call <observer> with this truck whenever a parcel is packed onto it
+        or its route changes.
+
+        >>> t = Truck(1, 10, 'Toronto')
+        >>> seen = []
+        >>> t.add_observer(lambda truck: seen.append(truck.routes[-1]))
+        >>> t.add_route(Parcel(1, 2, 'Toronto', 'Vancouver'))
+        >>> seen
+        ['Vancouver']
+        """
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: Callable[[Truck], None]) -> None:
+        """Stop calling <observer> when this truck changes.
+
+        Precondition: <observer> was added to this truck.
+        """
+        self._observers.remove(observer)
+
+    def _notify(self) -> None:
+        """Call every observer of this truck with this truck.
+        """
+        for observer in self._observers:
+            observer(self)
 
     def _sum_parcels_volume(self) -> int:
         """Return the total volumes of parcels in the truck.
 
         >>> p = Parcel(1, 2, 'Toronto', 'Vancouver')
         >>> t = Truck(1, 10, 'Toronto')
+        >>> t.pack(p)
+        True
         >>> t._sum_parcels_volume()
         2
         """
-        total_volume = 0
-        for parcel in self.parcels:
-            total_volume += parcel.volume
-        return total_volume
+        return self._volume
+
+    def _check_volume(self) -> None:
+        """Check that the running volume total and the available space of
+        this truck match its parcels, if CHECK_INVARIANTS is True.
+        """
+        if CHECK_INVARIANTS:
+            total_volume = 0
+            for parcel in self.parcels:
+                total_volume += parcel.volume
+            assert self._volume == total_volume, \
+                f'truck {self.id} counts volume {self._volume}, ' \
+                f'but its parcels total {total_volume}'
+            assert self.available_space == self.capacity - total_volume, \
+                f'truck {self.id} has available space ' \
+                f'{self.available_space}, but {self.capacity - total_volume} ' \
+                f'is not used'
 
     def pack(self, parcel: Parcel) -> bool:
         """Return True if the parcel was successfully packed onto the truck.
@@ -138,24 +299,201 @@ class Truck:
         >>> t.pack(p)
         True
         """
-        total_volume = self._sum_parcels_volume()
-        if total_volume + parcel.volume > self.capacity:
+        if self._volume + parcel.volume > self.capacity:
             return False
         self.parcels.append(parcel)
-        self.add_route(parcel)
-        self.available_space = self.capacity - self._sum_parcels_volume()
+        self._volume += parcel.volume
+        self.available_space = self.capacity - self._volume
+        added = self._add_stop(parcel.destination)
+        self._check_volume()
+        if self._journal is not None:
+            self._journal.append((self, 'pack', added))
+        self._notify()
+        return True
+
+    def unpack(self, parcel: Parcel) -> bool:
+        """Remove <parcel> from this truck and return True, or return False
+        if it is not on this truck.
+
+        If no other parcel on this truck goes to the destination of <parcel>,
+        that stop is taken off the route.  To undo a pack exactly, including
+        the route, use a savepoint of the fleet instead.
+
+        >>> t = Truck(1, 10, 'Toronto')
+        >>> p1 = Parcel(1, 2, 'Toronto', 'Ajax')
+        >>> p2 = Parcel(2, 3, 'Toronto', 'Guelph')
+        >>> t.pack(p1)
+        True
+        >>> t.pack(p2)
+        True
+        >>> t.unpack(p1)
+        True
+        >>> t.routes
+        ['Toronto', 'Guelph']
+        >>> t.available_space
+        7
+        >>> t.unpack(p1)
+        False
+        """
+        for index in range(len(self.parcels) - 1, -1, -1):
+            if self.parcels[index] is parcel:
+                break
+        else:
+            return False
+        old_routes = self.routes
+        self.parcels.pop(index)
+        self._volume -= parcel.volume
+        self.available_space = self.capacity - self._volume
+        self._check_volume()
+        if all(other.destination != parcel.destination
+               for other in self.parcels):
+            routes = [self.routes[0]]
+            for city in self.routes[1:]:
+                if city != parcel.destination and city != routes[-1]:
+                    routes.append(city)
+            self.routes = routes
+            self._length = None
+        if self._journal is not None:
+            self._journal.append((self, 'unpack', (index, parcel, old_routes)))
+        self._notify()
         return True
 
+    def _undo(self, kind: str, data: Any) -> None:
+        """Undo the most recent change to this truck, which is recorded in
+        its journal as <kind> and <data>.
+        """
+        if kind == 'pack':
+            parcel = self.parcels.pop()
+            self._volume -= parcel.volume
+            if data:
+                self._remove_stop()
+        elif kind == 'stop':
+            self._remove_stop()
+        elif kind == 'unpack':
+            index, parcel, routes = data
+            self.parcels.insert(index, parcel)
+            self._volume += parcel.volume
+            self.routes = routes
+            self._length = None
+        else:
+            self.routes = data
+            self._length = None
+        self.available_space = self.capacity - self._volume
+        self._check_volume()
+        self._notify()
+
     def fullness(self) -> float:
         """Return the current capacity of the truck.
 
         >>> p = Parcel(1, 2, 'Toronto', 'Vancouver')
         >>> t = Truck(1, 10, 'Toronto')
         >>> t.pack(p)
+        True
         >>> t.fullness()
         20.0
         """
-        return float((self._sum_parcels_volume() / self.capacity) * 100)
+        return float((self._volume / self.capacity) * 100)
+
+
+class ParcelTable:
+    """A table of parcels, stored as one array per attribute rather than as
+    one object per parcel.
+
+    The source and destination of a parcel are stored as the ids of their
+    names in a CityRegistry.  A Parcel object is only made when a parcel is
+    looked up, and it shares the names kept by the registry.
+
+    === Private Attributes ===
+    _ids: the id of each parcel, in the order the parcels were added
+    _volumes: the volume of each parcel
+    _sources: the id in <_cities> of the source of each parcel
+    _destinations: the id in <_cities> of the destination of each parcel
+    _cities: the registry of the cities parcels come from and go to
+
+    === Representation Invariants ===
+    - <_ids>, <_volumes>, <_sources> and <_destinations> have the same length.
+    """
+    _ids: array
+    _volumes: array
+    _sources: array
+    _destinations: array
+    _cities: CityRegistry
+
+    def __init__(self, cities: Optional[CityRegistry] = None) -> None:
+        """Create an empty table of parcels, whose cities are registered in
+        <cities>, or in a new registry if <cities> is None.
+
+        >>> len(ParcelTable())
+        0
+        """
+        self._ids = array('i')
+        self._volumes = array('i')
+        self._sources = array('i')
+        self._destinations = array('i')
+        self._cities = CityRegistry() if cities is None else cities
+
+    def __len__(self) -> int:
+        """Return the number of parcels in this table.
+        """
+        return len(self._ids)
+
+    def add(self, id_: int, volume: int, source: str, destination: str) \
+            -> None:
+        """Add a parcel with the given attributes to the end of this table.
+
+        >>> table = ParcelTable()
+        >>> table.add(1, 5, 'Toronto', 'Hamilton')
+        >>> len(table)
+        1
+        """
+        self._ids.append(id_)
+        self._volumes.append(volume)
+        self._sources.append(self._cities.id_of(source))
+        self._destinations.append(self._cities.id_of(destination))
+
+    def __getitem__(self, index: int) -> Parcel:
+        """Return a new Parcel with the attributes of the parcel at <index>
+        in this table.
+
+        >>> table = ParcelTable()
+        >>> table.add(1, 5, 'Toronto', 'Hamilton')
+        >>> print(table[0])
+        Parcel - id: 1, volume: 5, Toronto -> Hamilton
+        """
+        return Parcel(self._ids[index], self._volumes[index],
+                      self._cities.name_of(self._sources[index]),
+                      self._cities.name_of(self._destinations[index]))
+
+    def __iter__(self) -> Iterator[Parcel]:
+        """Return an iterator over new Parcels with the attributes of the
+        parcels in this table, in order.
+        """
+        for index in range(len(self._ids)):
+            yield self[index]
+
+    def parcels(self) -> List[Parcel]:
+        """Return a list of new Parcels with the attributes of the parcels in
+        this table, in order, for passing to a scheduler.
+
+        >>> table = ParcelTable()
+        >>> table.add(1, 5, 'Toronto', 'Hamilton')
+        >>> table.add(2, 3, 'Toronto', 'Ajax')
+        >>> [parcel.id for parcel in table.parcels()]
+        [1, 2]
+        """
+        return list(self)
+
+
+class _Seen(NamedTuple):
+    """What a fleet last saw of one of its trucks: whether it was non-empty,
+    its available space, the exact fraction of its capacity in use, and the
+    distance of its route in the distance map the fleet measures in, or 0 if
+    there is none yet.
+    """
+    nonempty: bool
+    space: int
+    fullness: Fraction
+    distance: int
 
 
 class Fleet:
@@ -164,8 +502,44 @@ class Fleet:
     ===== Public Attributes =====
     trucks:
       List of all Truck objects in this fleet.
+
+    === Private Attributes ===
+    _journal:
+      The undo journal of the trucks in this fleet, while there is a
+      savepoint, and None otherwise.  Each record is a truck, a kind of
+      change and the data needed to undo it, oldest first.
+    _savepoints:
+      The savepoints that have not been released, oldest first.
+    _seen:
+      Maps the id of each truck to what this fleet last saw of it.
+    _nonempty:
+      The number of non-empty trucks.
+    _unused_space:
+      The total available space of the non-empty trucks.
+    _fullness:
+      The exact sum of the fraction of its capacity each non-empty truck
+      uses.  Keeping it exact means packing and unpacking never makes it
+      drift from a fresh sum.
+    _dmap:
+      The distance map the route distances in <_seen> were measured in, or
+      None if they have not been measured yet.
+    _distance:
+      The total distance of the routes of the non-empty trucks in <_dmap>.
+
+    === Representation Invariants ===
+    - Every truck in <trucks> was added with add_truck.
+    - The aggregates match the trucks as they are now, since each truck
+      tells this fleet whenever it changes.
     """
     trucks: List[Truck]
+    _journal: Optional[List[Tuple[Truck, str, Any]]]
+    _savepoints: List[int]
+    _seen: Dict[int, _Seen]
+    _nonempty: int
+    _unused_space: int
+    _fullness: Fraction
+    _dmap: Optional[DistanceMap]
+    _distance: int
 
     def __init__(self) -> None:
         """Create a Fleet with no trucks.
@@ -175,6 +549,14 @@ class Fleet:
         0
         """
         self.trucks = []
+        self._journal = None
+        self._savepoints = []
+        self._seen = {}
+        self._nonempty = 0
+        self._unused_space = 0
+        self._fullness = Fraction(0)
+        self._dmap = None
+        self._distance = 0
 
     def add_truck(self, truck: Truck) -> None:
         """Add <truck> to this fleet.
@@ -189,6 +571,116 @@ class Fleet:
         1
         """
         self.trucks.append(truck)
+        truck._journal = self._journal
+        distance = 0
+        if self._dmap is not None:
+            distance = truck.route_distance(self._dmap)
+        self._seen[truck.id] = _Seen(False, truck.capacity, Fraction(0),
+                                     distance)
+        self._update(truck)
+        truck.add_observer(self._update)
+
+    def _update(self, truck: Truck) -> None:
+        """Bring the aggregates of this fleet up to date after <truck>
+        changed.  This takes constant time, unless the route of <truck> was
+        replaced and has to be measured again.
+        """
+        old = self._seen[truck.id]
+        if old.nonempty:
+            self._nonempty -= 1
+            self._unused_space -= old.space
+            self._fullness -= old.fullness
+            self._distance -= old.distance
+        distance = old.distance
+        if self._dmap is not None:
+            distance = truck.route_distance(self._dmap)
+        new = _Seen(bool(truck.parcels), truck.available_space,
+                    Fraction(truck.capacity - truck.available_space,
+                             truck.capacity), distance)
+        self._seen[truck.id] = new
+        if new.nonempty:
+            self._nonempty += 1
+            self._unused_space += new.space
+            self._fullness += new.fullness
+            self._distance += new.distance
+
+    def _measure(self, dmap: DistanceMap) -> None:
+        """Measure the route of every truck in <dmap>, unless they were last
+        measured in it.
+
+        Precondition: no distance was added to <dmap> since it was last
+        measured in.
+        """
+        if self._dmap is dmap:
+            return
+        self._dmap = dmap
+        self._distance = 0
+        for truck in self.trucks:
+            old = self._seen[truck.id]
+            new = old._replace(distance=truck.route_distance(dmap))
+            self._seen[truck.id] = new
+            if new.nonempty:
+                self._distance += new.distance
+
+    def savepoint(self) -> int:
+        """Return a savepoint that rollback can later return the trucks in
+        this fleet to.
+
+        From the first savepoint until it is released, every pack, unpack
+        and route change of a truck in this fleet is recorded in an undo
+        journal, at a constant cost each.  Savepoints may be nested.
+
+        Precondition: no truck in this fleet is in another fleet that has a
+        savepoint.
+
+        >>> f = Fleet()
+        >>> t = Truck(1, 10, 'Toronto')
+        >>> f.add_truck(t)
+        >>> t.pack(Parcel(1, 2, 'Toronto', 'Ajax'))
+        True
+        >>> point = f.savepoint()
+        >>> t.pack(Parcel(2, 3, 'Toronto', 'Guelph'))
+        True
+        >>> f.rollback(point)
+        >>> t.routes, t.available_space
+        (['Toronto', 'Ajax'], 8)
+        >>> f.release(point)
+        """
+        if self._journal is None:
+            self._journal = []
+            for truck in self.trucks:
+                truck._journal = self._journal
+        self._savepoints.append(len(self._journal))
+        return len(self._journal)
+
+    def rollback(self, savepoint: int) -> None:
+        """Undo every change to the trucks in this fleet since <savepoint>
+        was made, most recent first.  <savepoint> stays valid, so the same
+        changes can be tried again and undone again.
+
+        Precondition: <savepoint> was returned by self.savepoint, and has not
+        been released or rolled past.
+        """
+        journal = self._journal
+        while len(journal) > savepoint:
+            truck, kind, data = journal.pop()
+            truck._journal = None
+            truck._undo(kind, data)
+            truck._journal = journal
+
+    def release(self, savepoint: int) -> None:
+        """Keep the changes made since <savepoint>, though rolling back to an
+        earlier savepoint still undoes them.  Releasing the last savepoint
+        stops recording changes, and forgets the journal.
+
+        Precondition: <savepoint> is the most recent savepoint that has not
+        been released.
+        """
+        self._savepoints.pop()
+        if not self._savepoints:
+            self._journal = None
+            for truck in self.trucks:
+                truck._journal = None
 
     # We will not test the format of the string that you return -- it is up
     # to you.
@@ -238,11 +730,7 @@ class Fleet:
         >>> f.num_nonempty_trucks()
         2
         """
-        num = 0
-        for truck in self.trucks:
-            if truck.parcels:
-                num += 1
-        return num
+        return self._nonempty
 
     def parcel_allocations(self) -> Dict[int, List[int]]:
         """Return a dictionary in which each key is the ID of a truck in this
@@ -290,11 +778,7 @@ class Fleet:
         >>> f.total_unused_space()
         995
         """
-        total = 0
-        for truck in self.trucks:
-            if truck.parcels:
-                total += truck.available_space
-        return total
+        return self._unused_space
 
     def _total_fullness(self) -> float:
         """Return the sum of truck.fullness() for each non-empty truck in the
@@ -313,11 +797,7 @@ class Fleet:
         >>> f._total_fullness()
         50.0
         """
-        total = 0
-        for truck in self.trucks:
-            if truck.parcels:
-                total += truck.fullness()
-        return total
+        return float(self._fullness * 100)
 
     def average_fullness(self) -> float:
         """Return the average percent fullness of all non-empty trucks in the
@@ -334,11 +814,7 @@ class Fleet:
         >>> f.average_fullness()
         50.0
         """
-        n = 0
-        for truck in self.trucks:
-            if truck.parcels:
-                n += 1
-        return self._total_fullness() / n
+        return float(self._fullness * 100 / self._nonempty)
 
     def total_distance_travelled(self, dmap: DistanceMap) -> int:
         """Return the total distance travelled by the trucks in this fleet,
@@ -347,6 +823,10 @@ class Fleet:
         Precondition: <dmap> contains all distances required to compute the
                       average distance travelled.
 
+        Each truck remembers the distance of its route, and the fleet keeps
+        their total up to date, so asking again about <dmap> takes constant
+        time.  Distances added to <dmap> after the first call are not seen.
+
         >>> f = Fleet()
         >>> t1 = Truck(1423, 10, 'Toronto')
         >>> p1 = Parcel(1, 5, 'Toronto', 'Hamilton')
@@ -364,15 +844,8 @@ class Fleet:
         >>> f.total_distance_travelled(m)
         36
         """
-        total_distance = 0
-        for truck in self.trucks:
-            if truck.parcels:
-                for i in range(0, len(truck.routes) - 1):
-                    total_distance += dmap.distance(truck.routes[i],
-                                                    truck.routes[i + 1])
-                total_distance += dmap.distance(truck.routes[-1],
-                                                truck.routes[0])
-        return total_distance
+        self._measure(dmap)
+        return self._distance
 
     def average_distance_travelled(self, dmap: DistanceMap) -> float:
         """Return the average distance travelled by the trucks in this fleet,
@@ -403,18 +876,15 @@ class Fleet:
         >>> f.average_distance_travelled(m)
         18.0
         """
-        n = 0
-        for truck in self.trucks:
-            if truck.parcels:
-                n += 1
-        return float(self.total_distance_travelled(dmap) / n)
+        return float(self.total_distance_travelled(dmap) / self._nonempty)
 
 
 if __name__ == '__main__':
     # import python_ta
     # python_ta.check_all(config={
     #     'allowed-import-modules': ['doctest', 'python_ta', 'typing',
-    #                                'distance_map'],
+    #                                'distance_map', 'array', 'fractions',
+    #                                'city_registry'],
     #     'disable': ['E1136'],
     #     'max-attributes': 15,
     # })
@@ -0,0 +1,257 @@
+"""Assignment 1 - Exact scheduling for small problems (No tasks)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class ExactScheduler, which finds an optimal
+schedule by branch and bound.  Its running time grows exponentially with the
+number of parcels, so it is only meant for small problems, where it gives a
+baseline to measure the other schedulers against.
+
+A schedule is optimal if it leaves as few parcels unscheduled as possible
+and, among those schedules, has the least unused space in non-empty trucks.
+Routes are not considered.
+"""
+from typing import Dict, List, Optional, Tuple
+from domain import Parcel, Truck
+from scheduler import Scheduler
+
+# The space on a truck, as a (capacity, available space) pair.
+_Space = Tuple[int, int]
+
+# The space on every truck, sorted, so that trucks with the same capacity and
+# the same available space are interchangeable.
+_State = Tuple[_Space, ...]
+
+# The cost of a schedule, as an (unscheduled parcels, unused space) pair.
+_Cost = Tuple[int, int]
+
+
+class ExactScheduler(Scheduler):
+    """A scheduler that finds an optimal schedule by branch and bound.
+
+    Parcels are considered in non-increasing order of volume.  Each parcel is
+    either packed onto a truck or left unscheduled, and every choice is
+    searched.  Trucks that have the same capacity and the same available
+    space are interchangeable, so only one of them is tried, and the best
+    completion of each (parcel, truck spaces) subproblem is remembered.  A
+    choice is not searched if a lower bound on its cost, from the total
+    volume still to be packed, is no better than the best schedule found so
+    far, starting from the first-fit decreasing schedule.
+
+    This is a subclass of Scheduler.
+
+    === Private Attributes ===
+    _volumes: the volumes of the parcels being scheduled, in the order they
+      are considered
+    _remaining: _remaining[i] is the total volume of _volumes[i:]
+    _memo: maps each (parcel index, state) subproblem that has been searched
+      to the cost of its best completion, the space the parcel goes into in
+      it, or None if the parcel is left unscheduled, and True; or, if the
+      search was cut off, to a lower bound on that cost, None and False
+    """
+    _volumes: List[int]
+    _remaining: List[int]
+    _memo: Dict[Tuple[int, _State], Tuple[_Cost, Optional[_Space], bool]]
+
+    def __init__(self) -> None:
+        """Initialize an exact scheduler.
+        """
+        self._volumes = []
+        self._remaining = [0]
+        self._memo = {}
+
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the given <parcels> onto the given <trucks>, that is, decide
+        which parcels will go on which trucks, as well as the route each truck
+        will take.
+
+        This is a method that overrides the superclass Scheduler's method.
+
+        Mutate the Truck objects in <trucks> so that they store information
+        about which parcel objects they will deliver and what route they will
+        take.  Do *not* mutate the list <parcels>, or any of the parcel objects
+        in that list.
+
+        Return a list containing the parcels that did not get scheduled onto any
+        truck, due to lack of capacity.
+
+        If <verbose> is True, print step-by-step details regarding
+        the scheduling algorithm as it runs.
+        """
+        order = sorted(parcels, key=lambda p: p.volume, reverse=True)
+        self._volumes = [parcel.volume for parcel in order]
+        self._remaining = [0] * (len(order) + 1)
+        for i in range(len(order) - 1, -1, -1):
+            self._remaining[i] = self._remaining[i + 1] + self._volumes[i]
+        self._memo = {}
+
+        state = tuple(sorted((truck.capacity, truck.available_space)
+                             for truck in trucks))
+        # Only schedules strictly better than <limit> are searched for, and
+        # the first-fit decreasing schedule is never worse than this.
+        upper = self._first_fit_cost(state)
+        cost = self._solve(0, state, (upper[0], upper[1] + 1))[0]
+        if verbose:
+            print('Optimal cost', cost, 'after solving', len(self._memo),
+                  'subproblems')
+
+        unscheduled = []
+        for i, parcel in enumerate(order):
+            space = self._memo[(i, state)][1]
+            if space is None:
+                unscheduled.append(parcel)
+                continue
+            for truck in trucks:
+                if (truck.capacity, truck.available_space) == space:
+                    truck.pack(parcel)
+                    break
+            state = _pack(state, space, parcel.volume)
+        self._memo = {}
+        return unscheduled
+
+    def _solve(self, i: int, state: _State, limit: _Cost) \
+            -> Tuple[_Cost, Optional[_Space]]:
+        """Return the cost of the best way to schedule the parcels from index
+        <i> on, when the trucks have the spaces in <state>, and the space
+        parcel <i> goes into in that schedule, or None if it is left
+        unscheduled or there is no parcel <i>.
+
+        If there is no way that costs less than <limit>, return instead a
+        lower bound on the cost that is at least <limit>, and None.
+        """
+        key = (i, state)
+        if key in self._memo:
+            cost, space, exact = self._memo[key]
+            if exact or cost >= limit:
+                return cost, space
+            bound = cost
+        else:
+            bound = self._lower_bound(i, state)
+        if i == len(self._volumes):
+            self._memo[key] = (bound, None, True)
+            return bound, None
+        if bound >= limit:
+            self._memo[key] = (bound, None, False)
+            return bound, None
+
+        volume = self._volumes[i]
+        best = limit
+        best_space = None
+        found = False
+        # Try each distinct space the parcel fits in, then leaving it out.
+        choices = [space for j, space in enumerate(state)
+                   if space[1] >= volume and (j == 0 or state[j - 1] != space)]
+        choices.append(None)
+        for space in choices:
+            if space is None:
+                child = state
+                extra = 1
+            else:
+                child = _pack(state, space, volume)
+                extra = 0
+            lower = self._lower_bound(i + 1, child)
+            if (lower[0] + extra, lower[1]) >= best:
+                continue
+            cost = self._solve(i + 1, child, (best[0] - extra, best[1]))[0]
+            cost = (cost[0] + extra, cost[1])
+            if cost < best:
+                best = cost
+                best_space = space
+                found = True
+                if best == bound:
+                    break
+        self._memo[key] = (best, best_space, found)
+        return best, best_space
+
+    def _first_fit_cost(self, state: _State) -> _Cost:
+        """Return the cost of packing each parcel, in order, into the first
+        truck it fits in, when the trucks have the spaces in <state>.
+        """
+        spaces = list(state)
+        unscheduled = 0
+        for volume in self._volumes:
+            for j, (capacity, space) in enumerate(spaces):
+                if space >= volume:
+                    spaces[j] = (capacity, space - volume)
+                    break
+            else:
+                unscheduled += 1
+        return unscheduled, sum(space for capacity, space in spaces
+                                if space < capacity)
+
+    def _lower_bound(self, i: int, state: _State) -> _Cost:
+        """Return a lower bound on the cost of scheduling the parcels from
+        index <i> on, when the trucks have the spaces in <state>.
+
+        At least enough of the largest parcels to exceed the total available
+        space must be left unscheduled.  The available space in non-empty
+        trucks that is not filled by the rest of the volume stays unused.  If
+        every parcel is scheduled and the rest of the volume overflows the
+        non-empty trucks, the empty trucks that are opened hold at least the
+        overflow, and any capacity they have beyond it stays unused.
+        """
+        volume = self._remaining[i]
+        excess = volume - sum(space for _, space in state)
+        unscheduled = 0
+        j = i
+        while excess > 0:
+            excess -= self._volumes[j]
+            unscheduled += 1
+            j += 1
+        used = sum(space for capacity, space in state if space < capacity)
+        overflow = volume - used
+        if overflow <= 0:
+            return unscheduled, -overflow
+        if unscheduled > 0:
+            return unscheduled, 0
+        # Bit s of <sums> is set iff some set of empty trucks has total
+        # capacity s.
+        sums = 1
+        for capacity, space in state:
+            if space == capacity:
+                sums |= sums << capacity
+        sums >>= overflow
+        return 0, (sums & -sums).bit_length() - 1
+
+
+def _pack(state: _State, space: _Space, volume: int) -> _State:
+    """Return <state> after a parcel of <volume> is packed into a truck that
+    has <space>.
+
+    >>> _pack(((5, 5), (10, 10), (10, 10)), (10, 10), 3)
+    ((5, 5), (10, 7), (10, 10))
+    """
+    spaces = list(state)
+    spaces.remove(space)
+    spaces.append((space[0], space[1] - volume))
+    spaces.sort()
+    return tuple(spaces)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'domain', 'scheduler'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
@@ -20,15 +20,35 @@ Sophia Huynh, Maryam Majedi, and Jaisie Sin.
 This module contains class SchedulingExperiment.  It can create an experiment
 with input data and an algorithm configuration specified in a dictionary, then
 run the experiment, generate statistics as the result of the experiment, and
-(optionally) report the statistics.
+(optionally) report the statistics.  It can also run many seeded
+replications of the random algorithm in parallel, and summarize them.
 
 This module is responsible for all the reading of data from the data files.
+The city names read for an experiment are interned in one CityRegistry, so
+that every parcel, truck route and distance shares one copy of each name.
 """
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Union
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from statistics import mean, stdev
+import copy
+import hashlib
 import json
-from scheduler import RandomScheduler, GreedyScheduler, Scheduler
+import os
+import pickle
+from scheduler import RandomScheduler, GreedyScheduler, Scheduler, \
+    FirstFitScheduler, BestFitScheduler, SavingsScheduler
 from domain import Parcel, Truck, Fleet
 from distance_map import DistanceMap
+from city_registry import CityRegistry
+from matrix_distance_map import MatrixDistanceMap
+from shortest_paths import complete_distances
+from lazy_distance_map import LazyDistanceMap
+from route_optimizer import optimize_routes
+from local_search import LocalSearchScheduler
+from exact_scheduler import ExactScheduler
+from beam_scheduler import BeamScheduler
+from genetic_scheduler import GeneticScheduler
 
 
 class SchedulingExperiment:
@@ -54,8 +74,13 @@ class SchedulingExperiment:
       The trucks that parcels are scheduled to in this experiment.
     dmap:
       The distances between cities in this experiment.
+    optimize:
+      If <optimize> is True, reorder the stops on each truck's route to
+      shorten it after scheduling.
 
     === Private Attributes ===
+    _cities:
+      The registry every city name read for this experiment is interned in.
     _stats:
       A dictionary of statistics. <_stats>'s value is undefined until
       <self>._compute_stats is called, at which point it contains keys and
@@ -76,6 +101,8 @@ class SchedulingExperiment:
     parcels: List[Parcel]
     fleet: Fleet
     dmap: DistanceMap
+    optimize: bool
+    _cities: CityRegistry
     _stats: Dict[str, Union[int, float]]
     _unscheduled: List[Parcel]
 
@@ -84,18 +111,60 @@ class SchedulingExperiment:
         <config>.
 
         Precondition: <config> contains keys and values as specified
-        in Assignment 1.
+        in Assignment 1.  It may also contain the key 'optimize_routes',
+        whose value says whether to reorder route stops after scheduling,
+        the key 'time_budget_ms', which limits the 'local_search' algorithm,
+        the key 'beam_width', which sets the width of the 'beam' algorithm,
+        the keys 'population_size' and 'generations', which size the
+        'genetic' algorithm, and the key 'distance_map', whose value 'matrix'
+        stores the distances in a MatrixDistanceMap, and whose value
+        'complete' also fills in the missing distances with shortest paths.
+        Completed distances are cached in the directory that is the value of
+        the key 'distance_cache', if there is one.  The value 'lazy' instead
+        finds the missing distances on demand, keeping the shortest paths
+        from as many cities as the key 'path_cache_size' says, or 64.
         """
         self.verbose = config['verbose']
+        self.optimize = config.get('optimize_routes', False)
+        self._cities = CityRegistry()
+        self.parcels = read_parcels(config['parcel_file'], self._cities)
+        self.fleet = read_trucks(config['truck_file'],
+                                 config['depot_location'], self._cities)
+        if config.get('distance_map') == 'complete':
+            self.dmap = read_completed_distance_map(
+                config['map_file'], self._cities,
+                config.get('distance_cache'))
+        else:
+            dmap = None
+            if config.get('distance_map') == 'matrix':
+                dmap = MatrixDistanceMap(self._cities)
+            elif config.get('distance_map') == 'lazy':
+                dmap = LazyDistanceMap(config.get('path_cache_size', 64))
+            self.dmap = read_distance_map(config['map_file'], self._cities,
+                                          dmap)
+
         if config['algorithm'] == 'greedy':
             self.scheduler = GreedyScheduler(config)
         elif config['algorithm'] == 'random':
             self.scheduler = RandomScheduler()
-
-        self.parcels = read_parcels(config['parcel_file'])
-        self.fleet = read_trucks(config['truck_file'],
-                                 config['depot_location'])
-        self.dmap = read_distance_map(config['map_file'])
+        elif config['algorithm'] == 'first_fit':
+            self.scheduler = FirstFitScheduler()
+        elif config['algorithm'] == 'best_fit':
+            self.scheduler = BestFitScheduler()
+        elif config['algorithm'] == 'savings':
+            self.scheduler = SavingsScheduler(self.dmap)
+        elif config['algorithm'] == 'exact':
+            self.scheduler = ExactScheduler()
+        elif config['algorithm'] == 'beam':
+            self.scheduler = BeamScheduler(config, self.dmap,
+                                           config.get('beam_width', 8))
+        elif config['algorithm'] == 'genetic':
+            self.scheduler = GeneticScheduler(
+                config, self.dmap, config.get('population_size', 100),
+                config.get('generations', 50))
+        elif config['algorithm'] == 'local_search':
+            self.scheduler = LocalSearchScheduler(
+                config, self.dmap, config.get('time_budget_ms', 1000))
 
         self._stats = {}
         self._unscheduled = []
@@ -114,6 +183,8 @@ class SchedulingExperiment:
         """
         self._unscheduled = self.scheduler.schedule(
             self.parcels, self.fleet.trucks, self.verbose)
+        if self.optimize:
+            optimize_routes(self.fleet, self.dmap)
         self._compute_stats()
         if report:
             self._print_report()
@@ -148,40 +219,155 @@ class SchedulingExperiment:
         print(self._stats, 'print the report')
 
 
+# ----- Replicated experiments -----
+
+# Statistics for which a smaller value is better.  For every other outcome
+# computed by SchedulingExperiment._compute_stats, a larger value is better.
+_LOWER_IS_BETTER = {'unused_trucks', 'avg_distance', 'unused_space',
+                    'unscheduled'}
+
+# Statistics that describe the input rather than the outcome of a schedule,
+# so no value of them is better than another.
+_INPUT_STATS = {'fleet'}
+
+# The experiment that each replication worker process runs.  It is set once
+# per worker by _init_replication_worker, so the parsed parcels, trucks and
+# distance map are sent to each worker once, not once per replication.
+_worker_experiment = None
+
+
+def run_replications(config: Dict[str, Union[str, bool]], replications: int,
+                     seed: int = 0, workers: Optional[int] = None) \
+        -> Dict[str, Dict[str, float]]:
+    """Run <replications> independent replications of the random algorithm
+    on the scheduling problem in <config>, in a pool of <workers> processes,
+    and return a summary of the statistics.
+
+    Each replication schedules onto a fresh copy of the fleet, using a
+    RandomScheduler with its own seed.  The seeds are derived from <seed>, so
+    the same <seed> reproduces the same results.  If <workers> is None, use
+    one process per CPU.
+
+    The return value maps each key of the statistics dictionary, as
+    specified in Step 5 of Assignment 1, to a dictionary with keys 'mean',
+    'stdev', 'min', 'max' and 'best'.  'best' is the smallest value for
+    statistics where smaller is better, like 'avg_distance', and the largest
+    value otherwise.  Statistics of the input, like 'fleet', have no 'best'.
+
+    Precondition: <config> contains keys and values as specified in
+    Assignment 1, and replications >= 1.
+    """
+    config = config.copy()
+    config['algorithm'] = 'random'
+    experiment = SchedulingExperiment(config)
+    seeds = Random(seed).sample(range(2 ** 32), replications)
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_replication_worker,
+                             initargs=(experiment,)) as pool:
+        results = list(pool.map(_run_replication, seeds))
+    return _summarize(results)
+
+
+def _init_replication_worker(experiment: SchedulingExperiment) -> None:
+    """Remember <experiment> as the experiment this worker process runs.
+    """
+    global _worker_experiment
+    _worker_experiment = experiment
+
+
+def _run_replication(seed: int) -> Dict[str, Union[int, float]]:
+    """Run one replication of this worker's experiment with a
+    RandomScheduler seeded by <seed>, and return its statistics.
+    """
+    experiment = _worker_experiment
+    fleet = Fleet()
+    for truck in experiment.fleet.trucks:
+        fleet.add_truck(Truck(truck.id, truck.capacity, truck.depot))
+    replication = copy.copy(experiment)
+    replication.fleet = fleet
+    replication.scheduler = RandomScheduler(seed)
+    return replication.run()
+
+
+def _summarize(results: List[Dict[str, Union[int, float]]]) \
+        -> Dict[str, Dict[str, float]]:
+    """Return the summary described in run_replications of the statistics
+    in <results>.
+
+    >>> summary = _summarize([{'avg_distance': 10, 'avg_fullness': 50},
+    ...                       {'avg_distance': 20, 'avg_fullness': 70}])
+    >>> summary['avg_distance']['best'], summary['avg_fullness']['best']
+    (10, 70)
+    >>> summary['avg_fullness']['mean']
+    60
+    >>> 'best' in _summarize([{'fleet': 4}, {'fleet': 4}])['fleet']
+    False
+    """
+    summary = {}
+    for stat in results[0]:
+        values = [result[stat] for result in results]
+        summary[stat] = {
+            'mean': mean(values),
+            'stdev': stdev(values) if len(values) > 1 else 0.0,
+            'min': min(values),
+            'max': max(values)
+        }
+        if stat in _LOWER_IS_BETTER:
+            summary[stat]['best'] = min(values)
+        elif stat not in _INPUT_STATS:
+            summary[stat]['best'] = max(values)
+    return summary
+
+
 # ----- Helper functions -----
 
 
-def read_parcels(parcel_file: str) -> List[Parcel]:
+def read_parcels(parcel_file: str,
+                 cities: Optional[CityRegistry] = None) -> List[Parcel]:
     """Read parcel data from <parcel_file> and return.
 
+    The city names are interned in <cities>, or in a new registry if <cities>
+    is None.
+
     Precondition: <parcel_file> is the path to a file containing parcel data in
                   the form specified in Assignment 1.
     """
+    if cities is None:
+        cities = CityRegistry()
     parcels = []
     with open(parcel_file, 'r') as file:
         for line in file:
             tokens = line.strip().split(',')
             pid = int(tokens[0].strip())
-            source = tokens[1].strip()
-            destination = tokens[2].strip()
+            source = cities.intern(tokens[1].strip())
+            destination = cities.intern(tokens[2].strip())
             volume = int(tokens[3].strip())
             parcels.append(Parcel(pid, volume, source, destination))
     return parcels
 
 
-def read_distance_map(distance_map_file: str) -> DistanceMap:
+def read_distance_map(distance_map_file: str,
+                      cities: Optional[CityRegistry] = None,
+                      dmp: Optional[DistanceMap] = None) -> DistanceMap:
     """Read distance data from <distance_map_file> and return a DistanceMap
     that records it.
 
+    The city names are interned in <cities>, or in a new registry if <cities>
+    is None.  The distances are recorded in <dmp>, or in a new DistanceMap if
+    <dmp> is None.
+
     Precondition: <distance_map_file> is the path to a file containing distance
                   data in the form specified in Assignment 1.
     """
-    dmp = DistanceMap()
+    if cities is None:
+        cities = CityRegistry()
+    if dmp is None:
+        dmp = DistanceMap()
     with open(distance_map_file, 'r') as file:
         for line in file:
             tokens = line.strip().split(',')
-            c1 = tokens[0].strip()
-            c2 = tokens[1].strip()
+            c1 = cities.intern(tokens[0].strip())
+            c2 = cities.intern(tokens[1].strip())
             distance1 = int(tokens[2].strip())
             distance2 = int(tokens[3].strip()) if len(tokens) == 4 \
                 else distance1
@@ -189,13 +375,63 @@ def read_distance_map(distance_map_file: str) -> DistanceMap:
     return dmp
 
 
-def read_trucks(truck_file: str, depot_location: str) -> Fleet:
+def read_completed_distance_map(distance_map_file: str,
+                                cities: Optional[CityRegistry] = None,
+                                cache_dir: Optional[str] = None) \
+        -> MatrixDistanceMap:
+    """Read distance data from <distance_map_file> and return a
+    MatrixDistanceMap that records it, with every missing distance between
+    two cities filled in with the length of the shortest path between them.
+
+    The city names are interned in <cities>, or in a new registry if <cities>
+    is None.  If <cache_dir> is not None, the filled in distances are saved
+    in it, under a hash of the contents of <distance_map_file>, and read
+    from there instead of being found again while the file is unchanged.
+
+    Precondition: <distance_map_file> is the path to a file containing distance
+                  data in the form specified in Assignment 1.
+    """
+    if cities is None:
+        cities = CityRegistry()
+    dmp = read_distance_map(distance_map_file, cities,
+                            MatrixDistanceMap(cities))
+    if cache_dir is None:
+        complete_distances(dmp)
+        return dmp
+
+    with open(distance_map_file, 'rb') as file:
+        key = hashlib.sha256(file.read()).hexdigest()
+    cache_file = os.path.join(cache_dir, key + '.pickle')
+    if os.path.exists(cache_file):
+        with open(cache_file, 'rb') as file:
+            names, rows = pickle.load(file)
+        dmp.fill(names, rows)
+        return dmp
+
+    complete_distances(dmp)
+    os.makedirs(cache_dir, exist_ok=True)
+    # write to a temporary file first, so that an interrupted write never
+    # leaves a partial cache file behind
+    with open(cache_file + '.tmp', 'wb') as file:
+        pickle.dump((dmp.cities(), dmp.rows()), file)
+    os.replace(cache_file + '.tmp', cache_file)
+    return dmp
+
+
+def read_trucks(truck_file: str, depot_location: str,
+                cities: Optional[CityRegistry] = None) -> Fleet:
     """Read truck data from <truck_file> and return a Fleet containing these
     trucks, with each truck starting at the <depot_location>.
 
+    The depot name is interned in <cities>, or in a new registry if <cities>
+    is None.
+
     Precondition: <truck_file> is a path to a file containing truck data in the
                   form specified in Assignment 1.
     """
+    if cities is None:
+        cities = CityRegistry()
+    depot_location = cities.intern(depot_location)
     f = Fleet()
     with open(truck_file, 'r') as file:
         for line in file:
@@ -225,11 +461,20 @@ def simple_check(config_file: str) -> None:
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
-        'allowed-io': ['read_parcels', 'read_distance_map', 'read_trucks',
+        'allowed-io': ['read_parcels', 'read_distance_map',
+                       'read_completed_distance_map', 'read_trucks',
                        '_print_report', 'simple_check'],
         'allowed-import-modules': ['doctest', 'python_ta', 'typing',
                                    'json', 'scheduler', 'domain',
-                                   'distance_map'],
+                                   'distance_map', 'city_registry',
+                                   'matrix_distance_map', 'shortest_paths',
+                                   'lazy_distance_map', 'hashlib', 'os',
+                                   'pickle',
+                                   'concurrent.futures',
+                                   'random', 'statistics', 'copy',
+                                   'route_optimizer', 'local_search',
+                                   'exact_scheduler', 'beam_scheduler',
+                                   'genetic_scheduler'],
         'disable': ['E1136'],
         'max-attributes': 15,
     })
@@ -22,32 +22,48 @@ compare_algorithms block) to determine the parcel, truck and map files to use.
 It then constructs all nine possible algorithm configurations, and runs each
 on this same data.  Results are printed to a csv file called 'results.csv'.
 
+If there are few enough parcels, an optimal schedule is also found, and each
+row reports its optimality gap: how many more parcels it leaves unscheduled,
+and how much more space it leaves unused, than the optimal schedule.
+
 You have no tasks associated with this module.  It is provided to you so that
 you can compare the performance of the algorithms and notice any patterns or
 conclusions you might draw.  You may also find that reviewing the comparison
 reveals bugs in your code.
 """
-from typing import TextIO, Dict, Union
+from typing import TextIO, Dict, Optional, Union
 import json
 from experiment import SchedulingExperiment
 
+# The largest number of parcels for which an optimal schedule is found.
+EXACT_PARCEL_LIMIT = 30
+
 
 def print_table_title(file: TextIO) -> None:
     """Print the title row of a results table in csv format to <file>.
     """
     file.write('Algorithm,Parcel Priority,Parcel Order  ,Truck Order   ,'
                + 'Unused Trucks,Unused Space,Avg dist,Avg fullness,'
-               + 'Unsched Parcels\n')
+               + 'Unsched Parcels,Unsched gap,Space gap\n')
 
 
 def print_table_row(config: Dict[str, Union[str, bool]],
-                    stats: Dict[str, Union[int, float]], file: TextIO) -> None:
+                    stats: Dict[str, Union[int, float]], file: TextIO,
+                    optimal: Optional[Dict[str, Union[int, float]]] = None) \
+        -> None:
     """Print one row of a results table, in csv format.
 
     <config> is the configuration that was used.
     <stats> is the stats that resulted.
     <file> is the file to write to.
+    <optimal> is the stats of an optimal schedule, or None if there are none,
+    in which case the gap columns are 'NA'.
     """
+    if optimal is None:
+        unscheduled_gap = space_gap = 'NA'
+    else:
+        unscheduled_gap = stats['unscheduled'] - optimal['unscheduled']
+        space_gap = stats['unused_space'] - optimal['unused_space']
     file.write(f'{config["algorithm"]:<9},'
                f'{config["parcel_priority"]:<15},'
                f'{config["parcel_order"]:<14},'
@@ -56,14 +72,18 @@ def print_table_row(config: Dict[str, Union[str, bool]],
                f'{stats["unused_space"]:<12},'
                f'{stats["avg_distance"]:<8.2f},'
                f'{stats["avg_fullness"]:<12.2f},'
-               f'{stats["unscheduled"]}\n')
+               f'{stats["unscheduled"]:<15},'
+               f'{unscheduled_gap:<11},'
+               f'{space_gap}\n')
 
 
 def compare_algorithms(config_file: str) -> None:
     """Compare all algorithms on a single problem.
 
     Run the random algorithm and every configuration of the greedy
-    algorithm on the scheduling problem defined in <config_file>.
+    algorithm on the scheduling problem defined in <config_file>.  If it has
+    at most EXACT_PARCEL_LIMIT parcels, also find an optimal schedule, and
+    report how far each configuration is from it.
 
     Precondition: <config_file> a path to a json file with keys and values
     as in the dictionary format defined in Assignment 1.
@@ -119,8 +139,21 @@ def compare_algorithms(config_file: str) -> None:
          'truck_order': 'non-increasing'}
     ]
 
+    # Find an optimal schedule, if the problem is small enough.
+    config = basic_config.copy()
+    config.update({'algorithm': 'exact',
+                   'parcel_priority': 'NA',
+                   'parcel_order': 'NA',
+                   'truck_order': 'NA'})
+    exact = SchedulingExperiment(config)
+    optimal = None
+    if len(exact.parcels) <= EXACT_PARCEL_LIMIT:
+        optimal = exact.run(report=False)
+
     with open('data/results.csv', 'w') as file:
         print_table_title(file)
+        if optimal is not None:
+            print_table_row(config, optimal, file, optimal)
         for item in algorithm_configurations:
             # Start with the basic configuration <config>, and add the
             # algorithm details from this item in our list of configurations.
@@ -130,7 +163,7 @@ def compare_algorithms(config_file: str) -> None:
             # to our csv file.
             expt = SchedulingExperiment(config)
             results = expt.run(report=False)
-            print_table_row(config, results, file)
+            print_table_row(config, results, file, optimal)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,392 @@
+"""Assignment 1 - Genetic algorithm scheduling (No tasks)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class GeneticScheduler, which searches for a good
+order in which to give the parcels to the greedy algorithm.
+
+Each chromosome is a permutation of the parcels.  It is decoded by packing
+the parcels in that order, with the truck choice of GreedyScheduler, and its
+fitness is the statistics that SchedulingExperiment computes for the
+resulting schedule.  Decoding works on arrays of integers rather than on
+Truck objects, and each generation is evaluated in a pool of worker
+processes.
+"""
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from distance_map import DistanceMap
+from domain import Parcel, Truck
+from scheduler import GreedyScheduler
+
+# The fitness of a schedule: the number of unscheduled parcels, the unused
+# space and the average distance travelled, where less is better.
+_Fitness = Tuple[int, int, float]
+
+# The number of chromosomes each worker process evaluates at a time.
+_BATCH_SIZE = 64
+
+# The problem each worker process decodes chromosomes of.  It is set once per
+# worker by _init_worker, so it is not sent again with each batch.
+_worker_problem = None
+
+
+class _Problem(NamedTuple):
+    """The parts of a scheduling problem needed to decode a chromosome, with
+    parcels and trucks numbered by position and cities numbered from 0, the
+    depot.
+
+    <distances> and <stops> give the distance each truck has travelled on its
+    route so far, not counting the return to the depot, and the number of
+    parcels it holds already.
+    """
+    volumes: array
+    destinations: array
+    capacities: array
+    spaces: array
+    lasts: array
+    distances: array
+    stops: array
+    matrix: List[array]
+    most_available: bool
+
+
+class GeneticScheduler(GreedyScheduler):
+    """A scheduler that evolves the order in which the greedy algorithm packs
+    the parcels.
+
+    The first generation holds the greedy order, variations of it and random
+    orders.  Each later generation keeps the fittest chromosomes, and fills
+    the rest with children of parents chosen by tournament, made by order
+    crossover and then, sometimes, a swap of two parcels.
+
+    This is a subclass of GreedyScheduler, whose configuration sets the first
+    order tried and the truck each parcel is packed onto.
+
+    === Private Attributes ===
+    _dmap: the distances between cities
+    _population_size: the number of chromosomes in each generation
+    _generations: the number of generations evolved
+    _mutation_rate: the chance that a child has two parcels swapped
+    _workers: the number of processes that evaluate chromosomes, or None for
+      one per CPU
+    _rng: the random number generator this scheduler draws from
+
+    === Representation Invariants ===
+    - _population_size >= 2
+    - 0 <= _mutation_rate <= 1
+    """
+    _dmap: DistanceMap
+    _population_size: int
+    _generations: int
+    _mutation_rate: float
+    _workers: Optional[int]
+    _rng: Random
+
+    def __init__(self, config: Dict[str, Union[str, bool]], dmap: DistanceMap,
+                 population_size: int = 100, generations: int = 50,
+                 mutation_rate: float = 0.2, seed: Optional[int] = None,
+                 workers: Optional[int] = None) -> None:
+        """Initialize a genetic algorithm scheduler with the greedy
+        configuration in <config>, which measures distances with <dmap>.
+        Chromosomes are evaluated in a pool of <workers> processes; if
+        <workers> is 1, they are evaluated in this process.
+        """
+        GreedyScheduler.__init__(self, config)
+        self._dmap = dmap
+        self._population_size = population_size
+        self._generations = generations
+        self._mutation_rate = mutation_rate
+        self._workers = workers
+        self._rng = Random(seed)
+
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the given <parcels> onto the given <trucks>, that is, decide
+        which parcels will go on which trucks, as well as the route each truck
+        will take.
+
+        This is a method that overrides the superclass Scheduler's method.
+
+        Mutate the Truck objects in <trucks> so that they store information
+        about which parcel objects they will deliver and what route they will
+        take.  Do *not* mutate the list <parcels>, or any of the parcel objects
+        in that list.
+
+        Return a list containing the parcels that did not get scheduled onto any
+        truck, due to lack of capacity.
+
+        If <verbose> is True, print step-by-step details regarding
+        the scheduling algorithm as it runs.
+
+        Precondition: all trucks in <trucks> have the same depot.
+        """
+        if len(parcels) < 2 or not trucks:
+            return GreedyScheduler.schedule(self, parcels, trucks, verbose)
+        problem = _build_problem(parcels, trucks, self._dmap,
+                                 self._truck_order == 'non-increasing')
+        key, reverse = self._get_parcel_key()
+        greedy = sorted(range(len(parcels)), key=lambda i: key(parcels[i]),
+                        reverse=reverse)
+        population = self._first_generation(array('i', greedy))
+        fitness = {}
+
+        pool = None
+        if self._workers == 1:
+            _init_worker(problem)
+        else:
+            pool = ProcessPoolExecutor(max_workers=self._workers,
+                                       initializer=_init_worker,
+                                       initargs=(problem,))
+        try:
+            for generation in range(self._generations + 1):
+                if generation > 0:
+                    population = self._breed(population, fitness)
+                self._evaluate(population, fitness, pool)
+                population.sort(key=lambda c: fitness[c.tobytes()])
+                if verbose:
+                    print('Generation', generation, 'best fitness',
+                          fitness[population[0].tobytes()])
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return self._schedule_in_order([parcels[i] for i in population[0]],
+                                       trucks, verbose)
+
+    def _first_generation(self, greedy: array) -> List[array]:
+        """Return the first generation, made from the <greedy> order.
+
+        Half of the chromosomes other than <greedy> have a few parcels of the
+        greedy order swapped, and the others are random orders.
+        """
+        population = [greedy]
+        while len(population) < self._population_size:
+            chromosome = array('i', greedy)
+            if len(population) % 2:
+                for _ in range(self._rng.randint(1, 3)):
+                    self._swap(chromosome)
+            else:
+                self._rng.shuffle(chromosome)
+            population.append(chromosome)
+        return population
+
+    def _evaluate(self, population: List[array],
+                  fitness: Dict[bytes, _Fitness],
+                  pool: Optional[ProcessPoolExecutor]) -> None:
+        """Record in <fitness> the fitness of each chromosome in <population>
+        that is not there yet, using the workers in <pool>, or this process
+        if <pool> is None.
+
+        <fitness> is keyed by the bytes of each chromosome, so a chromosome
+        that appears again, like the ones kept from the last generation, is
+        not evaluated again.
+        """
+        new = {}
+        for chromosome in population:
+            key = chromosome.tobytes()
+            if key not in fitness:
+                new[key] = chromosome
+        if pool is None:
+            values = map(_evaluate, new.values())
+        else:
+            values = pool.map(_evaluate, new.values(), chunksize=_BATCH_SIZE)
+        for key, value in zip(new, values):
+            fitness[key] = value
+
+    def _breed(self, population: List[array],
+               fitness: Dict[bytes, _Fitness]) -> List[array]:
+        """Return the next generation after <population>, which is sorted from
+        fittest to least fit, with fitness values in <fitness>.
+        """
+        elite = max(1, self._population_size // 10)
+        children = population[:elite]
+        while len(children) < self._population_size:
+            mother = self._tournament(population, fitness)
+            father = self._tournament(population, fitness)
+            child = _order_crossover(mother, father, self._rng)
+            if self._rng.random() < self._mutation_rate:
+                self._swap(child)
+            children.append(child)
+        return children
+
+    def _tournament(self, population: List[array],
+                    fitness: Dict[bytes, _Fitness]) -> array:
+        """Return the fittest of three chromosomes chosen at random from
+        <population>, with fitness values in <fitness>.
+        """
+        contenders = [self._rng.choice(population) for _ in range(3)]
+        return min(contenders, key=lambda c: fitness[c.tobytes()])
+
+    def _swap(self, chromosome: array) -> None:
+        """Swap two parcels chosen at random in <chromosome>.
+        """
+        i = self._rng.randrange(len(chromosome))
+        j = self._rng.randrange(len(chromosome))
+        chromosome[i], chromosome[j] = chromosome[j], chromosome[i]
+
+
+def _build_problem(parcels: List[Parcel], trucks: List[Truck],
+                   dmap: DistanceMap, most_available: bool) -> _Problem:
+    """Return the problem of scheduling <parcels> onto <trucks>, with the
+    cities numbered and their distances looked up in <dmap>.  The greedy
+    algorithm picks the eligible truck with the most available space if
+    <most_available> is True, and the least otherwise.
+    """
+    city_ids = {trucks[0].depot: 0}
+    for truck in trucks:
+        for city in truck.routes:
+            city_ids.setdefault(city, len(city_ids))
+    for parcel in parcels:
+        city_ids.setdefault(parcel.destination, len(city_ids))
+    matrix = [array('i', [dmap.distance(city1, city2) for city2 in city_ids])
+              for city1 in city_ids]
+    distances = array('i')
+    for truck in trucks:
+        route = [city_ids[city] for city in truck.routes]
+        distances.append(sum(matrix[a][b] for a, b in zip(route, route[1:])))
+    return _Problem(array('i', [parcel.volume for parcel in parcels]),
+                    array('i', [city_ids[parcel.destination]
+                                for parcel in parcels]),
+                    array('i', [truck.capacity for truck in trucks]),
+                    array('i', [truck.available_space for truck in trucks]),
+                    array('i', [city_ids[truck.routes[-1]]
+                                for truck in trucks]),
+                    distances,
+                    array('i', [len(truck.parcels) for truck in trucks]),
+                    matrix, most_available)
+
+
+def _init_worker(problem: _Problem) -> None:
+    """Set the problem that this process decodes chromosomes of.
+    """
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _evaluate(chromosome: array) -> _Fitness:
+    """Return the fitness of <chromosome>, from the statistics of the schedule
+    it decodes to.
+    """
+    stats = _decode(_worker_problem, chromosome)
+    return stats['unscheduled'], stats['unused_space'], stats['avg_distance']
+
+
+def _decode(problem: _Problem, chromosome: array) \
+        -> Dict[str, Union[int, float]]:
+    """Return the statistics that SchedulingExperiment would compute for the
+    schedule made by packing the parcels of <problem> in the order of
+    <chromosome> with the greedy algorithm.
+
+    A parcel goes on a truck whose route ends at its destination, if one has
+    enough space, and otherwise on any truck with enough space.  Among those
+    trucks, it goes on the first one with the most available space, or the
+    least if <problem>.most_available is False.
+
+    >>> problem = _Problem(array('i', [4, 4, 3]), array('i', [1, 2, 1]),
+    ...                    array('i', [10, 5]), array('i', [10, 5]),
+    ...                    array('i', [0, 0]), array('i', [0, 0]),
+    ...                    array('i', [0, 0]),
+    ...                    [array('i', [0, 2, 3]), array('i', [2, 0, 4]),
+    ...                     array('i', [3, 4, 0])], True)
+    >>> _decode(problem, array('i', [0, 1, 2])) == {
+    ...     'fleet': 2, 'unused_trucks': 0, 'avg_distance': 6.5,
+    ...     'avg_fullness': 70.0, 'unused_space': 4, 'unscheduled': 0}
+    True
+    """
+    volumes = problem.volumes
+    destinations = problem.destinations
+    matrix = problem.matrix
+    spaces = array('i', problem.spaces)
+    lasts = array('i', problem.lasts)
+    distances = array('i', problem.distances)
+    stops = array('i', problem.stops)
+    trucks = range(len(spaces))
+    unscheduled = 0
+    for p in chromosome:
+        volume = volumes[p]
+        city = destinations[p]
+        chosen = -1
+        for same_city in (True, False):
+            for t in trucks:
+                if spaces[t] < volume or (same_city and lasts[t] != city):
+                    continue
+                if chosen < 0 or (spaces[t] > spaces[chosen]
+                                  if problem.most_available
+                                  else spaces[t] < spaces[chosen]):
+                    chosen = t
+            if chosen >= 0:
+                break
+        if chosen < 0:
+            unscheduled += 1
+            continue
+        spaces[chosen] -= volume
+        stops[chosen] += 1
+        if lasts[chosen] != city:
+            distances[chosen] += matrix[lasts[chosen]][city]
+            lasts[chosen] = city
+
+    used = [t for t in trucks if stops[t] > 0]
+    if not used:
+        return {'fleet': len(spaces), 'unused_trucks': len(spaces),
+                'avg_distance': 0.0, 'avg_fullness': 0.0, 'unused_space': 0,
+                'unscheduled': unscheduled}
+    total_distance = sum(distances[t] + matrix[lasts[t]][0] for t in used)
+    total_fullness = sum((problem.capacities[t] - spaces[t])
+                         / problem.capacities[t] * 100 for t in used)
+    return {'fleet': len(spaces),
+            'unused_trucks': len(spaces) - len(used),
+            'avg_distance': total_distance / len(used),
+            'avg_fullness': total_fullness / len(used),
+            'unused_space': sum(spaces[t] for t in used),
+            'unscheduled': unscheduled}
+
+
+def _order_crossover(mother: array, father: array, rng: Random) -> array:
+    """Return the child of <mother> and <father> made by order crossover: a
+    random slice of <mother> is kept in place, and the other positions are
+    filled with the remaining parcels in the order they appear in <father>.
+
+    >>> child = _order_crossover(array('i', [0, 1, 2, 3, 4]),
+    ...                          array('i', [4, 3, 2, 1, 0]), Random(1))
+    >>> sorted(child)
+    [0, 1, 2, 3, 4]
+    """
+    n = len(mother)
+    i = rng.randrange(n)
+    j = rng.randrange(i, n) + 1
+    kept = set(mother[i:j])
+    rest = iter([p for p in father if p not in kept])
+    child = array('i', mother)
+    for k in list(range(i)) + list(range(j, n)):
+        child[k] = next(rest)
+    return child
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing', 'array',
+                                   'concurrent.futures', 'random',
+                                   'distance_map', 'domain', 'scheduler'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
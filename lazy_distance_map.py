@@ -0,0 +1,195 @@
+"""Assignment 1 - Lazy shortest path distance map (No tasks)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class LazyDistanceMap, a DistanceMap that treats
+its distances as a road network, and gives the length of the shortest path
+between two cities that have no distance of their own.
+
+Shortest paths are found from a city the first time a missing distance from
+it is asked for, and kept for the most recently used cities only.  This
+suits large maps, where finding the paths between all pairs of cities up
+front, as complete_distances does, takes too long and too much memory.
+"""
+from collections import OrderedDict
+from heapq import heappop, heappush
+from typing import Dict
+from distance_map import DistanceMap
+
+
+class LazyDistanceMap(DistanceMap):
+    """A distance map that fills in missing distances with shortest paths,
+    found on demand.
+
+    A distance that was added is returned as it is.  Any other distance
+    between two different cities is the length of the shortest path between
+    them, or -1 if there is none.  The lengths of the shortest paths from a
+    city are found by Dijkstra's algorithm and kept in a cache of at most
+    <_cache_size> cities, from which the least recently used city is evicted.
+
+    This is a subclass of DistanceMap.
+
+    === Private Attributes ===
+    _roads: maps each city to a dictionary that maps each city it has a
+      distance to, to that distance.  The distances are kept only here, and
+      not in the record of DistanceMap, which stays empty.
+    _cache_size: the largest number of cities whose paths are kept
+    _paths: maps each city whose paths are kept to a dictionary that maps
+      each city there is a path to, to the length of the shortest one, from
+      the least recently used city to the most
+    _hits: the number of lookups that found the paths from a city kept
+    _misses: the number of lookups that had to find the paths from a city
+    _evictions: the number of cities whose paths were dropped from the cache
+      to make room for another
+
+    === Representation Invariants ===
+    - len(_paths) <= _cache_size
+    - _cache_size >= 1
+    """
+    _roads: Dict[str, Dict[str, int]]
+    _cache_size: int
+    _paths: OrderedDict
+    _hits: int
+    _misses: int
+    _evictions: int
+
+    def __init__(self, cache_size: int = 64) -> None:
+        """Initialize a distance map that keeps the shortest paths from at
+        most <cache_size> cities.
+
+        Precondition: cache_size >= 1
+        """
+        DistanceMap.__init__(self)
+        self._roads = {}
+        self._cache_size = cache_size
+        self._paths = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def add_distance(self, city1: str, city2: str, distance1: int,
+                     distance2: int = -1) -> None:
+        """ Record the distance between the first city <city1> and
+        the second city <city2>.
+        If distance2 == default value(-1), distance from <city2> to
+        <city1> is distance1, otherwise distance2.
+
+        Like DistanceMap, nothing is recorded if there already is a distance
+        from <city1> to <city2>.  Otherwise every shortest path that was kept
+        is forgotten, since the new road may shorten it.
+
+        >>> m = LazyDistanceMap()
+        >>> m.add_distance('a', 'b', 3, 4)
+        >>> m.add_distance('a', 'b', 1)
+        >>> m.distance('a', 'b'), m.distance('b', 'a')
+        (3, 4)
+        """
+        roads = self._roads.setdefault(city1, {})
+        if city2 not in roads:
+            roads[city2] = distance1
+            if distance2 == -1:  # if distance2 == distance1
+                distance2 = distance1
+            self._roads.setdefault(city2, {})[city1] = distance2
+            self._paths.clear()
+
+    def distance(self, city1: str, city2: str) -> int:
+        """ Return the distance from the first city <city1>
+        to the second <city2>, or the length of the shortest path from
+        <city1> to <city2> if there is no distance between them.  Return -1
+        if there is no path, or if the cities are the same.
+
+        >>> m = LazyDistanceMap()
+        >>> m.add_distance('a', 'b', 3)
+        >>> m.add_distance('b', 'c', 4, 5)
+        >>> m.distance('a', 'c'), m.distance('c', 'a'), m.distance('a', 'd')
+        (7, 8, -1)
+        """
+        road = self._roads.get(city1, {}).get(city2)
+        if road is not None:
+            return road
+        if city1 == city2:
+            return -1
+        return self._paths_from(city1).get(city2, -1)
+
+    def _paths_from(self, source: str) -> Dict[str, int]:
+        """Return a dictionary that maps each city there is a path to from
+        <source>, to the length of the shortest one, from the cache if it is
+        there.
+        """
+        paths = self._paths.get(source)
+        if paths is not None:
+            self._hits += 1
+            self._paths.move_to_end(source)
+            return paths
+        self._misses += 1
+        paths = _shortest_paths(self._roads, source)
+        if len(self._paths) >= self._cache_size:
+            self._paths.popitem(last=False)
+            self._evictions += 1
+        self._paths[source] = paths
+        return paths
+
+    def counters(self) -> Dict[str, int]:
+        """Return how often the shortest paths from a city were found in the
+        cache ('hits'), and had to be found ('misses'), how many cities'
+        paths were evicted ('evictions'), and how many are kept ('cached').
+
+        >>> m = LazyDistanceMap(cache_size=1)
+        >>> m.add_distance('a', 'b', 3)
+        >>> m.add_distance('b', 'c', 4)
+        >>> m.distance('a', 'c'), m.distance('a', 'c'), m.distance('c', 'a')
+        (7, 7, 7)
+        >>> m.counters()
+        {'hits': 1, 'misses': 2, 'evictions': 1, 'cached': 1}
+        """
+        return {'hits': self._hits, 'misses': self._misses,
+                'evictions': self._evictions, 'cached': len(self._paths)}
+
+
+def _shortest_paths(roads: Dict[str, Dict[str, int]], source: str) \
+        -> Dict[str, int]:
+    """Return a dictionary that maps each city there is a path to from
+    <source> along <roads>, including <source>, to the length of the
+    shortest one, by Dijkstra's algorithm.
+
+    >>> _shortest_paths({'a': {'b': 3}, 'b': {'a': 3, 'c': 4}}, 'a')
+    {'a': 0, 'b': 3, 'c': 7}
+    """
+    paths = {}
+    heap = [(0, source)]
+    while heap:
+        distance, city = heappop(heap)
+        if city in paths:
+            continue
+        paths[city] = distance
+        for neighbour, road in roads.get(city, {}).items():
+            if neighbour not in paths:
+                heappush(heap, (distance + road, neighbour))
+    return paths
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'collections', 'heapq', 'distance_map'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
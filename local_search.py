@@ -0,0 +1,523 @@
+"""Assignment 1 - Local search scheduling (No tasks)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class LocalSearchScheduler, an anytime scheduler.
+It starts from the schedule made by GreedyScheduler, then improves it by
+moving parcels between trucks until a time budget runs out, and returns the
+best schedule it found.
+
+A schedule is scored by a weighted sum of the number of unscheduled parcels,
+the unused space in non-empty trucks and the total distance travelled.  The
+weight of an unscheduled parcel is larger than the most that the unused
+space and distance of any schedule of the same parcels can add up to, so
+the search never trades a delivered parcel for a shorter route.
+"""
+from __future__ import annotations
+from math import exp
+from random import Random
+from time import perf_counter
+from typing import Dict, List, NamedTuple, Optional, Union
+from city_registry import CityRegistry
+from distance_map import DistanceMap
+from domain import Parcel, Truck
+from scheduler import Scheduler, GreedyScheduler
+
+# The weights of the unused space and distance parts of the score of a
+# schedule.  The weight of the unscheduled parcels depends on the problem,
+# and is found by _SearchState.
+_UNUSED_SPACE_WEIGHT = 1
+_DISTANCE_WEIGHT = 1
+
+# The length used for a leg between cities that are not in the distance map,
+# so that the search moves parcels off such legs when it can.
+_MISSING_DISTANCE = 10 ** 6
+
+# The number of moves made between checks of the clock.
+_CHECK_EVERY = 32
+
+# The number of moves tried, and undone, to choose the starting temperature.
+_WARM_UP = 100
+
+# The final temperature, as a fraction of the starting temperature.
+_COOLING = 1e-3
+
+
+class LocalSearchScheduler(Scheduler):
+    """A scheduler that improves the greedy schedule by simulated annealing,
+    within a wall-clock time budget.
+
+    Each step either relocates a parcel onto another truck that has room for
+    it, or swaps two parcels on different trucks.  A parcel that was not
+    scheduled may be relocated onto a truck too.  A relocated parcel joins
+    the stop for its destination if the truck already has one, and otherwise
+    adds a stop at the end of the route.  Only the legs around the stops that
+    change are rescored, so each move costs constant time.  Moves that make
+    the schedule worse are accepted with a probability that shrinks as time
+    runs out.
+
+    This is a subclass of Scheduler.
+
+    === Private Attributes ===
+    _greedy: the scheduler that makes the starting schedule
+    _dmap: the distances between cities
+    _time_budget_ms: how long the search may run, in milliseconds
+    _rng: the random number generator this scheduler draws from
+    """
+    _greedy: GreedyScheduler
+    _dmap: DistanceMap
+    _time_budget_ms: float
+    _rng: Random
+
+    def __init__(self, config: Dict[str, Union[str, bool]], dmap: DistanceMap,
+                 time_budget_ms: float, seed: Optional[int] = None) -> None:
+        """Initialize a local search scheduler.  <config> configures the
+        GreedyScheduler that makes the starting schedule, and <dmap> gives
+        the distances between cities.
+        """
+        self._greedy = GreedyScheduler(config)
+        self._dmap = dmap
+        self._time_budget_ms = time_budget_ms
+        self._rng = Random(seed)
+
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the given <parcels> onto the given <trucks>, that is, decide
+        which parcels will go on which trucks, as well as the route each truck
+        will take.
+
+        This is a method that overrides the superclass Scheduler's method.
+
+        Return within about the time budget, with the best schedule found.
+
+        Mutate the Truck objects in <trucks> so that they store information
+        about which parcel objects they will deliver and what route they will
+        take.  Do *not* mutate the list <parcels>, or any of the parcel objects
+        in that list.
+
+        Return a list containing the parcels that did not get scheduled onto any
+        truck, due to lack of capacity.
+
+        If <verbose> is True, print step-by-step details regarding
+        the scheduling algorithm as it runs.
+
+        Precondition: the trucks in <trucks> have no parcels.
+        """
+        deadline = perf_counter() + self._time_budget_ms / 1000
+        copies = [Truck(truck.id, truck.capacity, truck.depot)
+                  for truck in trucks]
+        self._greedy.schedule(parcels, copies)
+        self._greedy.close()
+        if not trucks or not parcels:
+            return self._write_back(parcels, trucks,
+                                    [truck.parcels for truck in copies])
+        state = _SearchState(parcels, copies, self._dmap)
+        best = state.cost()
+        best_loads = state.loads()
+        at_best = True
+
+        temperature = self._starting_temperature(state)
+        start = perf_counter()
+        steps = 0
+        while True:
+            if steps % _CHECK_EVERY == 0:
+                now = perf_counter()
+                if now >= deadline:
+                    break
+                progress = (now - start) / max(deadline - start, 1e-9)
+                current_temperature = temperature * _COOLING ** progress
+            steps += 1
+            before = state.cost()
+            undo = self._random_move(state)
+            if undo is None:
+                continue
+            delta = state.cost() - before
+            if delta <= 0:
+                if delta < 0 and state.cost() < best:
+                    best = state.cost()
+                    at_best = True
+            elif self._rng.random() < exp(-delta / current_temperature):
+                if at_best:
+                    # leaving the best schedule so far: record it first
+                    state.undo(undo)
+                    best_loads = state.loads()
+                    at_best = False
+                    for move in undo:
+                        state.move(move.parcel, move.target)
+            else:
+                state.undo(undo)
+        if at_best:
+            best_loads = state.loads()
+        if verbose:
+            print('Local search made', steps, 'moves; best score', best)
+        return self._write_back(parcels, trucks, best_loads)
+
+    def _starting_temperature(self, state: _SearchState) -> float:
+        """Return a starting temperature that accepts a typical worsening
+        move about a third of the time, from a sample of moves on <state>
+        which are all undone.
+        """
+        total = 0
+        count = 0
+        for _ in range(_WARM_UP):
+            before = state.cost()
+            undo = self._random_move(state)
+            if undo is not None:
+                delta = state.cost() - before
+                if delta > 0:
+                    total += delta
+                    count += 1
+                state.undo(undo)
+        if count == 0:
+            return 1.0
+        return total / count
+
+    def _random_move(self, state: _SearchState) -> Optional[List[_Move]]:
+        """Make a random relocate or swap move on <state>, and return the
+        parcel moves it made, or None if the chosen move was not possible.
+        """
+        rng = self._rng
+        p = rng.randrange(state.num_parcels())
+        t = rng.randrange(state.num_trucks())
+        if rng.random() < 0.5:
+            if state.truck_of(p) == t or not state.fits(p, t):
+                return None
+            return [state.move(p, t)]
+        q = rng.randrange(state.num_parcels())
+        tp = state.truck_of(p)
+        tq = state.truck_of(q)
+        if tp < 0 or tq < 0 or tp == tq or not state.fits_swap(p, q):
+            return None
+        return [state.move(p, tq), state.move(q, tp)]
+
+    def _write_back(self, parcels: List[Parcel], trucks: List[Truck],
+                    loads: List[List[Parcel]]) -> List[Parcel]:
+        """Pack <loads>[i] onto <trucks>[i] for every i, and return the
+        parcels in <parcels> that were not packed, in their original order.
+        """
+        packed = set()
+        for truck, load in zip(trucks, loads):
+            for parcel in load:
+                truck.pack(parcel)
+                packed.add(id(parcel))
+        return [parcel for parcel in parcels if id(parcel) not in packed]
+
+
+class _Move(NamedTuple):
+    """A parcel moved from one truck to another by a _SearchState.
+
+    The stop it left, and whether that stop was removed from the route, are
+    kept so that the move can be undone exactly.
+    """
+    parcel: int
+    source: int
+    target: int
+    stop: Optional[_Stop]
+    removed: bool
+
+
+class _Stop:
+    """A stop on a route in a _SearchState, where parcels are delivered to a
+    single city.
+
+    === Public Attributes ===
+    city: the id of the city
+    parcels: the indices of the parcels delivered at this stop
+    prev: the stop before this one
+    next: the stop after this one
+    """
+    __slots__ = ('city', 'parcels', 'prev', 'next')
+    city: int
+    parcels: List[int]
+    prev: Optional[_Stop]
+    next: Optional[_Stop]
+
+    def __init__(self, city: int) -> None:
+        """Initialize a stop at <city> with no parcels and no neighbours.
+        """
+        self.city = city
+        self.parcels = []
+        self.prev = None
+        self.next = None
+
+
+class _SearchState:
+    """A schedule being improved by local search, with its score kept up to
+    date as parcels move.
+
+    Each truck's route is a doubly-linked list of stops between two sentinel
+    stops at the depot, so a stop is added or removed in constant time.
+
+    === Private Attributes ===
+    _parcels: the parcels being scheduled, by index
+    _matrix: the distance between each pair of cities, by their ids in a
+      CityRegistry in which the depot has id 0
+    _city: the city id of the destination of each parcel
+    _capacity: the capacity of each truck, by index
+    _load: the total volume of the parcels on each truck
+    _heads: the sentinel stop at the start of each truck's route
+    _tails: the sentinel stop at the end of each truck's route
+    _stops: for each truck, maps each city id to the stops at that city
+    _truck: the index of the truck each parcel is on, or -1 if it is not
+      scheduled
+    _stop: the stop each scheduled parcel is delivered at
+    _unscheduled: the number of parcels that are not scheduled
+    _unused: the total unused space in non-empty trucks
+    _distance: the total distance travelled by non-empty trucks
+    _unscheduled_weight: the weight of each unscheduled parcel in the score
+
+    === Representation Invariants ===
+    - <_unscheduled>, <_unused> and <_distance> match the current routes and
+      loads.
+    - _UNUSED_SPACE_WEIGHT * <_unused> + _DISTANCE_WEIGHT * <_distance> <
+      <_unscheduled_weight>, for every schedule of the parcels.
+    """
+    _parcels: List[Parcel]
+    _matrix: List[List[int]]
+    _city: List[int]
+    _capacity: List[int]
+    _load: List[int]
+    _heads: List[_Stop]
+    _tails: List[_Stop]
+    _stops: List[Dict[int, List[_Stop]]]
+    _truck: List[int]
+    _stop: List[Optional[_Stop]]
+    _unscheduled: int
+    _unused: int
+    _distance: int
+    _unscheduled_weight: int
+
+    def __init__(self, parcels: List[Parcel], trucks: List[Truck],
+                 dmap: DistanceMap) -> None:
+        """Initialize the state from <trucks>, which hold some of <parcels>.
+
+        Precondition: all trucks in <trucks> have the same depot.
+        """
+        self._parcels = list(parcels)
+        index = {id(parcel): i for i, parcel in enumerate(parcels)}
+        cities = CityRegistry()
+        cities.id_of(trucks[0].depot)
+        self._city = [cities.id_of(parcel.destination) for parcel in parcels]
+        names = cities.names()
+        self._matrix = []
+        for city1 in names:
+            row = []
+            for city2 in names:
+                distance = dmap.distance(city1, city2)
+                if city1 == city2:
+                    distance = 0
+                elif distance < 0:
+                    distance = _MISSING_DISTANCE
+                row.append(distance)
+            self._matrix.append(row)
+
+        self._capacity = [truck.capacity for truck in trucks]
+        # Every route has at most one leg more than it has parcels, so no
+        # schedule has more unused space or distance than this.
+        longest = max(max(row) for row in self._matrix)
+        self._unscheduled_weight = (
+            _UNUSED_SPACE_WEIGHT * sum(self._capacity)
+            + _DISTANCE_WEIGHT * (len(parcels) + len(trucks)) * longest + 1)
+        self._load = [0] * len(trucks)
+        self._heads = []
+        self._tails = []
+        self._stops = []
+        self._truck = [-1] * len(parcels)
+        self._stop = [None] * len(parcels)
+        self._unscheduled = len(parcels)
+        self._unused = 0
+        self._distance = 0
+        for t, truck in enumerate(trucks):
+            head = _Stop(0)
+            tail = _Stop(0)
+            head.next = tail
+            tail.prev = head
+            self._heads.append(head)
+            self._tails.append(tail)
+            self._stops.append({})
+            for parcel in truck.parcels:
+                self._put(index[id(parcel)], t, True)
+
+    def num_parcels(self) -> int:
+        """Return the number of parcels being scheduled."""
+        return len(self._parcels)
+
+    def num_trucks(self) -> int:
+        """Return the number of trucks."""
+        return len(self._capacity)
+
+    def truck_of(self, p: int) -> int:
+        """Return the index of the truck parcel <p> is on, or -1."""
+        return self._truck[p]
+
+    def cost(self) -> int:
+        """Return the score of the current schedule; lower is better."""
+        return (self._unscheduled_weight * self._unscheduled
+                + _UNUSED_SPACE_WEIGHT * self._unused
+                + _DISTANCE_WEIGHT * self._distance)
+
+    def fits(self, p: int, t: int) -> bool:
+        """Return True iff parcel <p> fits in the space left on truck <t>."""
+        return self._load[t] + self._parcels[p].volume <= self._capacity[t]
+
+    def fits_swap(self, p: int, q: int) -> bool:
+        """Return True iff parcels <p> and <q>, which are on different
+        trucks, fit after trading places.
+        """
+        tp = self._truck[p]
+        tq = self._truck[q]
+        vp = self._parcels[p].volume
+        vq = self._parcels[q].volume
+        return (self._load[tp] - vp + vq <= self._capacity[tp]
+                and self._load[tq] - vq + vp <= self._capacity[tq])
+
+    def move(self, p: int, t: int) -> _Move:
+        """Move parcel <p> onto truck <t>, or leave it unscheduled if <t> is
+        -1, and return the move.
+        """
+        source = self._truck[p]
+        stop = self._stop[p]
+        removed = self._take(p)
+        self._put(p, t, False)
+        return _Move(p, source, t, stop, removed)
+
+    def undo(self, moves: List[_Move]) -> None:
+        """Undo <moves>, which are the most recent moves made, in order.
+        """
+        for move in reversed(moves):
+            self._take(move.parcel)
+            if move.source >= 0:
+                self._restore(move)
+
+    def loads(self) -> List[List[Parcel]]:
+        """Return, for each truck, its parcels in delivery order."""
+        result = []
+        for head in self._heads:
+            load = []
+            stop = head.next
+            while stop.next is not None:
+                load.extend(self._parcels[p] for p in stop.parcels)
+                stop = stop.next
+            result.append(load)
+        return result
+
+    def _unused_on(self, t: int) -> int:
+        """Return the unused space on truck <t>, or 0 if it is empty."""
+        if self._load[t] == 0:
+            return 0
+        return self._capacity[t] - self._load[t]
+
+    def _take(self, p: int) -> bool:
+        """Remove parcel <p> from its truck, if it is on one, and count it as
+        unscheduled.  Return True iff its stop was removed from the route.
+        """
+        t = self._truck[p]
+        if t < 0:
+            return False
+        removed = False
+        stop = self._stop[p]
+        before = self._unused_on(t)
+        stop.parcels.remove(p)
+        self._load[t] -= self._parcels[p].volume
+        if not stop.parcels:
+            m = self._matrix
+            prev = stop.prev.city
+            nxt = stop.next.city
+            self._distance += (m[prev][nxt] - m[prev][stop.city]
+                               - m[stop.city][nxt])
+            stop.prev.next = stop.next
+            stop.next.prev = stop.prev
+            self._stops[t][stop.city].remove(stop)
+            removed = True
+        self._unused += self._unused_on(t) - before
+        self._truck[p] = -1
+        self._stop[p] = None
+        self._unscheduled += 1
+        return removed
+
+    def _restore(self, move: _Move) -> None:
+        """Put the parcel of <move> back on the stop it left, and put that
+        stop back on the route if the move removed it.
+        """
+        p = move.parcel
+        t = move.source
+        stop = move.stop
+        if move.removed:
+            m = self._matrix
+            prev = stop.prev.city
+            nxt = stop.next.city
+            self._distance += (m[prev][stop.city] + m[stop.city][nxt]
+                               - m[prev][nxt])
+            stop.prev.next = stop
+            stop.next.prev = stop
+            self._stops[t][stop.city].append(stop)
+        self._join(p, t, stop)
+
+    def _put(self, p: int, t: int, at_end: bool) -> None:
+        """Deliver unscheduled parcel <p> with truck <t>, unless <t> is -1.
+
+        The parcel joins a stop at its destination, if the truck has one,
+        and otherwise a new stop is added at the end of the route.  If
+        <at_end> is True, it only joins the last stop.
+        """
+        if t < 0:
+            return
+        city = self._city[p]
+        stops = self._stops[t].setdefault(city, [])
+        tail = self._tails[t]
+        if stops and (not at_end or tail.prev is stops[-1]):
+            stop = stops[-1]
+        else:
+            stop = _Stop(city)
+            m = self._matrix
+            last = tail.prev.city
+            self._distance += (m[last][city] + m[city][tail.city]
+                               - m[last][tail.city])
+            stop.prev = tail.prev
+            stop.next = tail
+            tail.prev.next = stop
+            tail.prev = stop
+            stops.append(stop)
+        self._join(p, t, stop)
+
+    def _join(self, p: int, t: int, stop: _Stop) -> None:
+        """Deliver unscheduled parcel <p> at <stop>, on the route of truck
+        <t>.
+        """
+        before = self._unused_on(t)
+        stop.parcels.append(p)
+        self._load[t] += self._parcels[p].volume
+        self._unused += self._unused_on(t) - before
+        self._truck[p] = t
+        self._stop[p] = stop
+        self._unscheduled -= 1
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   '__future__', 'math', 'random', 'time',
+                                   'city_registry', 'distance_map', 'domain',
+                                   'scheduler'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
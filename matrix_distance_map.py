@@ -0,0 +1,246 @@
+"""Assignment 1 - Matrix distance map (No tasks)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class MatrixDistanceMap, a DistanceMap that stores
+its distances in a flat array, indexed by the ids of the cities in a
+CityRegistry, rather than in a dictionary keyed by pairs of names.
+
+It can be used wherever a DistanceMap is.  Its route_length turns the names
+on a route into ids once and then reads each leg straight from the matrix,
+and distances and route_length_by_id do the same for callers that already
+hold city ids.  Each leg is still looked up by a Python loop, one at a time.
+"""
+from array import array
+from typing import List, Optional, Sequence
+from city_registry import CityRegistry
+from distance_map import DistanceMap
+
+
+class MatrixDistanceMap(DistanceMap):
+    """A distance map that stores its distances in a matrix.
+
+    The distance from the city with id i to the city with id j is at index
+    i * _size + j of <_matrix>, or is -1 if it is not stored.  When a city
+    is added whose id does not fit, the matrix is copied into one twice as
+    wide, so adding n cities copies O(n ** 2) distances in total.
+
+    This is a subclass of DistanceMap.
+
+    === Private Attributes ===
+    _cities: the registry that gives the id of each city
+    _size: the number of rows, and of columns, in the matrix
+    _matrix: the distances, one row after another
+
+    === Representation Invariants ===
+    - len(_matrix) == _size * _size
+    - Every distance in <_matrix> is positive, or -1 if it is not stored.
+    """
+    _cities: CityRegistry
+    _size: int
+    _matrix: array
+
+    def __init__(self, cities: Optional[CityRegistry] = None) -> None:
+        """Initialize a distance map whose cities are registered in <cities>,
+        or in a new registry if <cities> is None.
+        """
+        DistanceMap.__init__(self)
+        self._cities = CityRegistry() if cities is None else cities
+        self._size = 0
+        self._matrix = array('i')
+
+    def add_distance(self, city1: str, city2: str, distance1: int,
+                     distance2: int = -1) -> None:
+        """ Record the distance between the first city <city1> and
+        the second city <city2>.
+        If distance2 == default value(-1), distance from <city2> to
+        <city1> is distance1, otherwise distance2.
+
+        >>> m = MatrixDistanceMap()
+        >>> m.add_distance('a', 'b', 3, 4)
+        >>> m.distance('a', 'b'), m.distance('b', 'a')
+        (3, 4)
+        """
+        i = self._cities.id_of(city1)
+        j = self._cities.id_of(city2)
+        if max(i, j) >= self._size:
+            self._grow(max(i, j) + 1)
+        size = self._size
+        if self._matrix[i * size + j] == -1:
+            self._matrix[i * size + j] = distance1
+            if distance2 == -1:  # if distance2 == distance1
+                self._matrix[j * size + i] = distance1
+            else:
+                self._matrix[j * size + i] = distance2
+
+    def _grow(self, size: int) -> None:
+        """Make the matrix at least <size> rows and columns wide, keeping the
+        distances in it.
+        """
+        new_size = max(size, 2 * self._size)
+        matrix = array('i', [-1]) * (new_size * new_size)
+        old_size = self._size
+        for i in range(old_size):
+            matrix[i * new_size:i * new_size + old_size] = \
+                self._matrix[i * old_size:(i + 1) * old_size]
+        self._size = new_size
+        self._matrix = matrix
+
+    def distance(self, city1: str, city2: str) -> int:
+        """ Return the distance from the first city <city1>
+        to the second <city2>. Return -1 if the distance is
+        not stored in the distance map.
+
+        >>> m = MatrixDistanceMap()
+        >>> m.add_distance('a', 'b', 3, 4)
+        >>> m.distance('a', 'b')
+        3
+        >>> m.distance('a', 'c')
+        -1
+        """
+        i = self._cities.find(city1)
+        j = self._cities.find(city2)
+        if i == -1 or j == -1 or i >= self._size or j >= self._size:
+            return -1
+        return self._matrix[i * self._size + j]
+
+    def ids(self, cities: Sequence[str]) -> List[int]:
+        """Return the id of each city in <cities>, or -1 for a city that is
+        not in the registry of this distance map, to look up with distances
+        or route_length_by_id.
+
+        >>> m = MatrixDistanceMap()
+        >>> m.add_distance('a', 'b', 3, 4)
+        >>> m.ids(['b', 'a', 'c'])
+        [1, 0, -1]
+        """
+        find = self._cities.find
+        return [find(city) for city in cities]
+
+    def cities(self) -> List[str]:
+        """Return the names of the cities that have a row in the matrix, in
+        order of id.
+
+        >>> m = MatrixDistanceMap()
+        >>> m.add_distance('a', 'b', 3, 4)
+        >>> m.cities()
+        ['a', 'b']
+        """
+        return self._cities.names()[:self._size]
+
+    def rows(self) -> List[List[int]]:
+        """Return the distances between the cities in self.cities(), as a list
+        of rows, where the entry at row i and column j is the distance from
+        the i-th city to the j-th, or -1 if it is not stored.
+
+        >>> m = MatrixDistanceMap()
+        >>> m.add_distance('a', 'b', 3, 4)
+        >>> m.rows()
+        [[-1, 3], [4, -1]]
+        """
+        size = self._size
+        count = len(self.cities())
+        return [self._matrix[i * size:i * size + count].tolist()
+                for i in range(count)]
+
+    def fill(self, cities: List[str], rows: List[List[int]]) -> None:
+        """Record, for each pair of different cities, the distance in <rows>
+        from the i-th city in <cities> to the j-th at row i and column j,
+        unless a distance between them is already stored or it is -1.
+
+        >>> m = MatrixDistanceMap()
+        >>> m.add_distance('a', 'b', 3)
+        >>> m.fill(['b', 'a', 'c'], [[0, 1, 2], [1, 0, 5], [-1, 6, 0]])
+        >>> m.rows()
+        [[-1, 3, 5], [3, -1, 2], [6, -1, -1]]
+        """
+        ids = [self._cities.id_of(city) for city in cities]
+        if ids and max(ids) >= self._size:
+            self._grow(max(ids) + 1)
+        matrix = self._matrix
+        size = self._size
+        for i, row in zip(ids, rows):
+            for j, distance in zip(ids, row):
+                if i != j and distance != -1 and matrix[i * size + j] == -1:
+                    matrix[i * size + j] = distance
+
+    def distances(self, src_ids: Sequence[int], dst_ids: Sequence[int]) \
+            -> List[int]:
+        """Return the distance from the city with id src_ids[k] to the city
+        with id dst_ids[k], for each index k, or -1 where it is not stored.
+        An id of -1 stands for a city with no distances.
+
+        Precondition: len(src_ids) == len(dst_ids), and every id is -1 or was
+        given by the registry of this distance map.
+
+        >>> cities = CityRegistry()
+        >>> m = MatrixDistanceMap(cities)
+        >>> m.add_distance('a', 'b', 3, 4)
+        >>> a, b = cities.id_of('a'), cities.id_of('b')
+        >>> m.distances([a, b, a, -1], [b, a, a, b])
+        [3, 4, -1, -1]
+        """
+        matrix = self._matrix
+        size = self._size
+        return [matrix[i * size + j] if 0 <= i < size and 0 <= j < size
+                else -1 for i, j in zip(src_ids, dst_ids)]
+
+    def route_length(self, routes: List[str]) -> int:
+        """ Return the distance of a route that visits the cities in
+        <routes> in order and then returns to the first one, adding -1 for
+        each leg whose distance is not stored.
+
+        Precondition: <routes> is not empty.
+
+        >>> m = MatrixDistanceMap()
+        >>> m.add_distance('Toronto', 'Ajax', 5, 6)
+        >>> m.route_length(['Toronto', 'Ajax'])
+        11
+        """
+        return self.route_length_by_id(self.ids(routes))
+
+    def route_length_by_id(self, route_ids: Sequence[int]) -> int:
+        """Return the distance of a route that visits the cities with the ids
+        in <route_ids> in order and then returns to the first one, adding -1
+        for each leg whose distance is not stored.
+
+        Precondition: <route_ids> is not empty, and every id in it is -1 or
+        was given by the registry of this distance map.
+
+        >>> cities = CityRegistry()
+        >>> m = MatrixDistanceMap(cities)
+        >>> m.add_distance('Toronto', 'Ajax', 5, 6)
+        >>> m.route_length_by_id([cities.id_of('Toronto'),
+        ...                       cities.id_of('Ajax')])
+        11
+        """
+        legs = self.distances(route_ids,
+                              list(route_ids[1:]) + [route_ids[0]])
+        return sum(legs)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing', 'array',
+                                   'city_registry', 'distance_map'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,118 @@
+"""Assignment 1 - Memory used by parcels (No tasks)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module measures how many bytes each parcel takes up when it is stored
+as an object with an instance dictionary, as Parcel used to be, as a Parcel
+with slots, and as a row of a ParcelTable.  The parcels have random volumes
+and go between a small number of cities, as in the parcel files.
+
+You have no tasks associated with this module.
+"""
+from typing import Any, Callable, List
+import random
+import tracemalloc
+from domain import Parcel, ParcelTable
+
+# The names of the cities the parcels go between.
+CITIES = ['Toronto', 'Hamilton', 'London', 'Windsor', 'Kingston', 'Ottawa',
+          'Montreal', 'Quebec City', 'Sudbury', 'Barrie']
+
+
+class _DictParcel:
+    """A parcel stored the way Parcel was before it had slots, with an
+    instance dictionary.
+
+    === Public Attributes ===
+    id: the id of the parcel.
+    volume: the volume of the parcel.
+    source: the name of the city the parcel came from.
+    destination: the name of the city where it must be delivered to.
+    """
+    id: int
+    volume: int
+    source: str
+    destination: str
+
+    def __init__(self, id_: int, volume: int, source: str, destination: str) \
+            -> None:
+        """Initialize a parcel.
+        """
+        self.id = id_
+        self.volume = volume
+        self.source = source
+        self.destination = destination
+
+
+def _make_list(kind: type, count: int) -> List[Any]:
+    """Return a list of <count> random parcels of class <kind>.
+    """
+    rng = random.Random(count)
+    return [kind(i, rng.randint(1, 100), rng.choice(CITIES),
+                 rng.choice(CITIES)) for i in range(count)]
+
+
+def _make_table(count: int) -> ParcelTable:
+    """Return a ParcelTable of <count> random parcels.
+    """
+    rng = random.Random(count)
+    table = ParcelTable()
+    for i in range(count):
+        table.add(i, rng.randint(1, 100), rng.choice(CITIES),
+                  rng.choice(CITIES))
+    return table
+
+
+def bytes_per_parcel(make: Callable[[int], Any], count: int) -> float:
+    """Return the number of bytes allocated, per parcel, by <make>(<count>),
+    which stores <count> parcels.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        parcels = make(count)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del parcels
+    return (after - before) / count
+
+
+def compare_parcel_memory(count: int) -> None:
+    """Print the number of bytes per parcel used to store <count> parcels in
+    each of the ways parcels can be stored.
+    """
+    with_dict = bytes_per_parcel(lambda n: _make_list(_DictParcel, n), count)
+    with_slots = bytes_per_parcel(lambda n: _make_list(Parcel, n), count)
+    in_table = bytes_per_parcel(_make_table, count)
+    print(f'Bytes per parcel, for {count} parcels')
+    print(f'  with __dict__: {with_dict:.1f}')
+    print(f'  with __slots__: {with_slots:.1f}')
+    print(f'  in a ParcelTable: {in_table:.1f}')
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['compare_parcel_memory'],
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'random', 'tracemalloc', 'domain'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    compare_parcel_memory(100000)
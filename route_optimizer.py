@@ -0,0 +1,260 @@
+"""Assignment 1 - Route optimization (No tasks)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module improves the routes of scheduled trucks.  A scheduler records
+each truck's stops in the order its parcels were packed, which is rarely a
+short route.  Once scheduling is done, optimize_routes reorders the stops of
+every truck using 2-opt and Or-opt moves.  The depot stays first on each
+route, and each truck still returns to the depot at the end.
+
+All of the cities on the routes are numbered, and distances are looked up in
+a precomputed matrix.  Each move is scored in constant time from the legs it
+adds and removes, and trucks are optimized in parallel worker processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+from city_registry import CityRegistry
+from distance_map import DistanceMap
+from domain import Fleet
+
+# The distance used for pairs of cities that are not in the distance map, so
+# that no move ever introduces such a leg.
+_MISSING = float('inf')
+
+# The longest run of consecutive stops that an Or-opt move relocates.
+_MAX_SEGMENT = 3
+
+# The distance matrix used by each worker process.  It is set once per worker
+# by _init_worker, so the matrix is not sent again with each truck.
+_worker_matrix = None
+
+
+def optimize_routes(fleet: Fleet, dmap: DistanceMap,
+                    workers: Optional[int] = None) -> None:
+    """Reorder the stops on the route of every non-empty truck in <fleet> to
+    shorten the distance it travels, according to <dmap>.
+
+    Each city is visited once, in an order improved by 2-opt and Or-opt
+    moves until no move shortens the route.  A route is only replaced if the
+    new one is shorter.  Routes are optimized in a pool of <workers>
+    processes; if <workers> is None, use one process per CPU, and if it is 1,
+    optimize them in this process.
+
+    >>> from domain import Truck, Parcel
+    >>> m = DistanceMap()
+    >>> m.add_distance('T', 'A', 1)
+    >>> m.add_distance('T', 'B', 5)
+    >>> m.add_distance('T', 'C', 1)
+    >>> m.add_distance('A', 'B', 4)
+    >>> m.add_distance('A', 'C', 9)
+    >>> m.add_distance('B', 'C', 4)
+    >>> t = Truck(1, 10, 'T')
+    >>> for i, city in enumerate(['A', 'C', 'B', 'A']):
+    ...     t.pack(Parcel(i, 1, 'T', city))
+    True
+    True
+    True
+    True
+    >>> f = Fleet()
+    >>> f.add_truck(t)
+    >>> f.total_distance_travelled(m)
+    19
+    >>> optimize_routes(f, m)
+    >>> t.routes
+    ['T', 'A', 'B', 'C']
+    >>> f.total_distance_travelled(m)
+    10
+    """
+    cities = CityRegistry()
+    trucks = [truck for truck in fleet.trucks if len(truck.routes) > 2]
+    tours = [[cities.id_of(city) for city in truck.routes]
+             for truck in trucks]
+    matrix = _distance_matrix(cities.names(), dmap)
+    if workers == 1 or len(tours) <= 1:
+        _init_worker(matrix)
+        results = [_optimize_tour(tour) for tour in tours]
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(matrix,)) as pool:
+            results = list(pool.map(_optimize_tour, tours, chunksize=16))
+    for truck, result in zip(trucks, results):
+        if result is not None:
+            truck.set_route([cities.name_of(city) for city in result])
+
+
+def _distance_matrix(cities: List[str], dmap: DistanceMap) \
+        -> List[List[float]]:
+    """Return the matrix of distances between <cities>, where the entry at
+    row i and column j is the distance from cities[i] to cities[j].
+
+    >>> m = DistanceMap()
+    >>> m.add_distance('a', 'b', 3, 4)
+    >>> _distance_matrix(['a', 'b', 'c'], m)
+    [[0, 3, inf], [4, 0, inf], [inf, inf, 0]]
+    """
+    matrix = []
+    for i, city1 in enumerate(cities):
+        row = []
+        for j, city2 in enumerate(cities):
+            distance = dmap.distance(city1, city2)
+            if i == j:
+                row.append(0)
+            elif distance < 0:
+                row.append(_MISSING)
+            else:
+                row.append(distance)
+        matrix.append(row)
+    return matrix
+
+
+def _init_worker(matrix: List[List[float]]) -> None:
+    """Remember <matrix> as the distance matrix this process uses.
+    """
+    global _worker_matrix
+    _worker_matrix = matrix
+
+
+def _tour_length(tour: List[int], matrix: List[List[float]]) -> float:
+    """Return the length of the closed <tour>, which returns from its last
+    city to its first, according to <matrix>.
+    """
+    total = matrix[tour[-1]][tour[0]]
+    for i in range(len(tour) - 1):
+        total += matrix[tour[i]][tour[i + 1]]
+    return total
+
+
+def _optimize_tour(tour: List[int]) -> Optional[List[int]]:
+    """Return an improved order for the closed <tour>, which starts at the
+    depot, or None if no shorter tour was found.
+
+    Uses the distance matrix set by _init_worker.
+    """
+    matrix = _worker_matrix
+    stops = []
+    seen = {tour[0]}
+    for city in tour[1:]:
+        if city not in seen:
+            seen.add(city)
+            stops.append(city)
+    # both ends are the depot, so every move keeps it first and last
+    path = [tour[0]] + stops + [tour[0]]
+    improved = True
+    while improved:
+        improved = _two_opt(path, matrix) or _or_opt(path, matrix)
+    result = path[:-1]
+    if _tour_length(result, matrix) < _tour_length(tour, matrix):
+        return result
+    return None
+
+
+def _two_opt(path: List[int], matrix: List[List[float]]) -> bool:
+    """Apply the first 2-opt move that shortens <path>, reversing the stops
+    from path[i] to path[j], and return True.  Return False if there is no
+    such move.
+
+    Distances may differ by direction, so reversing a run of stops also
+    changes the length of the legs inside it.  Prefix sums of the leg
+    lengths in each direction give that change in constant time.
+
+    Precondition: the first and last cities of <path> are the depot.
+
+    >>> matrix = [[0, 1, 5, 1], [1, 0, 4, 9], [5, 4, 0, 4], [1, 9, 4, 0]]
+    >>> path = [0, 1, 3, 2, 0]
+    >>> _two_opt(path, matrix)
+    True
+    >>> path
+    [0, 1, 2, 3, 0]
+    """
+    n = len(path)
+    forward = [0] * n
+    backward = [0] * n
+    for k in range(1, n):
+        forward[k] = forward[k - 1] + matrix[path[k - 1]][path[k]]
+        backward[k] = backward[k - 1] + matrix[path[k]][path[k - 1]]
+    for i in range(1, n - 2):
+        before = path[i - 1]
+        first = path[i]
+        for j in range(i + 1, n - 1):
+            last = path[j]
+            after = path[j + 1]
+            removed = (matrix[before][first] + (forward[j] - forward[i])
+                       + matrix[last][after])
+            added = (matrix[before][last] + (backward[j] - backward[i])
+                     + matrix[first][after])
+            if added < removed:
+                path[i:j + 1] = path[i:j + 1][::-1]
+                return True
+    return False
+
+
+def _or_opt(path: List[int], matrix: List[List[float]]) -> bool:
+    """Apply the first Or-opt move that shortens <path>, moving a run of up
+    to _MAX_SEGMENT consecutive stops, in the same direction, to between two
+    other consecutive cities, and return True.  Return False if there is no
+    such move.
+
+    Precondition: the first and last cities of <path> are the depot.
+
+    >>> matrix = [[0, 1, 5, 1], [1, 0, 4, 9], [5, 4, 0, 4], [1, 9, 4, 0]]
+    >>> path = [0, 2, 1, 3, 0]
+    >>> _or_opt(path, matrix)
+    True
+    >>> path
+    [0, 1, 2, 3, 0]
+    """
+    n = len(path)
+    for size in range(1, _MAX_SEGMENT + 1):
+        for i in range(1, n - size):
+            j = i + size - 1
+            before = path[i - 1]
+            after = path[j + 1]
+            first = path[i]
+            last = path[j]
+            gain = (matrix[before][first] + matrix[last][after]
+                    - matrix[before][after])
+            for k in range(n - 1):
+                if i - 1 <= k <= j:
+                    continue
+                x = path[k]
+                y = path[k + 1]
+                cost = matrix[x][first] + matrix[last][y] - matrix[x][y]
+                if cost < gain:
+                    segment = path[i:j + 1]
+                    if k < i:
+                        path[k + 1:j + 1] = segment + path[k + 1:i]
+                    else:
+                        path[i:k + 1] = path[j + 1:k + 1] + segment
+                    return True
+    return False
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'concurrent.futures', 'city_registry',
+                                   'distance_map', 'domain'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
@@ -19,12 +19,20 @@ Sophia Huynh, Maryam Majedi, and Jaisie Sin.
 
 This module contains the abstract Scheduler class, as well as the two
 subclasses RandomScheduler and GreedyScheduler, which implement the two
-scheduling algorithms described in the handout.
+scheduling algorithms described in the handout.  FirstFitScheduler and
+BestFitScheduler are classic bin-packing schedulers that ignore routes, and
+SavingsScheduler builds short routes with the Clarke-Wright savings
+algorithm.
 """
-from typing import List, Dict, Union, Callable
-from random import shuffle, choice
+from typing import Any, List, Dict, Iterable, Iterator, Optional, Union, \
+    Callable, Tuple
+from random import Random
+from bisect import bisect_left
+import heapq
 from container import PriorityQueue
+from distance_map import DistanceMap
 from domain import Parcel, Truck
+from truck_index import TruckIndex, CapacityTree
 
 
 class Scheduler:
@@ -56,13 +64,158 @@ class Scheduler:
         """
         raise NotImplementedError
 
+    def schedule_stream(self, parcels: Iterable[Parcel], trucks: List[Truck],
+                        window: int = 1) \
+            -> Iterator[Tuple[Parcel, Optional[Truck]]]:
+        """Schedule the parcels produced by <parcels> onto the given <trucks>
+        as they arrive, and yield a (parcel, truck) pair as each decision is
+        made.  The truck is None if the parcel could not be scheduled.
+
+        Schedulers that consider parcels in a fixed order hold up to <window>
+        arriving parcels in a look-ahead buffer, and each time the buffer is
+        full, schedule the parcel that would be considered first among them.
+        The remaining parcels are scheduled once <parcels> is exhausted.
+        Other schedulers, like RandomScheduler, schedule each parcel as soon
+        as it arrives.  Either way, at most <window> parcels are held at once,
+        no matter how many parcels arrive.
+
+        Mutate the Truck objects in <trucks> as schedule does.
+
+        Precondition: window >= 1
+
+        >>> t = Truck(1, 10, 'York')
+        >>> scheduler = GreedyScheduler({'parcel_priority': 'volume',
+        ...                              'parcel_order': 'non-increasing',
+        ...                              'truck_order': 'non-increasing'})
+        >>> arrivals = iter([Parcel(1, 3, 'York', 'Ajax'),
+        ...                  Parcel(2, 8, 'York', 'Ajax')])
+        >>> [(p.id, truck is t) for p, truck in
+        ...  scheduler.schedule_stream(arrivals, [t], window=2)]
+        [(2, True), (1, False)]
+        """
+        order = self._stream_order()
+        self._start(trucks)
+        try:
+            if order is None:
+                for parcel in parcels:
+                    yield parcel, self._place(parcel)
+                return
+            buffer = PriorityQueue(key=order[0], reverse=order[1])
+            size = 0
+            for parcel in parcels:
+                buffer.add(parcel)
+                size += 1
+                if size >= window:
+                    size -= 1
+                    parcel = buffer.remove()
+                    yield parcel, self._place(parcel)
+            while not buffer.is_empty():
+                parcel = buffer.remove()
+                yield parcel, self._place(parcel)
+        finally:
+            self._finish()
+
+    def _stream_order(self) -> Optional[Tuple[Callable[[Parcel], Any], bool]]:
+        """Return the key function this scheduler orders parcels by, and
+        whether larger keys come first, or None if it schedules parcels in
+        arrival order.
+        """
+        return None
+
+    def _start(self, trucks: List[Truck]) -> None:
+        """Prepare to schedule parcels onto <trucks>.
+        """
+        raise NotImplementedError
+
+    def _choose(self, parcel: Parcel) -> Optional[Truck]:
+        """Return the truck to pack <parcel> onto, or None if it cannot be
+        scheduled.
+
+        Precondition: _start has been called, and _finish has not been called
+        since.
+        """
+        raise NotImplementedError
+
+    def _finish(self) -> None:
+        """Release anything that was set up by _start.
+        """
+        raise NotImplementedError
+
+    def _place(self, parcel: Parcel) -> Optional[Truck]:
+        """Pack <parcel> onto the truck chosen for it and return that truck,
+        or return None if it cannot be scheduled.  If the chosen truck turns
+        out not to have room for <parcel>, it is not scheduled either, so
+        that it is reported rather than lost.
+
+        Precondition: _start has been called, and _finish has not been called
+        since.
+        """
+        truck = self._choose(parcel)
+        if truck is None or not truck.pack(parcel):
+            return None
+        return truck
+
+    def _schedule_in_order(self, parcels: Iterable[Parcel],
+                           trucks: List[Truck],
+                           verbose: bool) -> List[Parcel]:
+        """Schedule <parcels> onto <trucks> in the order <parcels> produces
+        them, and return the parcels that could not be scheduled.
+
+        This is a helper method for schedule.
+        """
+        if verbose:
+            print('--------------START----------------')
+        result = []
+        self._start(trucks)
+        for parcel in parcels:
+            if verbose:
+                print('Chosen parcel:', parcel)
+            truck = self._place(parcel)
+            if truck is not None:
+                if verbose:
+                    print('The truck the parcel is being packed:', truck)
+                    print('---------------------------------------------')
+            else:
+                result.append(parcel)
+                if verbose:
+                    print('Parcel cannot be packed.')
+                    print('---------------------------------------------')
+        self._finish()
+        return result
+
 
 class RandomScheduler(Scheduler):
     """The class representation of a random scheduler, which will go through the
     parcels in random order schedule each parcel onto a randomly chosen truck.
 
     This is a subclass of Scheduler.
+
+    === Private Attributes ===
+    _rng: the random number generator this scheduler draws from
+    _tree: the capacity-query engine over the trucks being scheduled onto,
+    while a schedule is running, and None otherwise
     """
+    _rng: Random
+    _tree: Optional[CapacityTree]
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        """Initialize a random scheduler with its own random number
+        generator.  Two schedulers with the same <seed> make the same
+        choices; if <seed> is None, the generator is seeded by the system.
+
+        >>> t1, t2 = Truck(1, 10, 'York'), Truck(2, 10, 'York')
+        >>> parcels = [Parcel(i, 1, 'York', 'Ajax') for i in range(10)]
+        >>> RandomScheduler(148).schedule(parcels, [t1, t2])
+        []
+        >>> t3, t4 = Truck(1, 10, 'York'), Truck(2, 10, 'York')
+        >>> RandomScheduler(148).schedule(parcels, [t3, t4])
+        []
+        >>> t1.parcels == t3.parcels and t2.parcels == t4.parcels
+        True
+        """
+        self._rng = Random(seed)
+        self._tree = None
+
     def schedule(self, parcels: List[Parcel], trucks: List[Truck],
                  verbose: bool = False) -> List[Parcel]:
 
@@ -86,41 +239,26 @@ class RandomScheduler(Scheduler):
         information is your choice; we will not test your code with <verbose>
         set to True.
         """
-        result = []
         parcels_copy = parcels[:]
-        shuffle(parcels_copy)
-        for parcel in parcels_copy:
-            t = choice(trucks)
-            n = 0
-            while parcel.volume > t.available_space and n <= len(trucks):
-                n += 1
-                t = choice(trucks)
-            if n <= len(trucks):
-                t.pack(parcel)
-            else:
-                result.append(parcel)
-        return result
+        self._rng.shuffle(parcels_copy)
+        return self._schedule_in_order(parcels_copy, trucks, verbose)
 
+    def _start(self, trucks: List[Truck]) -> None:
+        """Build the capacity-query engine over <trucks>.
+        """
+        self._tree = CapacityTree(trucks)
 
-def _get_eligible_trucks(trucks: List[Truck], parcel: Parcel) -> List[Truck]:
-    """Return a list of trucks that is eligible to pack the parcel.
+    def _choose(self, parcel: Parcel) -> Optional[Truck]:
+        """Return a truck chosen uniformly at random from the trucks with
+        enough available space for <parcel>, or None if there are none.
+        """
+        return self._tree.sample_fit(parcel.volume, self._rng.randrange)
 
-    This is a helper method for schedule.
-    """
-    eligible_trucks = []  # set a list of all eligible trucks
-    destination_trucks = []
-    # find trucks with enough unused volume for the parcel
-    # record it into the eligible list
-    for truck in trucks:
-        if parcel.volume <= truck.available_space:
-            eligible_trucks.append(truck)
-    # find trucks with same destination as parcel from the eligible list
-    for truck in eligible_trucks:
-        if parcel.destination == truck.routes[-1]:
-            destination_trucks.append(truck)
-    if destination_trucks:
-        eligible_trucks = destination_trucks
-    return eligible_trucks
+    def _finish(self) -> None:
+        """Close and discard the capacity-query engine.
+        """
+        self._tree.close()
+        self._tree = None
 
 
 class GreedyScheduler(Scheduler):
@@ -134,6 +272,9 @@ class GreedyScheduler(Scheduler):
     _parcel_priority: a string contains the priority to proceed parcels
     _parcel_order: a string contains the order to proceed parcels
     _truck_order: a string contains the order to proceed trucks
+    _index: the index over the trucks last scheduled onto, kept for late
+    parcels until close is called, or None if there is none.  While it
+    exists it observes every one of those trucks.
 
     === Representation Invariants ===
     _parcel_priority can only be 'volume' or 'destination'
@@ -143,6 +284,7 @@ class GreedyScheduler(Scheduler):
     _parcel_priority: str
     _parcel_order: str
     _truck_order: str
+    _index: Optional[TruckIndex]
 
     def __init__(self, config: Dict[str, Union[str, bool]]) -> None:
         """Initialize a greedy scheduler
@@ -150,28 +292,19 @@ class GreedyScheduler(Scheduler):
         self._parcel_priority = config['parcel_priority']
         self._parcel_order = config['parcel_order']
         self._truck_order = config['truck_order']
+        self._index = None
 
-    def _get_parcel_order(self) -> Callable[[Parcel, Parcel], bool]:
-        """Return the corresponding function of parcel order.
+    def _get_parcel_key(self) -> Tuple[Callable[[Parcel], Any], bool]:
+        """Return the key function that orders parcels, and whether larger
+        keys come first.
 
         This is a helper method
         """
         if self._parcel_priority == 'destination':
-            if self._parcel_order == 'non-decreasing':
-                return _destination_non_decreasing
-            return _destination_non_increasing
-        if self._parcel_order == 'non-decreasing':
-            return _volume_non_decreasing
-        return _volume_non_increasing
-
-    def _get_truck_order(self) -> Callable[[Truck, Truck], bool]:
-        """Return the corresponding function of truck order.
-
-        This is a helper method.
-        """
-        if self._truck_order == 'non-decreasing':
-            return _least_available
-        return _most_available
+            key = _parcel_destination
+        else:
+            key = _parcel_volume
+        return key, self._parcel_order == 'non-increasing'
 
     def schedule(self, parcels: List[Parcel], trucks: List[Truck],
                  verbose: bool = False) -> List[Parcel]:
@@ -197,78 +330,401 @@ class GreedyScheduler(Scheduler):
         set to True.
 
         """
-        if verbose:
-            print('--------------START----------------')
+        # load all parcels into the parcel priority queue at once
+        key, reverse = self._get_parcel_key()
+        ordered_parcel = PriorityQueue.from_iterable(parcels, key=key,
+                                                     reverse=reverse)
+        return self._schedule_in_order(_drain(ordered_parcel), trucks,
+                                       verbose)
+
+    def schedule_incremental(self, parcels: List[Parcel], trucks: List[Truck],
+                             verbose: bool = False) -> List[Parcel]:
+        """Schedule the late-arriving <parcels> onto <trucks>, which may
+        already have parcels and routes from an earlier schedule, and return
+        a list containing the parcels that did not get scheduled onto any
+        truck.
+
+        The new parcels are ordered and placed by the greedy algorithm, taking
+        the current available space and route of each truck into account.
+        The index over <trucks> built by schedule, or by the first call to
+        this method, is kept open, observing every truck, and is reused by
+        later calls with the same list, so each of them costs time in the
+        number of new parcels rather than the number of trucks.  Call close
+        once no more late parcels are expected; scheduling onto other trucks
+        also closes it.
+
+        Mutate the Truck objects in <trucks> as schedule does.
+
+        >>> config = {'parcel_priority': 'volume',
+        ...           'parcel_order': 'non-increasing',
+        ...           'truck_order': 'non-increasing'}
+        >>> scheduler = GreedyScheduler(config)
+        >>> trucks = [Truck(1, 10, 'York'), Truck(2, 10, 'York')]
+        >>> scheduler.schedule([Parcel(1, 6, 'York', 'Ajax')], trucks)
+        []
+        >>> late = [Parcel(2, 3, 'York', 'Ajax'), Parcel(3, 8, 'York', 'Ajax')]
+        >>> scheduler.schedule_incremental(late, trucks)
+        []
+        >>> [[p.id for p in truck.parcels] for truck in trucks]
+        [[1, 2], [3]]
+        >>> scheduler.close()
+        """
+        self._open(trucks)
+        key, reverse = self._get_parcel_key()
+        ordered_parcel = PriorityQueue.from_iterable(parcels, key=key,
+                                                     reverse=reverse)
         result = []
-        parcels_copy = parcels[:]  # make a copy of the parcels
-        ordered_parcel = PriorityQueue(self._get_parcel_order())
-        # add the item from copied parcels to the parcel priority queue
-        for parcel in parcels_copy:
-            ordered_parcel.add(parcel)
-        while not ordered_parcel.is_empty():
-            parcel = ordered_parcel.remove()
-            if verbose:
-                print('Chosen parcel:', parcel)
-            # use the helper function below to get a list of eligible trucks
-            eligible_trucks = _get_eligible_trucks(trucks, parcel)
-            # add the item from copied parcels to the truck priority queue
-            ordered_truck = PriorityQueue(self._get_truck_order())
-            for truck in eligible_trucks:
-                ordered_truck.add(truck)
-            if not ordered_truck.is_empty():
-                truck = ordered_truck.remove()
-                if verbose:
-                    print('The truck the parcel is being packed:', truck)
-                    print('---------------------------------------------')
-                truck.pack(parcel)
-            else:
+        for parcel in _drain(ordered_parcel):
+            truck = self._place(parcel)
+            if truck is None:
                 result.append(parcel)
-                if verbose:
-                    print('Parcel cannot be packed.')
-                    print('---------------------------------------------')
+            if verbose:
+                print('Late parcel:', parcel, '->', truck)
         return result
 
+    def close(self) -> None:
+        """Stop observing the trucks that the last schedule or
+        schedule_incremental kept an index over, if any.  A later
+        schedule_incremental builds a new index.
+
+        >>> config = {'parcel_priority': 'volume',
+        ...           'parcel_order': 'non-increasing',
+        ...           'truck_order': 'non-increasing'}
+        >>> scheduler = GreedyScheduler(config)
+        >>> trucks = [Truck(1, 10, 'York')]
+        >>> scheduler.schedule_incremental([Parcel(1, 6, 'York', 'Ajax')],
+        ...                                trucks)
+        []
+        >>> scheduler.close()
+        >>> trucks[0]._observers
+        []
+        """
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+    def _open(self, trucks: List[Truck]) -> None:
+        """Make sure the index is over <trucks>, reusing the existing index if
+        possible.  One index serves every parcel, and keeps itself up to date
+        as trucks are packed.
+        """
+        if self._index is not None and self._index.is_over(trucks):
+            return
+        self.close()
+        self._index = TruckIndex(trucks)
+
+    def _stream_order(self) -> Optional[Tuple[Callable[[Parcel], Any], bool]]:
+        """Return the key function that orders parcels, and whether larger
+        keys come first.
+        """
+        return self._get_parcel_key()
+
+    def _start(self, trucks: List[Truck]) -> None:
+        """Make sure the index is over <trucks>, reusing the index kept by
+        an earlier call if it is.
+        """
+        self._open(trucks)
+
+    def _choose(self, parcel: Parcel) -> Optional[Truck]:
+        """Return the eligible truck for <parcel> chosen according to the
+        truck order, or None if there is no eligible truck.
+        """
+        return self._index.choose(parcel,
+                                  self._truck_order == 'non-increasing')
+
+    def _finish(self) -> None:
+        """Keep the index open, so that schedule_incremental can reuse it for
+        late parcels.  It is released by close.
+        """
+
+
+class _FitScheduler(Scheduler):
+    """A bin-packing scheduler, which considers parcels from largest to
+    smallest volume and packs each onto a truck chosen by capacity alone,
+    regardless of its route.
 
-def _volume_non_decreasing(parcel1: Parcel, parcel2: Parcel) -> bool:
-    """The priority function that puts the parcels by volume
-    with non-decreasing order.
+    This is an abstract class.  Only child classes should be instantiated.
+
+    === Private Attributes ===
+    _tree: the capacity-query engine over the trucks being scheduled onto,
+    while a schedule is running, and None otherwise
     """
-    return parcel2.volume > parcel1.volume
+    _tree: Optional[CapacityTree]
 
+    def __init__(self) -> None:
+        """Initialize a bin-packing scheduler.
+        """
+        self._tree = None
 
-def _volume_non_increasing(parcel1: Parcel, parcel2: Parcel) -> bool:
-    """The priority function that puts the parcels by volume
-    with non-increasing order.
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the given <parcels> onto the given <trucks>, that is, decide
+        which parcels will go on which trucks, as well as the route each truck
+        will take.
+
+        This is a method that overrides the superclass Scheduler's method.
+
+        Parcels are considered in non-increasing order of volume, with ties
+        broken by their order in <parcels>.
+
+        Mutate the Truck objects in <trucks> so that they store information
+        about which parcel objects they will deliver and what route they will
+        take.  Do *not* mutate the list <parcels>, or any of the parcel objects
+        in that list.
+
+        Return a list containing the parcels that did not get scheduled onto any
+        truck, due to lack of capacity.
+
+        If <verbose> is True, print step-by-step details regarding
+        the scheduling algorithm as it runs.
+        """
+        return self._schedule_in_order(
+            sorted(parcels, key=_parcel_volume, reverse=True), trucks, verbose)
+
+    def _stream_order(self) -> Optional[Tuple[Callable[[Parcel], Any], bool]]:
+        """Return the key function that orders parcels by volume, largest
+        first.
+        """
+        return _parcel_volume, True
+
+    def _start(self, trucks: List[Truck]) -> None:
+        """Build the capacity-query engine over <trucks>.
+        """
+        self._tree = CapacityTree(trucks)
+
+    def _finish(self) -> None:
+        """Close and discard the capacity-query engine.
+        """
+        self._tree.close()
+        self._tree = None
+
+
+class FirstFitScheduler(_FitScheduler):
+    """The class representation of a first-fit decreasing scheduler, which
+    packs each parcel, from largest to smallest, onto the first truck with
+    enough available space.
+
+    This is a subclass of Scheduler.
+    """
+
+    def _choose(self, parcel: Parcel) -> Optional[Truck]:
+        """Return the first truck with enough available space for <parcel>,
+        or None if there is none.
+        """
+        return self._tree.first_fit(parcel.volume)
+
+
+class BestFitScheduler(_FitScheduler):
+    """The class representation of a best-fit decreasing scheduler, which
+    packs each parcel, from largest to smallest, onto the truck that it fills
+    most tightly.
+
+    This is a subclass of Scheduler.
+    """
+
+    def _choose(self, parcel: Parcel) -> Optional[Truck]:
+        """Return the truck with the least available space that is enough
+        for <parcel>, or None if there is none.
+        """
+        return self._tree.best_fit(parcel.volume)
+
+
+class SavingsScheduler(BestFitScheduler):
+    """The class representation of a savings scheduler, which builds routes
+    with the Clarke-Wright savings algorithm and then packs each route onto a
+    single truck.
+
+    Parcels are grouped by destination, and each destination starts as its
+    own route from the depot and back.  Joining the route that ends at city
+    i to the route that starts at city j saves
+    distance(i, depot) + distance(depot, j) - distance(i, j).  Candidate joins
+    are kept in a heap and tried from the largest saving down; two routes are
+    joined if they are different routes, found with union-find, and their
+    total volume fits in the largest truck.
+
+    Routes are then packed onto trucks from the largest volume down, each
+    onto the empty truck with the least available space that holds it all,
+    or if there is none, onto any such truck.  The parcels of a route that no
+    truck can hold whole are packed one at a time by best fit.
+
+    This is a subclass of BestFitScheduler; when parcels are streamed, they
+    are packed by best fit.
+
+    === Private Attributes ===
+    _dmap: the distances between cities
+    """
+    _dmap: DistanceMap
+
+    def __init__(self, dmap: DistanceMap) -> None:
+        """Initialize a savings scheduler that uses the distances in <dmap>.
+        """
+        BestFitScheduler.__init__(self)
+        self._dmap = dmap
+
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the given <parcels> onto the given <trucks>, that is, decide
+        which parcels will go on which trucks, as well as the route each truck
+        will take.
+
+        This is a method that overrides the superclass Scheduler's method.
+
+        Mutate the Truck objects in <trucks> so that they store information
+        about which parcel objects they will deliver and what route they will
+        take.  Do *not* mutate the list <parcels>, or any of the parcel objects
+        in that list.
+
+        Return a list containing the parcels that did not get scheduled onto any
+        truck, due to lack of capacity.
+
+        If <verbose> is True, print step-by-step details regarding
+        the scheduling algorithm as it runs.
+
+        >>> from distance_map import DistanceMap
+        >>> m = DistanceMap()
+        >>> m.add_distance('York', 'Ajax', 10)
+        >>> m.add_distance('York', 'Barrie', 10)
+        >>> m.add_distance('Ajax', 'Barrie', 1)
+        >>> trucks = [Truck(1, 10, 'York'), Truck(2, 10, 'York')]
+        >>> parcels = [Parcel(1, 4, 'York', 'Ajax'),
+        ...            Parcel(2, 4, 'York', 'Barrie')]
+        >>> SavingsScheduler(m).schedule(parcels, trucks)
+        []
+        >>> trucks[0].routes
+        ['York', 'Ajax', 'Barrie']
+        """
+        if not trucks:
+            return parcels[:]
+        routes = self._build_routes(parcels, trucks[0].depot,
+                                    max(truck.capacity for truck in trucks))
+        # (available space, position) of each truck that was empty at the
+        # start, so that separate routes go onto separate trucks whenever
+        # possible.  A truck may be packed by best fit while it is still in
+        # this list; its entry is then out of date, and is dropped when found.
+        empty = sorted((truck.available_space, i)
+                       for i, truck in enumerate(trucks) if not truck.parcels)
+        result = []
+        self._start(trucks)
+        for route in sorted(routes, key=_route_volume, reverse=True):
+            volume = _route_volume(route)
+            truck = None
+            i = bisect_left(empty, (volume, -1))
+            while truck is None and i < len(empty):
+                candidate = trucks[empty.pop(i)[1]]
+                if not candidate.parcels:
+                    truck = candidate
+            if truck is None:
+                truck = self._tree.best_fit(volume)
+            if verbose:
+                print('Route of', len(route), 'parcels ->', truck)
+            for parcel in route:
+                if truck is None or not truck.pack(parcel):
+                    if self._place(parcel) is None:
+                        result.append(parcel)
+        self._finish()
+        return result
+
+    def _build_routes(self, parcels: List[Parcel], depot: str,
+                      limit: int) -> List[List[Parcel]]:
+        """Return the routes built by the savings algorithm for <parcels>,
+        each as the list of its parcels in delivery order.  Routes from
+        <depot> are only joined if their total volume is at most <limit>.
+        """
+        # group the parcels by destination, in order of first appearance
+        groups: Dict[str, List[Parcel]] = {}
+        for parcel in parcels:
+            if parcel.destination not in groups:
+                groups[parcel.destination] = []
+            groups[parcel.destination].append(parcel)
+        cities = list(groups)
+        n = len(cities)
+        load = [sum(parcel.volume for parcel in groups[city])
+                for city in cities]
+        out = [self._dmap.distance(depot, city) for city in cities]
+        back = [self._dmap.distance(city, depot) for city in cities]
+
+        savings = []
+        for i in range(n):
+            for j in range(n):
+                leg = self._dmap.distance(cities[i], cities[j])
+                if i != j and leg >= 0 and back[i] >= 0 and out[j] >= 0:
+                    saving = back[i] + out[j] - leg
+                    if saving > 0:
+                        savings.append((-saving, i, j))
+        heapq.heapify(savings)
+
+        # each city is in its own route until routes are joined; a city is
+        # a start or end of its route until something is joined before or
+        # after it
+        parent = list(range(n))
+        following = [-1] * n
+        has_before = [False] * n
+        has_after = [False] * n
+        while savings:
+            _, i, j = heapq.heappop(savings)
+            if has_after[i] or has_before[j]:
+                continue
+            root_i = _find(parent, i)
+            root_j = _find(parent, j)
+            if root_i == root_j or load[root_i] + load[root_j] > limit:
+                continue
+            parent[root_j] = root_i
+            load[root_i] += load[root_j]
+            following[i] = j
+            has_after[i] = True
+            has_before[j] = True
+
+        routes = []
+        for start in range(n):
+            if not has_before[start]:
+                route = []
+                city = start
+                while city != -1:
+                    route.extend(groups[cities[city]])
+                    city = following[city]
+                routes.append(route)
+        return routes
+
+
+def _find(parent: List[int], i: int) -> int:
+    """Return the representative of the set containing <i> in the union-find
+    forest <parent>, compressing the path to it.
+
+    >>> parent = [0, 0, 1, 3]
+    >>> _find(parent, 2), parent
+    (0, [0, 0, 0, 3])
     """
-    return parcel1.volume > parcel2.volume
+    root = i
+    while parent[root] != root:
+        root = parent[root]
+    while parent[i] != root:
+        parent[i], i = root, parent[i]
+    return root
 
 
-def _destination_non_decreasing(parcel1: Parcel, parcel2: Parcel) -> bool:
-    """The priority function that puts the parcels by destination
-    with non-decreasing order.
+def _route_volume(route: List[Parcel]) -> int:
+    """Return the total volume of the parcels on <route>.
     """
-    return parcel2.destination > parcel1.destination
+    return sum(parcel.volume for parcel in route)
 
 
-def _destination_non_increasing(parcel1: Parcel, parcel2: Parcel) -> bool:
-    """The priority function that puts the parcels by destination
-    with non-increasing order.
+def _drain(queue: PriorityQueue) -> Iterator[Any]:
+    """Remove and yield every item of <queue>, in priority order.
     """
-    return parcel1.destination > parcel2.destination
+    while not queue.is_empty():
+        yield queue.remove()
 
 
-def _most_available(truck1: Truck, truck2: Truck) -> bool:
-    """The priority function that puts the trucks by their
-    available space with non-increasing order.
+def _parcel_volume(parcel: Parcel) -> int:
+    """The key function that orders parcels by volume.
     """
-    return truck1.available_space > truck2.available_space
+    return parcel.volume
 
 
-def _least_available(truck1: Truck, truck2: Truck) -> bool:
-    """The priority function that puts the trucks by their
-    available space with non-decreasing order.
+def _parcel_destination(parcel: Parcel) -> str:
+    """The key function that orders parcels by destination.
     """
-    return truck2.available_space > truck1.available_space
+    return parcel.destination
 
 
 if __name__ == '__main__':
@@ -279,7 +735,9 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'allowed-io': ['compare_algorithms'],
         'allowed-import-modules': ['doctest', 'python_ta', 'typing',
-                                   'random', 'container', 'domain'],
+                                   'random', 'container', 'domain',
+                                   'truck_index', 'distance_map', 'heapq',
+                                   'bisect'],
         'disable': ['E1136'],
         'max-attributes': 15,
     })
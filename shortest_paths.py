@@ -0,0 +1,146 @@
+"""Assignment 1 - Shortest path distances (No tasks)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the function complete_distances, which treats a
+distance map as a road network, and records the length of the shortest path
+between every pair of cities that has no distance of its own.
+
+The distances between all pairs are found with the Floyd-Warshall algorithm
+on small maps, and with Dijkstra's algorithm from each city, in parallel
+worker processes, on large ones.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappop, heappush
+from typing import List, Optional, Tuple
+from matrix_distance_map import MatrixDistanceMap
+
+# The largest number of cities for which the Floyd-Warshall algorithm is
+# used.  Its running time grows with the cube of the number of cities.
+FLOYD_WARSHALL_LIMIT = 150
+
+# The distance used for pairs of cities with no path between them.
+_MISSING = float('inf')
+
+# The road network used by each worker process, as a list of the
+# (neighbour, distance) pairs of each city.  It is set once per worker by
+# _init_worker, so it is not sent again with each city.
+_worker_graph = None
+
+
+def complete_distances(dmap: MatrixDistanceMap,
+                       workers: Optional[int] = None) -> None:
+    """Record in <dmap> the length of the shortest path between each pair of
+    different cities that has no distance in <dmap>, using the distances in
+    <dmap> as roads.  Pairs with no path between them stay missing.
+
+    On maps with more than FLOYD_WARSHALL_LIMIT cities, paths are found in a
+    pool of <workers> processes; if <workers> is None, use one process per
+    CPU, and if it is 1, find them in this process.
+
+    >>> m = MatrixDistanceMap()
+    >>> m.add_distance('a', 'b', 3)
+    >>> m.add_distance('b', 'c', 4, 5)
+    >>> m.add_distance('d', 'e', 1)
+    >>> complete_distances(m)
+    >>> m.distance('a', 'c'), m.distance('c', 'a'), m.distance('a', 'd')
+    (7, 8, -1)
+    """
+    cities = dmap.cities()
+    rows = dmap.rows()
+    if len(cities) <= FLOYD_WARSHALL_LIMIT:
+        dmap.fill(cities, _floyd_warshall(rows))
+        return
+    graph = [[(j, distance) for j, distance in enumerate(row)
+              if distance != -1 and j != i] for i, row in enumerate(rows)]
+    if workers == 1:
+        _init_worker(graph)
+        paths = [_shortest_from(city) for city in range(len(graph))]
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(graph,)) as pool:
+            paths = list(pool.map(_shortest_from, range(len(graph)),
+                                  chunksize=16))
+    dmap.fill(cities, paths)
+
+
+def _floyd_warshall(rows: List[List[int]]) -> List[List[int]]:
+    """Return the lengths of the shortest paths between the cities with the
+    distances in <rows>, in the same form, with -1 where there is no path.
+
+    >>> _floyd_warshall([[-1, 3, -1], [3, -1, 4], [-1, 5, -1]])
+    [[0, 3, 7], [3, 0, 4], [8, 5, 0]]
+    """
+    paths = [[_MISSING if distance == -1 else distance for distance in row]
+             for row in rows]
+    for i, row in enumerate(paths):
+        row[i] = 0
+    for k, through_k in enumerate(paths):
+        for i, row in enumerate(paths):
+            to_k = row[k]
+            if to_k == _MISSING or i == k:
+                continue
+            paths[i] = [old if old <= to_k + rest else to_k + rest
+                        for old, rest in zip(row, through_k)]
+    return [[-1 if distance == _MISSING else distance for distance in row]
+            for row in paths]
+
+
+def _init_worker(graph: List[List[Tuple[int, int]]]) -> None:
+    """Remember <graph> as the road network this process uses.
+    """
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _shortest_from(source: int) -> List[int]:
+    """Return the length of the shortest path from city <source> to each
+    city, or -1 if there is no path to it, by Dijkstra's algorithm.
+
+    Uses the road network set by _init_worker.
+
+    >>> _init_worker([[(1, 3)], [(0, 3), (2, 4)], [(1, 5)]])
+    >>> _shortest_from(2)
+    [8, 5, 0]
+    """
+    graph = _worker_graph
+    paths = [-1] * len(graph)
+    heap = [(0, source)]
+    while heap:
+        distance, city = heappop(heap)
+        if paths[city] != -1:
+            continue
+        paths[city] = distance
+        for neighbour, road in graph[city]:
+            if paths[neighbour] == -1:
+                heappush(heap, (distance + road, neighbour))
+    return paths
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'concurrent.futures', 'heapq',
+                                   'matrix_distance_map'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
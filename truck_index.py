@@ -0,0 +1,455 @@
+"""Assignment 1 - Truck indexes (No tasks)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class TruckIndex, which keeps a list of trucks
+ordered by available space and grouped by the last city on their route, so
+that a scheduler can find the truck with the most or least available space
+that fits a parcel without scanning the whole fleet.
+
+It also contains the class CapacityTree, a segment tree over the available
+space of a list of trucks that answers first-fit and best-fit queries for
+bin packing.
+"""
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Tuple
+from city_registry import CityRegistry
+from domain import Parcel, Truck
+
+
+class TruckIndex:
+    """An index over a list of trucks, ordered by available space.
+
+    Trucks are also grouped by the last city on their route, so that the
+    trucks ending at a given destination can be found without scanning the
+    whole fleet.  The index observes its trucks, and moves a truck to its
+    new place whenever it is packed or its route changes.
+
+    Ties between trucks with the same available space are broken by the
+    position of the truck in the list the index was built from, so the
+    truck that comes first in that list is preferred.
+
+    === Private Attributes ===
+    _source:
+      The list of trucks the index was built from.
+    _cities:
+      The registry that gives the id of each city.
+    _trucks:
+      The indexed trucks, in the order they were given.
+    _positions:
+      Maps the identity, id(truck), of each indexed truck to its position
+      in <_trucks>.  Trucks are told apart by identity rather than by their
+      id attribute, which two trucks may share.
+    _spaces:
+      The available space of each truck in <_trucks> the last time the index
+      saw it, by position.
+    _ends:
+      The id of the last city on the route of each truck in <_trucks> the
+      last time the index saw it, by position.
+    _keys:
+      A sorted list with one (available space, position) pair per truck.
+    _by_destination:
+      For each city id, a sorted list with one (available space, position)
+      pair for each truck whose route ends at the city with that id.
+
+    === Representation Invariants ===
+    - <_keys> is sorted and contains (<_spaces>[i], i) for every position i.
+    - <_by_destination>[<_ends>[i]] is sorted and contains (<_spaces>[i], i)
+      for every position i.
+    - <_spaces>[i] == <_trucks>[i].available_space and
+      <_ends>[i] == <_cities>.find(<_trucks>[i].routes[-1]) for every
+      position i, until close is called.
+    """
+    _source: List[Truck]
+    _cities: CityRegistry
+    _trucks: List[Truck]
+    _positions: Dict[int, int]
+    _spaces: List[int]
+    _ends: List[int]
+    _keys: List[Tuple[int, int]]
+    _by_destination: List[List[Tuple[int, int]]]
+
+    def __init__(self, trucks: List[Truck],
+                 cities: Optional[CityRegistry] = None) -> None:
+        """Initialize an index over <trucks>, and start observing them.
+        The cities on their routes are given ids by <cities>, or by a new
+        registry if <cities> is None.
+
+        >>> index = TruckIndex([Truck(1, 10, 'York'), Truck(2, 5, 'York')])
+        >>> index.choose(Parcel(1, 6, 'York', 'Ajax'), True).id
+        1
+        """
+        self._source = trucks
+        self._cities = CityRegistry() if cities is None else cities
+        self._trucks = list(trucks)
+        self._positions = {id(truck): i for i, truck in enumerate(trucks)}
+        self._spaces = [truck.available_space for truck in trucks]
+        self._ends = [self._cities.id_of(truck.routes[-1]) for truck in trucks]
+        self._keys = sorted((space, i) for i, space in enumerate(self._spaces))
+        self._by_destination = []
+        for key in self._keys:
+            self._group(self._ends[key[1]]).append(key)
+        for truck in self._trucks:
+            truck.add_observer(self.update)
+
+    def close(self) -> None:
+        """Stop observing the indexed trucks.  The index must not be used
+        after it is closed.
+        """
+        for truck in self._trucks:
+            truck.remove_observer(self.update)
+
+    def is_over(self, trucks: List[Truck]) -> bool:
+        """Return True iff this index was built from the list <trucks>, and
+        no trucks have been added to or removed from it since.
+
+        >>> trucks = [Truck(1, 10, 'York')]
+        >>> index = TruckIndex(trucks)
+        >>> index.is_over(trucks), index.is_over(list(trucks))
+        (True, False)
+        """
+        return trucks is self._source and len(trucks) == len(self._trucks)
+
+    def update(self, truck: Truck) -> None:
+        """Move <truck> to its correct place in this index after its
+        available space or route has changed.
+
+        The index calls this itself whenever an indexed truck changes.
+
+        Precondition: <truck> is in this index.
+        """
+        position = self._positions[id(truck)]
+        old_key = (self._spaces[position], position)
+        new_key = (truck.available_space, position)
+        old_end = self._ends[position]
+        new_end = self._cities.id_of(truck.routes[-1])
+        if old_key == new_key and old_end == new_end:
+            return
+        if old_key != new_key:
+            del self._keys[bisect_left(self._keys, old_key)]
+            insort(self._keys, new_key)
+        old_group = self._by_destination[old_end]
+        del old_group[bisect_left(old_group, old_key)]
+        insort(self._group(new_end), new_key)
+        self._spaces[position] = truck.available_space
+        self._ends[position] = new_end
+
+    def _group(self, city: int) -> List[Tuple[int, int]]:
+        """Return the list of (available space, position) pairs for the
+        trucks whose route ends at the city with id <city>, first adding
+        empty lists to <_by_destination> up to that id if it has none.
+        """
+        while len(self._by_destination) <= city:
+            self._by_destination.append([])
+        return self._by_destination[city]
+
+    def choose(self, parcel: Parcel, most_available: bool) -> Optional[Truck]:
+        """Return the truck that the greedy algorithm would pack <parcel>
+        onto, or None if no truck has enough available space.
+
+        Only trucks with enough available space for <parcel> are eligible.
+        If any of them already ends its route at the destination of
+        <parcel>, only those trucks are eligible.  Among the eligible
+        trucks, return the one with the most available space if
+        <most_available> is True, and the least available space otherwise.
+
+        >>> t1 = Truck(1, 10, 'York')
+        >>> t2 = Truck(2, 8, 'York')
+        >>> t2.pack(Parcel(1, 1, 'York', 'Ajax'))
+        True
+        >>> index = TruckIndex([t1, t2])
+        >>> index.choose(Parcel(2, 2, 'York', 'Ajax'), True).id
+        2
+        >>> index.choose(Parcel(3, 2, 'York', 'Barrie'), True).id
+        1
+        >>> index.choose(Parcel(4, 2, 'York', 'Barrie'), False).id
+        2
+        >>> index.choose(Parcel(5, 20, 'York', 'Barrie'), False) is None
+        True
+        """
+        city = self._cities.find(parcel.destination)
+        if 0 <= city < len(self._by_destination):
+            group = self._by_destination[city]
+            position = _choose_key(group, parcel.volume, most_available)
+            if position is not None:
+                return self._trucks[position]
+        position = _choose_key(self._keys, parcel.volume, most_available)
+        if position is None:
+            return None
+        return self._trucks[position]
+
+
+def _choose_key(keys: List[Tuple[int, int]], volume: int,
+                most_available: bool) -> Optional[int]:
+    """Return the position in the (available space, position) pair with the
+    most available space if <most_available> is True, and otherwise the pair
+    with the least available space that is at least <volume>.  Among pairs
+    with equal space, return the smallest position.  Return None if no pair
+    has at least <volume> available space.
+
+    Precondition: <keys> is sorted.
+
+    >>> _choose_key([(3, 4), (5, 1), (5, 2)], 4, True)
+    1
+    >>> _choose_key([(3, 4), (5, 1), (5, 2)], 2, False)
+    4
+    >>> _choose_key([(3, 4), (5, 1), (5, 2)], 6, False) is None
+    True
+    """
+    if not keys or keys[-1][0] < volume:
+        return None
+    if most_available:
+        space = keys[-1][0]
+    else:
+        space = volume
+    return keys[bisect_left(keys, (space, -1))][1]
+
+
+class CapacityTree:
+    """A capacity-query engine over a list of trucks, for first-fit and
+    best-fit bin packing.
+
+    A max segment tree over the available space of the trucks, in list
+    order, finds the first truck with at least a given amount of space by
+    walking a single path from the root to a leaf.  A Fenwick tree counts
+    the trucks with each (available space, position) pair, ordered by space
+    and then by position, and finds the truck whose space is the tightest
+    fit as the first pair at or after the smallest eligible space.  Since
+    the trucks with enough space for a parcel are the pairs from there on,
+    it also samples one of them uniformly at random by finding the pair
+    with a random rank among them.  Like TruckIndex, the engine observes its
+    trucks and updates itself whenever one of them is packed.
+
+    With T trucks whose largest capacity is C, first_fit takes O(log T)
+    time, and best_fit, sample_fit and each update take O(log (C * T)).
+
+    === Private Attributes ===
+    _trucks:
+      The trucks in this engine, in the order they were given.
+    _positions:
+      Maps the identity, id(truck), of each truck to its position in
+      <_trucks>.
+    _size:
+      The number of leaves in <_tree>, the smallest power of two that is at
+      least len(<_trucks>).
+    _tree:
+      The segment tree, stored as an array.  Index 1 is the root, the
+      children of index i are 2i and 2i + 1, and the leaf for the truck at
+      position p is at index <_size> + p.  Each entry is the largest
+      available space among the trucks below it, or -1 if there are none.
+    _width:
+      The number of trucks.  The pair (space, p) has the key
+      space * <_width> + p, so keys are ordered by space and then position.
+    _universe:
+      The number of possible keys, (largest capacity + 1) * <_width>.
+    _counts:
+      The Fenwick tree over the keys, stored sparsely: entry i, for
+      1 <= i <= <_universe>, is the number of trucks whose key is in
+      [i - (i & -i), i), and missing entries are 0.
+    _step:
+      The largest power of two that is at most <_universe>, or 0.
+
+    === Representation Invariants ===
+    - len(<_tree>) == 2 * <_size>
+    - <_tree>[<_size> + p] == <_trucks>[p].available_space for every
+      position p, until close is called.
+    - <_counts> counts exactly the keys <_tree>[<_size> + p] * <_width> + p
+      for every position p.
+    """
+    _trucks: List[Truck]
+    _positions: Dict[int, int]
+    _size: int
+    _tree: List[int]
+    _width: int
+    _universe: int
+    _counts: Dict[int, int]
+    _step: int
+
+    def __init__(self, trucks: List[Truck]) -> None:
+        """Initialize an engine over <trucks>, and start observing them.
+
+        >>> tree = CapacityTree([Truck(1, 4, 'York'), Truck(2, 9, 'York')])
+        >>> tree.first_fit(5).id
+        2
+        """
+        self._trucks = list(trucks)
+        self._positions = {id(truck): i for i, truck in enumerate(trucks)}
+        self._size = 1
+        while self._size < len(trucks):
+            self._size *= 2
+        self._tree = [-1] * (2 * self._size)
+        for i, truck in enumerate(self._trucks):
+            self._tree[self._size + i] = truck.available_space
+        for i in range(self._size - 1, 0, -1):
+            self._tree[i] = max(self._tree[2 * i], self._tree[2 * i + 1])
+        self._width = len(trucks)
+        capacity = max((truck.capacity for truck in trucks), default=0)
+        self._universe = (capacity + 1) * self._width
+        self._counts = {}
+        self._step = 1
+        while self._step * 2 <= self._universe:
+            self._step *= 2
+        if self._universe == 0:
+            self._step = 0
+        for i, truck in enumerate(self._trucks):
+            self._count(truck.available_space * self._width + i, 1)
+        for truck in self._trucks:
+            truck.add_observer(self.update)
+
+    def close(self) -> None:
+        """Stop observing the trucks.  The engine must not be used after it
+        is closed.
+        """
+        for truck in self._trucks:
+            truck.remove_observer(self.update)
+
+    def update(self, truck: Truck) -> None:
+        """Record the current available space of <truck>.
+
+        The engine calls this itself whenever one of its trucks changes.
+
+        Precondition: <truck> is in this engine.
+        """
+        position = self._positions[id(truck)]
+        i = self._size + position
+        old_space = self._tree[i]
+        if old_space == truck.available_space:
+            return
+        self._count(old_space * self._width + position, -1)
+        self._count(truck.available_space * self._width + position, 1)
+        self._tree[i] = truck.available_space
+        i //= 2
+        while i >= 1:
+            self._tree[i] = max(self._tree[2 * i], self._tree[2 * i + 1])
+            i //= 2
+
+    def first_fit(self, volume: int) -> Optional[Truck]:
+        """Return the first truck, in list order, with at least <volume>
+        available space, or None if there is no such truck.
+
+        >>> trucks = [Truck(1, 3, 'York'), Truck(2, 8, 'York'),
+        ...           Truck(3, 5, 'York')]
+        >>> tree = CapacityTree(trucks)
+        >>> tree.first_fit(4).id
+        2
+        >>> tree.first_fit(9) is None
+        True
+        """
+        if self._tree[1] < volume:
+            return None
+        i = 1
+        while i < self._size:
+            i *= 2
+            if self._tree[i] < volume:
+                i += 1
+        return self._trucks[i - self._size]
+
+    def best_fit(self, volume: int) -> Optional[Truck]:
+        """Return the truck with the least available space that is at least
+        <volume>, or None if there is no such truck.  Ties go to the truck
+        that comes first in list order.
+
+        >>> trucks = [Truck(1, 3, 'York'), Truck(2, 8, 'York'),
+        ...           Truck(3, 5, 'York')]
+        >>> tree = CapacityTree(trucks)
+        >>> tree.best_fit(4).id
+        3
+        >>> tree.best_fit(9) is None
+        True
+        """
+        below = self._count_below(volume)
+        if below == self._width:
+            return None
+        return self._trucks[self._find(below) % self._width]
+
+    def _count(self, key: int, delta: int) -> None:
+        """Add <delta> to the number of trucks with the key <key>.
+        """
+        counts = self._counts
+        i = key + 1
+        while i <= self._universe:
+            counts[i] = counts.get(i, 0) + delta
+            i += i & -i
+
+    def _count_below(self, volume: int) -> int:
+        """Return the number of trucks with less than <volume> available
+        space.
+        """
+        if volume * self._width >= self._universe:
+            return self._width
+        counts = self._counts
+        i = max(volume, 0) * self._width
+        total = 0
+        while i > 0:
+            total += counts.get(i, 0)
+            i -= i & -i
+        return total
+
+    def _find(self, rank: int) -> int:
+        """Return the key of the truck with <rank> trucks before it, in order
+        of key.
+
+        Precondition: 0 <= rank < self._width
+        """
+        counts = self._counts
+        key = 0
+        step = self._step
+        while step:
+            i = key + step
+            if i <= self._universe and counts.get(i, 0) <= rank:
+                key = i
+                rank -= counts.get(i, 0)
+            step //= 2
+        return key
+
+    def sample_fit(self, volume: int,
+                   randrange: Callable[[int, int], int]) -> Optional[Truck]:
+        """Return a truck chosen uniformly at random from the trucks with at
+        least <volume> available space, or None if there is no such truck.
+
+        <randrange> is called once, like random.randrange, to pick an index
+        from a range.
+
+        >>> trucks = [Truck(1, 3, 'York'), Truck(2, 8, 'York'),
+        ...           Truck(3, 5, 'York')]
+        >>> tree = CapacityTree(trucks)
+        >>> tree.sample_fit(4, lambda start, stop: start).id
+        3
+        >>> tree.sample_fit(4, lambda start, stop: stop - 1).id
+        2
+        >>> tree.sample_fit(9, lambda start, stop: start) is None
+        True
+        """
+        below = self._count_below(volume)
+        if below == self._width:
+            return None
+        rank = randrange(below, self._width)
+        return self._trucks[self._find(rank) % self._width]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'bisect', 'city_registry', 'domain'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })